@@ -11,9 +11,9 @@ from time import sleep
 import psutil
 
 import os
-import shutil
 
 from config import Config
+from core.cache_manager import CacheManager
 from database import BotDBUtil
 
 encode = 'UTF-8'
@@ -87,12 +87,9 @@ def enqueue_output(out, queue):
 
 
 def init_bot():
-    cache_path = os.path.abspath('./cache/')
-    if os.path.exists(cache_path):
-        shutil.rmtree(cache_path)
-        os.mkdir(cache_path)
-    else:
-        os.mkdir(cache_path)
+    CacheManager.clear_temporary()
+
+    BotDBUtil.Module.migrate_legacy_table()
 
     base_superuser = Config('base_superuser')
     if base_superuser:
@@ -1,30 +1,81 @@
-from configparser import ConfigParser
+import os
+import threading
+import time
+from configparser import ConfigParser, Error
 from os.path import abspath
 
 from core.exceptions import ConfigFileNotFound
+from core.logger import Logger
 
 config_filename = 'config.cfg'
 config_path = abspath('./config/' + config_filename)
 
 
 class CFG:
-    def config(self, q):
-        cp = ConfigParser()
-        cp.read(config_path)
-        try:
-            section = cp.sections()
-            if len(section) == 0:
-                raise ConfigFileNotFound(config_path) from None
-            section = section[0]
-            value = cp.get(section, q)
-        except Exception:
-            return False
+    """
+    配置文件只在修改后重新解析，解析后的值保存在内存中。
+    """
+
+    def __init__(self, path: str = config_path, check_interval: float = 1):
+        """
+        :param path: 配置文件的路径
+        :param check_interval: 检查配置文件修改时间的最短间隔（秒）
+        """
+        self.path = path
+        self.check_interval = check_interval
+        self.values = {}
+        self.mtime = None
+        self.checked = None
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def convert(value: str):
         if value.upper() == 'TRUE':
             return True
         if value.upper() == 'FALSE':
             return False
         return value
 
+    def load(self):
+        cp = ConfigParser()
+        cp.read(self.path)
+        section = cp.sections()
+        if len(section) == 0:
+            raise ConfigFileNotFound(self.path) from None
+        section = section[0]
+        values = {}
+        for k in cp.options(section):
+            try:
+                values[k] = self.convert(cp.get(section, k))
+            except Error as e:  # 只有解析失败的选项不可用，例如值中含有未转义的%
+                Logger.error(f'Failed to read config option {k}: {e}')
+        self.values = values
+
+    def reload_if_modified(self):
+        now = time.monotonic()
+        if self.checked is not None and now - self.checked < self.check_interval:
+            return
+        with self.lock:
+            if self.checked is not None and now - self.checked < self.check_interval:
+                return
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except OSError:
+                mtime = None
+            if mtime != self.mtime or self.checked is None:
+                try:
+                    self.load()
+                except ConfigFileNotFound:
+                    pass
+                except Exception as e:  # 保留上一次成功读取的值
+                    Logger.error(f'Failed to load {self.path}: {e!r}')
+                self.mtime = mtime
+            self.checked = now
+
+    def config(self, q):
+        self.reload_if_modified()
+        return self.values.get(q.lower(), False)
+
 
 Config = CFG().config
 CachePath = Config('cache_path')
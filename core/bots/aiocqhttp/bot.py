@@ -9,13 +9,15 @@ from config import Config
 from core.bots.aiocqhttp.client import bot
 from core.bots.aiocqhttp.message import MessageSession, FetchTarget
 from core.bots.aiocqhttp.message_guild import MessageSession as MessageSessionGuild
+from core.bots.aiocqhttp.roster import Roster
 from core.bots.aiocqhttp.tasks import MessageTaskManager, FinishedTasks
 from core.elements import MsgInfo, Session, StartUp, Schedule, EnableDirtyWordCheck, PrivateAssets
+from core.http_client import HTTPClient
 from core.loader import ModulesManager
 from core.parser.message import parser
 from core.scheduler import Scheduler
 from core.utils import init, load_prompt
-from database import BotDBUtil
+from database import BotDBUtil, run_sync
 from database.logging_message import UnfriendlyActions
 
 PrivateAssets.set(os.path.abspath(os.path.dirname(__file__) + '/assets'))
@@ -38,6 +40,11 @@ async def startup():
     bot.logger.setLevel(logging.WARNING)
 
 
+@bot.server_app.after_serving
+async def shutdown():
+    await HTTPClient.close()
+
+
 @bot.on_websocket_connection
 async def _(event: Event):
     await load_prompt(FetchTarget)
@@ -108,17 +115,23 @@ async def _(event: Event):
                                        '请至https://github.com/Teahouse-Studios/bot/issues/new?assignees=OasisAkari&labels=New&template=add_new_group.yaml&title=%5BNEW%5D%3A+申请入群。')
 
 
+@bot.on_notice('group_increase', 'group_decrease', 'friend_add', 'channel_created', 'channel_destroyed')
+async def _(event: Event):
+    Roster.on_notice(event)
+
+
 @bot.on_notice('group_ban')
 async def _(event: Event):
     if event.user_id == int(Config("qq_account")):
         if event.duration >= 259200:
             result = True
         else:
-            result = UnfriendlyActions(targetId=event.group_id,
-                                       senderId=event.operator_id).add_and_check('mute', str(event.duration))
+            unfriendly_actions = UnfriendlyActions(targetId=event.group_id, senderId=event.operator_id)
+            result = await run_sync(unfriendly_actions.add_and_check, 'mute', str(event.duration))
         if result:
             await bot.call_action('set_group_leave', group_id=event.group_id)
-            BotDBUtil.SenderInfo('QQ|' + str(event.operator_id)).edit('isInBlockList', True)
+            sender_info = await run_sync(BotDBUtil.SenderInfo, 'QQ|' + str(event.operator_id))
+            await run_sync(sender_info.edit, 'isInBlockList', True)
             await bot.call_action('delete_friend', friend_id=event.operator_id)
 
 
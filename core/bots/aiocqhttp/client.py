@@ -1,3 +1,14 @@
-from aiocqhttp import CQHttp
+from aiocqhttp import CQHttp, MessageSegment
+
+from core.send_queue import SendQueue
+
+
+def merge_message(a: tuple, b: tuple):
+    '''最后一个参数为消息，其余参数（如频道号）相同时才能合并。'''
+    if a[:-1] != b[:-1]:
+        return None
+    return (*a[:-1], a[-1] + MessageSegment.text('\n') + b[-1])
+
 
 bot = CQHttp()
+send_queue = SendQueue('QQ', merge=merge_message)
@@ -1,4 +1,5 @@
 import asyncio
+import base64
 import html
 import re
 import traceback
@@ -8,15 +9,18 @@ from typing import List, Union
 import aiocqhttp.exceptions
 from aiocqhttp import MessageSegment
 
-from core.bots.aiocqhttp.client import bot
+from core.bots.aiocqhttp.client import bot, send_queue
 from core.bots.aiocqhttp.message_guild import MessageSession as MessageSessionGuild
+from core.bots.aiocqhttp.roster import Roster
 from core.bots.aiocqhttp.tasks import MessageTaskManager, FinishedTasks
+from core.broadcast import Broadcast
 from core.elements import Plain, Image, MessageSession as MS, MsgInfo, Session, Voice, FetchTarget as FT, \
     ExecutionLockList, FetchedSession as FS, FinishedSession as FinS
 from core.elements.message.chain import MessageChain
 from core.elements.others import confirm_command
 from core.logger import Logger
-from database import BotDBUtil
+from core.send_queue import SendQueue
+from database import BotDBUtil, run_sync
 
 
 class FinishedSession(FinS):
@@ -29,6 +33,9 @@ class FinishedSession(FinS):
         """
         try:
             for x in self.result:
+                if send_queue.is_merged(x):  # 与其他消息合并发送，撤回会连同其他消息一起撤回
+                    Logger.info(f'Skip deleting merged message {x["message_id"]}')
+                    continue
                 await bot.call_action('delete_msg', message_id=x['message_id'])
         except Exception:
             Logger.error(traceback.format_exc())
@@ -46,7 +53,8 @@ class MessageSession(MS):
 
     async def sendMessage(self, msgchain, quote=True, disable_secret_check=False) -> FinishedSession:
         msg = MessageSegment.text('')
-        if quote and self.target.targetFrom == 'QQ|Group' and self.session.message:
+        quoted = quote and self.target.targetFrom == 'QQ|Group' and self.session.message
+        if quoted:
             msg = MessageSegment.reply(self.session.message.message_id)
         msgchain = MessageChain(msgchain)
         if not msgchain.is_safe and not disable_secret_check:
@@ -56,20 +64,27 @@ class MessageSession(MS):
             if isinstance(x, Plain):
                 msg = msg + MessageSegment.text(('\n' if count != 0 else '') + x.text)
             elif isinstance(x, Image):
-                msg = msg + MessageSegment.image(Path(await x.get()).as_uri())
+                if x.data is not None:
+                    msg = msg + MessageSegment.image('base64://' + base64.b64encode(x.data).decode())
+                else:
+                    msg = msg + MessageSegment.image(Path(await x.get()).as_uri())
             elif isinstance(x, Voice):
                 msg = msg + MessageSegment.record(Path(x.path).as_uri())
             count += 1
-        Logger.info(f'[Bot] -> [{self.target.targetId}]: {msg}')
+        Logger.info(f'[Bot] -> [{self.target.targetId}]: {re.sub(r"base64://[^],]+", "base64://...", str(msg))}')
+        send = await send_queue.put(self.target.targetId, self._send, msg,
+                                    priority=SendQueue.HIGH if self.session.message else SendQueue.LOW,
+                                    mergeable=not quoted)
+        return FinishedSession([send])
+
+    async def _send(self, msg):
         if self.target.targetFrom == 'QQ|Group':
             try:
-                send = await bot.send_group_msg(group_id=self.session.target, message=msg)
+                return await bot.send_group_msg(group_id=self.session.target, message=msg)
             except aiocqhttp.exceptions.ActionFailed:
                 msg = msg + MessageSegment.text('（房蜂控）')
-                send = await bot.send_group_msg(group_id=self.session.target, message=msg)
-        else:
-            send = await bot.send_private_msg(user_id=self.session.target, message=msg)
-        return FinishedSession([send])
+                return await bot.send_group_msg(group_id=self.session.target, message=msg)
+        return await bot.send_private_msg(user_id=self.session.target, message=msg)
 
     async def waitConfirm(self, msgchain=None, quote=True):
         send = None
@@ -89,7 +104,7 @@ class MessageSession(MS):
 
     async def checkPermission(self):
         if self.target.targetFrom == 'QQ' \
-            or self.target.senderInfo.check_TargetAdmin(self.target.targetId) \
+            or await run_sync(self.target.senderInfo.check_TargetAdmin, self.target.targetId) \
             or self.target.senderInfo.query.isSuperUser:
             return True
         get_member_info = await bot.call_action('get_group_member_info', group_id=self.session.target,
@@ -173,82 +188,23 @@ class FetchTarget(FT):
     @staticmethod
     async def fetch_target_list(targetList: list) -> List[FetchedSession]:
         lst = []
-        group_list_raw = await bot.call_action('get_group_list')
-        group_list = []
-        for g in group_list_raw:
-            group_list.append(g['group_id'])
-        friend_list_raw = await bot.call_action('get_friend_list')
-        friend_list = []
-        guild_list_raw = await bot.call_action('get_guild_list')
-        guild_list = []
-        for g in guild_list_raw:
-            get_channel_list = await bot.call_action('get_guild_channel_list', guild_id=g['guild_id'])
-            for channel in get_channel_list:
-                if channel['channel_type'] == 1:
-                    guild_list.append(f"{str(g['guild_id'])}|{str(channel['channel_id'])}")
-        for f in friend_list_raw:
-            friend_list.append(f)
+        roster = await Roster.get()
         for x in targetList:
             fet = await FetchTarget.fetch_target(x)
-            if fet:
-                if fet.target.targetFrom == 'QQ|Group':
-                    if fet.session.target not in group_list:
-                        continue
-                if fet.target.targetFrom == 'QQ':
-                    if fet.session.target not in friend_list:
-                        continue
-                if fet.target.targetFrom == 'QQ|Guild':
-                    if fet.session.target not in guild_list:
-                        continue
+            if fet and roster.contains(fet):
                 lst.append(fet)
         return lst
 
     @staticmethod
     async def post_message(module_name, message, user_list: List[FetchedSession] = None):
-        send_list = []
-        if user_list is not None:
-            for x in user_list:
-                try:
-                    send = await x.sendDirectMessage(message)
-                    send_list.append(send)
-                except Exception:
-                    Logger.error(traceback.format_exc())
-        else:
-            get_target_id = BotDBUtil.Module.get_enabled_this(module_name)
-            group_list_raw = await bot.call_action('get_group_list')
-            group_list = []
-            for g in group_list_raw:
-                group_list.append(g['group_id'])
-            friend_list_raw = await bot.call_action('get_friend_list')
-            friend_list = []
-            for f in friend_list_raw:
-                friend_list.append(f['user_id'])
-            guild_list_raw = await bot.call_action('get_guild_list')
-            guild_list = []
-            for g in guild_list_raw:
-                get_channel_list = await bot.call_action('get_guild_channel_list', guild_id=g['guild_id'],
-                                                         no_cache=True)
-                for channel in get_channel_list:
-                    if channel['channel_type'] == 1:
-                        guild_list.append(f"{str(g['guild_id'])}|{str(channel['channel_id'])}")
+        if user_list is None:
+            get_target_id = await run_sync(BotDBUtil.Module.get_enabled_this, module_name)
+            roster = await Roster.get()
+            user_list = []
             for x in get_target_id:
                 fetch = await FetchTarget.fetch_target(x)
-                Logger.info(fetch)
-                if fetch:
-                    if fetch.target.targetFrom == 'QQ|Group':
-                        if int(fetch.session.target) not in group_list:
-                            continue
-                    if fetch.target.targetFrom == 'QQ':
-                        if int(fetch.session.target) not in friend_list:
-                            continue
-                    if fetch.target.targetFrom == 'QQ|Guild':
-                        if fetch.session.target not in guild_list:
-                            continue
-                    try:
-                        print(fetch)
-                        send = await fetch.sendDirectMessage(message)
-                        send_list.append(send)
-                        await asyncio.sleep(0.5)
-                    except Exception:
-                        Logger.error(traceback.format_exc())
-        return send_list
+                if fetch and roster.contains(fetch):
+                    user_list.append(fetch)
+        report = await Broadcast.send(module_name, message, user_list,
+                                      retry_on=(aiocqhttp.exceptions.ActionFailed,))
+        return [x for x in report.results if x is not None]
@@ -1,16 +1,19 @@
 import asyncio
+import base64
 import html
 import re
 from pathlib import Path
 
 from aiocqhttp import MessageSegment
 
-from core.bots.aiocqhttp.client import bot
+from core.bots.aiocqhttp.client import bot, send_queue
 from core.bots.aiocqhttp.tasks import MessageTaskManager, FinishedTasks
 from core.elements import Plain, Image, MessageSession as MS, ExecutionLockList, FinishedSession as FinS
 from core.elements.message.chain import MessageChain
 from core.elements.others import confirm_command
 from core.logger import Logger
+from core.send_queue import SendQueue
+from database import BotDBUtil, run_sync
 
 
 class FinishedSession(FinS):
@@ -44,18 +47,26 @@ class MessageSession(MS):
             if isinstance(x, Plain):
                 msg = msg + MessageSegment.text(('\n' if count != 0 else '') + x.text)
             elif isinstance(x, Image):
-                msg = msg + MessageSegment.image(Path(await x.get()).as_uri())
+                if x.data is not None:
+                    msg = msg + MessageSegment.image('base64://' + base64.b64encode(x.data).decode())
+                else:
+                    msg = msg + MessageSegment.image(Path(await x.get()).as_uri())
             # elif isinstance(x, Voice):
             #    msg = msg + MessageSegment.record(Path(x.path).as_uri())
             count += 1
-        Logger.info(f'[Bot] -> [{self.target.targetId}]: {msg}')
+        Logger.info(f'[Bot] -> [{self.target.targetId}]: {re.sub(r"base64://[^],]+", "base64://...", str(msg))}')
         Logger.info(self.session.target)
         match_guild = re.match(r'(.*)\|(.*)', self.session.target)
-        send = await bot.call_action('send_guild_channel_msg', guild_id=int(match_guild.group(1)),
-                                     channel_id=int(match_guild.group(2)), message=msg)
-
+        send = await send_queue.put(self.target.targetId, self._send, int(match_guild.group(1)),
+                                    int(match_guild.group(2)), msg,
+                                    priority=SendQueue.HIGH if self.session.message else SendQueue.LOW,
+                                    mergeable=True)
         return FinishedSession([send])
 
+    @staticmethod
+    async def _send(guild_id, channel_id, msg):
+        return await bot.call_action('send_guild_channel_msg', guild_id=guild_id, channel_id=channel_id, message=msg)
+
     async def waitConfirm(self, msgchain=None, quote=True):
         send = None
         ExecutionLockList.remove(self)
@@ -73,7 +84,8 @@ class MessageSession(MS):
         return False
 
     async def checkPermission(self):
-        if self.target.senderInfo.check_TargetAdmin(self.target.targetId) or self.target.senderInfo.query.isSuperUser:
+        if await run_sync(self.target.senderInfo.check_TargetAdmin, self.target.targetId) \
+                or self.target.senderInfo.query.isSuperUser:
             return True
         return await self.checkNativePermission()
 
@@ -176,7 +188,7 @@ class FetchTarget(FT):
                 except Exception:
                     traceback.print_exc()
         else:
-            get_target_id = BotDBUtil.Module.get_enabled_this(module_name)
+            get_target_id = await run_sync(BotDBUtil.Module.get_enabled_this, module_name)
             guild_list_raw = await bot.call_action('get_guild_list')
             guild_list = []
             for g in guild_list_raw:
@@ -0,0 +1,81 @@
+import asyncio
+import time
+from typing import Optional
+
+from aiocqhttp import Event
+
+from config import Config
+from core.bots.aiocqhttp.client import bot
+from core.elements import FetchedSession
+
+ROSTER_TTL = int(Config('qq_roster_ttl') or 300)  # 群、好友与频道列表的缓存秒数
+ROSTER_CONCURRENCY = int(Config('qq_roster_concurrency') or 10)  # 同时获取子频道列表的频道数
+
+
+class Roster:
+    """
+    缓存机器人所在的群、好友与子频道，收到相应的通知事件时就地更新，超过ROSTER_TTL秒后重新获取。
+    """
+    groups = set()
+    friends = set()
+    guild_channels = set()  # '{guild_id}|{channel_id}'
+    updated: Optional[float] = None  # 尚未获取时为None
+    _lock = None
+
+    @staticmethod
+    async def refresh():
+        group_list, friend_list, guild_list = await asyncio.gather(bot.call_action('get_group_list'),
+                                                                   bot.call_action('get_friend_list'),
+                                                                   bot.call_action('get_guild_list'))
+        semaphore = asyncio.Semaphore(ROSTER_CONCURRENCY)
+
+        async def get_channel_list(guild_id):
+            async with semaphore:
+                return guild_id, await bot.call_action('get_guild_channel_list', guild_id=guild_id, no_cache=True)
+
+        guild_channels = set()
+        for guild_id, channel_list in await asyncio.gather(*(get_channel_list(g['guild_id']) for g in guild_list)):
+            for channel in channel_list:
+                if channel['channel_type'] == 1:
+                    guild_channels.add(f"{str(guild_id)}|{str(channel['channel_id'])}")
+        Roster.groups = {g['group_id'] for g in group_list}
+        Roster.friends = {f['user_id'] for f in friend_list}
+        Roster.guild_channels = guild_channels
+        Roster.updated = time.monotonic()
+
+    @staticmethod
+    async def get() -> 'Roster':
+        if Roster._lock is None:
+            Roster._lock = asyncio.Lock()
+        async with Roster._lock:
+            if Roster.updated is None or time.monotonic() - Roster.updated > ROSTER_TTL:
+                await Roster.refresh()
+        return Roster
+
+    @staticmethod
+    def invalidate():
+        Roster.updated = None
+
+    @staticmethod
+    def contains(fetch: FetchedSession) -> bool:
+        if fetch.target.targetFrom == 'QQ|Group':
+            return int(fetch.session.target) in Roster.groups
+        if fetch.target.targetFrom == 'QQ':
+            return int(fetch.session.target) in Roster.friends
+        if fetch.target.targetFrom == 'QQ|Guild':
+            return fetch.session.target in Roster.guild_channels
+        return True
+
+    @staticmethod
+    def on_notice(event: Event):
+        if event.notice_type == 'group_increase' and event.user_id == event.self_id:
+            Roster.groups.add(event.group_id)
+        elif event.notice_type == 'group_decrease' and (event.sub_type == 'kick_me' or event.user_id == event.self_id):
+            Roster.groups.discard(event.group_id)
+        elif event.notice_type == 'friend_add':
+            Roster.friends.add(event.user_id)
+        elif event.notice_type == 'channel_created':
+            if event.channel_info and event.channel_info.get('channel_type') == 1:
+                Roster.guild_channels.add(f'{str(event.guild_id)}|{str(event.channel_id)}')
+        elif event.notice_type == 'channel_destroyed':
+            Roster.guild_channels.discard(f'{str(event.guild_id)}|{str(event.channel_id)}')
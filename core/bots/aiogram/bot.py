@@ -8,6 +8,7 @@ from core.bots.aiogram.client import dp
 from core.bots.aiogram.message import MessageSession, FetchTarget
 from core.bots.aiogram.tasks import MessageTaskManager, FinishedTasks
 from core.elements import MsgInfo, Session, StartUp, Schedule, PrivateAssets, Url
+from core.http_client import HTTPClient
 from core.loader import ModulesManager
 from core.parser.message import parser
 from core.scheduler import Scheduler
@@ -48,5 +49,9 @@ async def on_startup(dispatcher):
     await load_prompt(FetchTarget)
 
 
+async def on_shutdown(dispatcher):
+    await HTTPClient.close()
+
+
 if dp:
-    executor.start_polling(dp, skip_updates=True, on_startup=on_startup)
+    executor.start_polling(dp, skip_updates=True, on_startup=on_startup, on_shutdown=on_shutdown)
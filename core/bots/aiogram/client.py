@@ -1,9 +1,13 @@
 from aiogram import Bot, Dispatcher
 
 from config import Config
+from core.media_cache import MediaCache
+from core.send_queue import SendQueue
 
 bot = Bot(token=Config('tg_token'))
 if bot:
     dp = Dispatcher(bot)
 else:
     dp = False
+send_queue = SendQueue('Telegram')
+media_cache = MediaCache('Telegram')
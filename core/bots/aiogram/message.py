@@ -1,16 +1,23 @@
 import asyncio
 import re
 import traceback
+from io import BytesIO
 from typing import List, Union
 
-from core.bots.aiogram.client import dp, bot
+from aiogram.types import InputFile
+from aiogram.utils.exceptions import BadRequest, RetryAfter
+
+from core.bots.aiogram.client import dp, bot, send_queue, media_cache
 from core.bots.aiogram.tasks import MessageTaskManager, FinishedTasks
+from core.broadcast import Broadcast, PartiallySentError
 from core.elements import Plain, Image, MessageSession as MS, MsgInfo, Session, Voice, FetchTarget as FT, \
     ExecutionLockList, FetchedSession as FS, FinishedSession as FinS
 from core.elements.message.chain import MessageChain
 from core.elements.others import confirm_command
 from core.logger import Logger
-from database import BotDBUtil
+from core.media_cache import MediaCache
+from core.send_queue import SendQueue
+from database import BotDBUtil, run_sync
 
 
 class FinishedSession(FinS):
@@ -44,32 +51,54 @@ class MessageSession(MS):
             return await self.sendMessage('https://wdf.ink/6Oup')
         count = 0
         send = []
+        priority = SendQueue.HIGH if self.session.message else SendQueue.LOW
         for x in msgchain.asSendable(embed=False):
-            if isinstance(x, Plain):
-                send_ = await bot.send_message(self.session.target, x.text,
-                                               reply_to_message_id=self.session.message.message_id if quote
-                                                                                                      and count == 0 and self.session.message else None)
-                Logger.info(f'[Bot] -> [{self.target.targetId}]: {x.text}')
-            elif isinstance(x, Image):
-                with open(await x.get(), 'rb') as image:
-                    send_ = await bot.send_photo(self.session.target, image,
-                                                 reply_to_message_id=self.session.message.message_id if quote
-                                                                                                        and count == 0
-                                                                                                        and self.session.message else None)
-                    Logger.info(f'[Bot] -> [{self.target.targetId}]: Image: {str(x.__dict__)}')
-            elif isinstance(x, Voice):
-                with open(x.path, 'rb') as voice:
-                    send_ = await bot.send_audio(self.session.target, voice,
-                                                 reply_to_message_id=self.session.message.message_id if quote
-                                                                                                        and count == 0 and self.session.message else None)
+            reply_to_message_id = self.session.message.message_id if quote and count == 0 \
+                and self.session.message else None
+            try:
+                if isinstance(x, Plain):
+                    send_ = await send_queue.put(self.target.targetId, bot.send_message, self.session.target,
+                                                 x.text, reply_to_message_id=reply_to_message_id, priority=priority)
+                    Logger.info(f'[Bot] -> [{self.target.targetId}]: {x.text}')
+                elif isinstance(x, Image):
+                    send_ = await self._send_media(bot.send_photo, x, reply_to_message_id, priority)
+                    Logger.info(f'[Bot] -> [{self.target.targetId}]: Image: {x}')
+                elif isinstance(x, Voice):
+                    send_ = await self._send_media(bot.send_audio, x, reply_to_message_id, priority)
                     Logger.info(f'[Bot] -> [{self.target.targetId}]: Voice: {str(x.__dict__)}')
-            else:
-                send_ = False
+                else:
+                    send_ = False
+            except Exception as e:
+                if send:  # 每个元素单独发送，前面的元素已经发出
+                    raise PartiallySentError(f'{len(send)} message(s) already sent to {self.target.targetId}') from e
+                raise
             if send_:
                 send.append(send_)
             count += 1
         return FinishedSession(send)
 
+    async def _send_media(self, method, x, reply_to_message_id, priority):
+        digest = await MediaCache.digest(x)
+        file_id = media_cache.get(digest)
+        if file_id is not None:
+            try:
+                return await send_queue.put(self.target.targetId, method, self.session.target, file_id,
+                                            reply_to_message_id=reply_to_message_id, priority=priority)
+            except BadRequest:
+                media_cache.remove(digest)
+        if isinstance(x, Image) and x.data is not None:
+            send_ = await send_queue.put(self.target.targetId, method, self.session.target,
+                                         InputFile(BytesIO(x.data), filename=x.filename),
+                                         reply_to_message_id=reply_to_message_id, priority=priority)
+        else:
+            with open(await x.get() if isinstance(x, Image) else x.path, 'rb') as file:
+                send_ = await send_queue.put(self.target.targetId, method, self.session.target, file,
+                                             reply_to_message_id=reply_to_message_id, priority=priority)
+        media = send_.photo[-1] if send_.photo else send_.audio
+        if media is not None:
+            media_cache.set(digest, media.file_id)
+        return send_
+
     async def waitConfirm(self, msgchain=None, quote=True):
         ExecutionLockList.remove(self)
         send = None
@@ -87,8 +116,9 @@ class MessageSession(MS):
         return False
 
     async def checkPermission(self):
-        if self.session.message.chat.type == 'private' or self.target.senderInfo.check_TargetAdmin(
-            self.target.targetId) or self.target.senderInfo.query.isSuperUser:
+        if self.session.message.chat.type == 'private' or await run_sync(self.target.senderInfo.check_TargetAdmin,
+                                                                         self.target.targetId) \
+                or self.target.senderInfo.query.isSuperUser:
             return True
         admins = [member.user.id for member in await dp.bot.get_chat_administrators(self.session.message.chat.id)]
         if self.session.sender in admins:
@@ -165,22 +195,12 @@ class FetchTarget(FT):
 
     @staticmethod
     async def post_message(module_name, message, user_list: List[FetchedSession] = None):
-        send_list = []
-        if user_list is not None:
-            for x in user_list:
-                try:
-                    send = await x.sendDirectMessage(message)
-                    send_list.append(send)
-                except Exception:
-                    Logger.error(traceback.format_exc())
-        else:
-            get_target_id = BotDBUtil.Module.get_enabled_this(module_name)
+        if user_list is None:
+            get_target_id = await run_sync(BotDBUtil.Module.get_enabled_this, module_name)
+            user_list = []
             for x in get_target_id:
                 fetch = await FetchTarget.fetch_target(x)
                 if fetch:
-                    try:
-                        send = await fetch.sendDirectMessage(message)
-                        send_list.append(send)
-                    except Exception:
-                        Logger.error(traceback.format_exc())
-        return send_list
+                    user_list.append(fetch)
+        report = await Broadcast.send(module_name, message, user_list, retry_on=(RetryAfter,))
+        return [x for x in report.results if x is not None]
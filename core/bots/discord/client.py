@@ -1,3 +1,18 @@
 import discord
 
-client = discord.Client()
+from core.http_client import HTTPClient
+from core.media_cache import MediaCache
+from core.send_queue import SendQueue
+
+ATTACHMENT_URL_TTL = 43200  # 附件url带有会过期的签名，在此秒数后重新上传
+
+
+class Client(discord.Client):
+    async def close(self):
+        await HTTPClient.close()
+        await super().close()
+
+
+client = Client()
+send_queue = SendQueue('Discord')
+media_cache = MediaCache('Discord', ttl=ATTACHMENT_URL_TTL)
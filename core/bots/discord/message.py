@@ -2,23 +2,41 @@ import asyncio
 import datetime
 import re
 import traceback
+from io import BytesIO
 from typing import List, Union
 
 import discord
 
-from core.bots.discord.client import client
+from core.bots.discord.client import client, send_queue, media_cache
+from core.broadcast import Broadcast
 from core.elements import Plain, Image, MessageSession as MS, MsgInfo, Session, FetchTarget as FT, ExecutionLockList, \
     FetchedSession as FS, FinishedSession as FinS
 from core.elements.message.chain import MessageChain
 from core.elements.message.internal import Embed
 from core.elements.others import confirm_command
 from core.logger import Logger
-from database import BotDBUtil
+from core.media_cache import MediaCache
+from core.send_queue import SendQueue
+from database import BotDBUtil, run_sync
+
+
+async def convert_image(image: Image, filename: str = None) -> discord.File:
+    if image.data is not None:
+        return discord.File(BytesIO(image.data), filename=filename or image.filename)
+    return discord.File(await image.get(), filename=filename)
+
+
+def record_attachments(send_, digests: dict):
+    '''记录消息中上传的附件的url，digests为文件名到内容SHA-256的映射。'''
+    for attachment in send_.attachments:
+        if attachment.filename in digests:
+            media_cache.set(digests[attachment.filename], attachment.url)
 
 
 async def convert_embed(embed: Embed):
     if isinstance(embed, Embed):
         files = []
+        digests = {}
         embeds = discord.Embed(title=embed.title if embed.title is not None else discord.Embed.Empty,
                                description=embed.description if embed.description is not None else discord.Embed.Empty,
                                color=embed.color if embed.color is not None else discord.Embed.Empty,
@@ -26,13 +44,21 @@ async def convert_embed(embed: Embed):
                                timestamp=datetime.datetime.fromtimestamp(
                                    embed.timestamp) if embed.timestamp is not None else discord.Embed.Empty, )
         if embed.image is not None:
-            upload = discord.File(await embed.image.get(), filename="image.png")
-            files.append(upload)
-            embeds.set_image(url="attachment://image.png")
+            digest = await MediaCache.digest(embed.image)
+            url = media_cache.get(digest)
+            if url is None:
+                files.append(await convert_image(embed.image, filename="image.png"))
+                digests["image.png"] = digest
+                url = "attachment://image.png"
+            embeds.set_image(url=url)
         if embed.thumbnail is not None:
-            upload = discord.File(await embed.thumbnail.get(), filename="thumbnail.png")
-            files.append(upload)
-            embeds.set_thumbnail(url="attachment://thumbnail.png")
+            digest = await MediaCache.digest(embed.thumbnail)
+            url = media_cache.get(digest)
+            if url is None:
+                files.append(await convert_image(embed.thumbnail, filename="thumbnail.png"))
+                digests["thumbnail.png"] = digest
+                url = "attachment://thumbnail.png"
+            embeds.set_thumbnail(url=url)
         if embed.author is not None:
             embeds.set_author(name=embed.author)
         if embed.footer is not None:
@@ -40,7 +66,7 @@ async def convert_embed(embed: Embed):
         if embed.fields is not None:
             for field in embed.fields:
                 embeds.add_field(name=field.name, value=field.value, inline=field.inline)
-        return embeds, files
+        return embeds, files, digests
 
 
 class FinishedSession(FinS):
@@ -74,23 +100,25 @@ class MessageSession(MS):
             return await self.sendMessage('https://wdf.ink/6Oup')
         count = 0
         send = []
+        priority = SendQueue.HIGH if self.session.message else SendQueue.LOW
         for x in msgchain.asSendable():
+            reference = self.session.message if quote and count == 0 and self.session.message else None
             if isinstance(x, Plain):
-                send_ = await self.session.target.send(x.text,
-                                                       reference=self.session.message if quote and count == 0
-                                                                                         and self.session.message else None)
+                send_ = await send_queue.put(self.target.targetId, self.session.target.send, x.text,
+                                             reference=reference, priority=priority)
                 Logger.info(f'[Bot] -> [{self.target.targetId}]: {x.text}')
             elif isinstance(x, Image):
-                send_ = await self.session.target.send(file=discord.File(await x.get()),
-                                                       reference=self.session.message if quote and count == 0
-                                                                                         and self.session.message else None)
-                Logger.info(f'[Bot] -> [{self.target.targetId}]: Image: {str(x.__dict__)}')
+                # 单独的图片总是作为附件上传，以url发送会变成文本链接；上传后的url供Embed中的同一图片使用
+                file = await convert_image(x)
+                send_ = await send_queue.put(self.target.targetId, self.session.target.send, file=file,
+                                             reference=reference, priority=priority)
+                record_attachments(send_, {file.filename: await MediaCache.digest(x)})
+                Logger.info(f'[Bot] -> [{self.target.targetId}]: Image: {x}')
             elif isinstance(x, Embed):
-                embeds, files = await convert_embed(x)
-                send_ = await self.session.target.send(embed=embeds,
-                                                       reference=self.session.message if quote and count == 0
-                                                                                         and self.session.message else None,
-                                                       files=files)
+                embeds, files, digests = await convert_embed(x)
+                send_ = await send_queue.put(self.target.targetId, self.session.target.send, embed=embeds,
+                                             reference=reference, files=files, priority=priority)
+                record_attachments(send_, digests)
                 Logger.info(f'[Bot] -> [{self.target.targetId}]: Embed: {str(x.__dict__)}')
             else:
                 send_ = False
@@ -119,7 +147,7 @@ class MessageSession(MS):
         if self.session.message.channel.permissions_for(self.session.message.author).administrator \
             or isinstance(self.session.message.channel, discord.DMChannel) \
             or self.target.senderInfo.query.isSuperUser \
-                or self.target.senderInfo.check_TargetAdmin(self.target.targetId):
+                or await run_sync(self.target.senderInfo.check_TargetAdmin, self.target.targetId):
             return True
         return False
 
@@ -206,22 +234,12 @@ class FetchTarget(FT):
 
     @staticmethod
     async def post_message(module_name, message, user_list: List[FetchedSession] = None):
-        send_list = []
-        if user_list is not None:
-            for x in user_list:
-                try:
-                    send = await x.sendDirectMessage(message)
-                    send_list.append(send)
-                except Exception:
-                    Logger.error(traceback.format_exc())
-        else:
-            get_target_id = BotDBUtil.Module.get_enabled_this(module_name)
+        if user_list is None:
+            get_target_id = await run_sync(BotDBUtil.Module.get_enabled_this, module_name)
+            user_list = []
             for x in get_target_id:
                 fetch = await FetchTarget.fetch_target(x)
                 if fetch:
-                    try:
-                        send = await fetch.sendDirectMessage(message)
-                        send_list.append(send)
-                    except Exception:
-                        Logger.error(traceback.format_exc())
-        return send_list
+                    user_list.append(fetch)
+        report = await Broadcast.send(module_name, message, user_list)
+        return [x for x in report.results if x is not None]
@@ -0,0 +1,93 @@
+'''向订阅了某一模块的所有对象推送消息。'''
+import asyncio
+import time
+from typing import List, Tuple, Type
+
+from config import Config
+from core.elements import FetchedSession
+from core.http_client import TokenBucket
+from core.logger import Logger
+
+CONCURRENCY = int(Config('broadcast_concurrency') or 5)  # 同时发送的对象数
+RATE_LIMIT = float(Config('broadcast_rate_limit') or 2)  # 每秒开始发送的对象数
+RETRIES = int(Config('broadcast_retries') or 2)  # 发送失败时对同一对象的重试次数
+
+
+class PartiallySentError(Exception):
+    '''消息链中已有部分元素发出后发送失败，重试会重复发送已发出的部分，因此不会被重试。'''
+    pass
+
+
+class BroadcastReport:
+    def __init__(self, name: str, total: int):
+        self.name = name
+        self.total = total
+        self.results = [None] * total
+        self.failed = {}  # targetId -> 最后一次失败的原因
+        self.retried = 0
+        self.cost = 0
+
+    @property
+    def delivered(self) -> int:
+        return self.total - len(self.failed)
+
+    def __str__(self):
+        return f'Broadcast {self.name}: {self.delivered}/{self.total} delivered, {len(self.failed)} failed, ' \
+               f'{self.retried} retried, {self.cost:.1f}s'
+
+
+class Broadcast:
+    @staticmethod
+    async def send(name: str, message, targets: List[FetchedSession], concurrency: int = CONCURRENCY,
+                   rate: float = RATE_LIMIT, retries: int = RETRIES,
+                   retry_on: Tuple[Type[Exception], ...] = ()) -> BroadcastReport:
+        """
+        向targets并发推送同一条消息，每个对象因retry_on中的错误失败时按指数退避重试，全部结束后返回并记录发送报告。
+
+        :param name: 推送的名称（通常为模块名），用于日志。
+        :param message: 需要推送的消息链。
+        :param targets: 推送的对象。
+        :param concurrency: 同时发送的对象数。
+        :param rate: 每秒开始发送的对象数。
+        :param retries: 每个对象的重试次数。
+        :param retry_on: 可以重试的错误，只应包含能确定消息未被发出的错误（如平台拒绝或频率限制），
+                         超时等无法确定是否已发出的错误重试会导致重复推送。
+        """
+        report = BroadcastReport(name, len(targets))
+        semaphore = asyncio.Semaphore(concurrency)
+        bucket = TokenBucket(rate, concurrency)
+        start = time.monotonic()
+
+        async def send_to(index: int, target: FetchedSession):
+            error = None
+            wait = 0
+            async with semaphore:
+                for attempt in range(retries + 1):
+                    if attempt > 0:
+                        report.retried += 1
+                        await asyncio.sleep(max(2 ** (attempt - 1), wait))
+                    await bucket.acquire()
+                    try:
+                        result = await target.sendDirectMessage(message)
+                    except retry_on as e:
+                        error = repr(e)
+                        wait = getattr(e, 'timeout', 0) or 0  # 平台要求等待的秒数，如Telegram的RetryAfter
+                        continue
+                    except Exception as e:
+                        error = repr(e)
+                        break
+                    if result is False:  # 对象已不可用，不再重试
+                        error = 'unavailable'
+                        break
+                    report.results[index] = result
+                    return
+            Logger.error(f'Failed to send {name} to {target.target.targetId}: {error}')
+            report.failed[target.target.targetId] = error
+
+        await asyncio.gather(*(send_to(i, t) for i, t in enumerate(targets)))
+        report.cost = time.monotonic() - start
+        Logger.info(str(report))
+        return report
+
+
+__all__ = ["Broadcast", "BroadcastReport", "PartiallySentError"]
@@ -0,0 +1,111 @@
+'''缓存目录（./cache）的容量管理。'''
+import asyncio
+import os
+import shutil
+import time
+from datetime import datetime
+from os.path import abspath
+
+from config import Config
+from core.logger import Logger
+from core.scheduler import Scheduler
+
+CACHE_DIR = abspath(Config('cache_path') or './cache/')
+MAX_SIZE = int(Config('cache_max_size') or 1024) * 1024 * 1024  # 缓存目录的容量上限，配置单位为MB
+MAX_AGE = int(Config('cache_max_age') or 7 * 86400)  # 超过此秒数未被访问的文件会被删除
+CLEANUP_INTERVAL = int(Config('cache_cleanup_interval') or 600)
+GRACE_PERIOD = 300  # 最近此秒数内访问过的文件不会被删除，避免删除正在生成或等待发送的文件
+
+
+class CacheManager:
+    """
+    定时清理缓存目录：先删除过久未被访问的文件，若仍超出容量上限则按最近访问时间（LRU）删除最旧的文件。
+    """
+    _stats = {'files': 0, 'size': 0, 'removed_files': 0, 'removed_size': 0, 'last_cleanup': None}
+    persistent_dirs = ('http', 'download')  # 重启后仍然可用的HTTP响应缓存与下载缓存
+
+    @staticmethod
+    def clear_temporary(path: str = CACHE_DIR):
+        '''启动时删除上次运行留下的临时文件，persistent_dirs中的缓存予以保留，由定时清理按容量与时间淘汰。'''
+        os.makedirs(path, exist_ok=True)
+        for name in os.listdir(path):
+            if name in CacheManager.persistent_dirs:
+                continue
+            file = os.path.join(path, name)
+            if os.path.isdir(file) and not os.path.islink(file):
+                shutil.rmtree(file, ignore_errors=True)
+            else:
+                try:
+                    os.remove(file)
+                except OSError:
+                    pass
+
+    @staticmethod
+    def scan(path: str = CACHE_DIR) -> list:
+        '''返回目录下所有文件的(路径, 大小, 最近访问时间)。'''
+        files = []
+        for root, dirs, names in os.walk(path):
+            for name in names:
+                file = os.path.join(root, name)
+                try:
+                    st = os.stat(file)
+                except OSError:
+                    continue
+                files.append((file, st.st_size, max(st.st_atime, st.st_mtime)))
+        return files
+
+    @staticmethod
+    def remove_empty_dirs(path: str = CACHE_DIR):
+        now = time.time()
+        for root, dirs, names in os.walk(path, topdown=False):
+            if root == path or names or dirs:
+                continue
+            try:
+                if now - os.stat(root).st_mtime > GRACE_PERIOD:
+                    os.rmdir(root)
+            except OSError:
+                pass
+
+    @staticmethod
+    def cleanup(max_size: int = MAX_SIZE, max_age: int = MAX_AGE) -> dict:
+        '''清理缓存目录，返回清理后的统计信息。'''
+        now = time.time()
+        files = CacheManager.scan()
+        files.sort(key=lambda x: x[2])
+        total = sum(x[1] for x in files)
+        removed_files = 0
+        removed_size = 0
+        for file, size, accessed in files:
+            if now - accessed <= GRACE_PERIOD:
+                break
+            if now - accessed <= max_age and total <= max_size:
+                break
+            try:
+                os.remove(file)
+            except OSError:
+                continue
+            total -= size
+            removed_files += 1
+            removed_size += size
+        CacheManager.remove_empty_dirs()
+        CacheManager._stats.update({'files': len(files) - removed_files, 'size': total,
+                                    'removed_files': CacheManager._stats['removed_files'] + removed_files,
+                                    'removed_size': CacheManager._stats['removed_size'] + removed_size,
+                                    'last_cleanup': now})
+        if removed_files:
+            Logger.info(f'Removed {removed_files} cache files ({removed_size / 1024 / 1024:.1f}MB).')
+        return CacheManager.stats()
+
+    @staticmethod
+    def stats() -> dict:
+        stats = dict(CacheManager._stats)
+        stats['max_size'] = MAX_SIZE
+        return stats
+
+
+@Scheduler.scheduled_job('interval', seconds=CLEANUP_INTERVAL, next_run_time=datetime.now())
+async def cleanup_cache():
+    await asyncio.get_running_loop().run_in_executor(None, CacheManager.cleanup)
+
+
+__all__ = ["CacheManager"]
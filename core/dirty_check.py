@@ -2,21 +2,27 @@
 
 在使用前，应该在配置中填写"Check_accessKeyId"和"Check_accessKeySecret"以便进行鉴权。
 '''
+import asyncio
 import base64
 import datetime
 import hashlib
 import hmac
 import json
 import time
+import traceback
 
-import aiohttp
-from tenacity import retry, wait_fixed, stop_after_attempt
+from tenacity import retry, retry_if_not_exception_type, stop_after_attempt, wait_random_exponential
 
 from config import Config
 from core.elements import EnableDirtyWordCheck
+from core.http_client import CircuitOpenError, HTTPClient
 from core.logger import Logger
+from database.executor import run_sync
 from database.logging_message import DirtyWordCache
 
+BATCH_WINDOW = float(Config('dirty_check_batch_window') or 0.005)  # 合并此秒数内提交的检查
+BATCH_SIZE = 100  # 阿里云文本检测单次请求最多包含的task数
+
 
 def hash_hmac(key, code, sha1):
     hmac_code = hmac.new(key.encode(), code.encode(), hashlib.sha1)
@@ -46,10 +52,136 @@ def parse_data(result: dict):
     return {'content': content, 'status': status, 'original': original_content}
 
 
-@retry(stop=stop_after_attempt(3), wait=wait_fixed(3))
+class CheckBatcher:
+    """
+    收集BATCH_WINDOW秒内各协程提交的待检查文本，去重后按BATCH_SIZE分批，每批只发出一次签名请求，再将结果分发给各调用方。
+    """
+    _pending = {}  # 文本 -> 等待结果的Future，尚未发出请求
+    _inflight = {}  # 文本 -> 等待结果的Future，请求已发出
+    _flush_handle = None
+    _stats = {'texts': 0, 'requests': 0}
+
+    @staticmethod
+    async def scan(texts: list) -> dict:
+        """
+        :param texts: 需要调用API检查的文本。
+        :returns: 文本到API返回的检查结果的映射。
+        """
+        loop = asyncio.get_running_loop()
+        futures = {}
+        for t in texts:
+            future = CheckBatcher._pending.get(t) or CheckBatcher._inflight.get(t)
+            if future is None:
+                future = CheckBatcher._pending[t] = loop.create_future()
+            futures[t] = future
+        if CheckBatcher._pending and CheckBatcher._flush_handle is None:
+            CheckBatcher._flush_handle = loop.call_later(BATCH_WINDOW,
+                                                         lambda: asyncio.ensure_future(CheckBatcher.flush()))
+        return {t: await asyncio.shield(future) for t, future in futures.items()}
+
+    @staticmethod
+    async def flush():
+        CheckBatcher._flush_handle = None
+        pending = CheckBatcher._pending
+        CheckBatcher._pending = {}
+        CheckBatcher._inflight.update(pending)
+        texts = list(pending)
+        await asyncio.gather(*(CheckBatcher.send_batch({t: pending[t] for t in texts[i:i + BATCH_SIZE]})
+                               for i in range(0, len(texts), BATCH_SIZE)))
+
+    @staticmethod
+    async def send_batch(batch: dict):
+        CheckBatcher._stats['texts'] += len(batch)
+        CheckBatcher._stats['requests'] += 1
+        try:
+            try:
+                result = await scan_texts(list(batch))
+            except Exception as e:
+                for future in batch.values():
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            for t, future in batch.items():
+                if not future.done():
+                    if t in result:
+                        future.set_result(result[t])
+                    else:
+                        future.set_exception(ValueError(f'No result for {t!r}'))
+            try:  # 写入缓存失败不影响已经得到的检查结果
+                for t in batch:
+                    if t in result:
+                        cache = await run_sync(DirtyWordCache, t)
+                        await run_sync(cache.update, result[t])
+            except Exception:
+                Logger.error(traceback.format_exc())
+        finally:
+            for t in batch:
+                CheckBatcher._inflight.pop(t, None)
+
+    @staticmethod
+    def stats() -> dict:
+        return dict(CheckBatcher._stats)
+
+
+@retry(stop=stop_after_attempt(3), wait=wait_random_exponential(multiplier=0.5, max=4),
+       retry=retry_if_not_exception_type(CircuitOpenError))
+async def scan_texts(texts: list) -> dict:
+    '''在一次签名请求中检查多个文本，返回文本到检查结果的映射。'''
+    accessKeyId = Config("Check_accessKeyId")
+    accessKeySecret = Config("Check_accessKeySecret")
+    body = {
+        "scenes": [
+            "antispam"
+        ],
+        "tasks": [{
+            "dataId": str(i),
+            "content": x
+        } for i, x in enumerate(texts)]
+    }
+    clientInfo = '{}'
+    root = 'https://green.cn-shanghai.aliyuncs.com'
+    url = '/green/text/scan?{}'.format(clientInfo)
+
+    GMT_FORMAT = '%a, %d %b %Y %H:%M:%S GMT'
+    date = datetime.datetime.utcnow().strftime(GMT_FORMAT)
+    nonce = 'LittleC is god forever {}'.format(time.time())
+    contentMd5 = base64.b64encode(hashlib.md5(json.dumps(body).encode('utf-8')).digest()).decode('utf-8')
+    headers = {
+        'Accept': 'application/json',
+        'Content-Type': 'application/json',
+        'Content-MD5': contentMd5,
+        'Date': date,
+        'x-acs-version': '2018-05-09',
+        'x-acs-signature-nonce': nonce,
+        'x-acs-signature-version': '1.0',
+        'x-acs-signature-method': 'HMAC-SHA1'
+    }
+    tmp = {
+        'x-acs-version': '2018-05-09',
+        'x-acs-signature-nonce': nonce,
+        'x-acs-signature-version': '1.0',
+        'x-acs-signature-method': 'HMAC-SHA1'
+    }
+    sorted_header = {k: tmp[k] for k in sorted(tmp)}
+    step1 = '\n'.join(list(map(lambda x: "{}:{}".format(x, sorted_header[x]), list(sorted_header.keys()))))
+    step2 = url
+    step3 = "POST\napplication/json\n{contentMd5}\napplication/json\n{date}\n{step1}\n{step2}".format(
+        contentMd5=contentMd5,
+        date=headers['Date'], step1=step1, step2=step2)
+    sign = "acs {}:{}".format(accessKeyId, hash_hmac(accessKeySecret, step3, hashlib.sha1))
+    headers['Authorization'] = sign
+    # 'Authorization': "acs {}:{}".format(accessKeyId, sign)
+    session = HTTPClient.get_session()
+    async with session.post('{}{}'.format(root, url), data=json.dumps(body), headers=headers) as resp:
+        if resp.status == 200:
+            result = await resp.json()
+            return {texts[int(item['dataId'])]: item for item in result['data']}
+        raise ValueError(await resp.text())
+
+
 async def check(*text) -> list:
     '''检查字符串是否合规
-    
+
     :param text: 字符串（List/Union）。
     :returns: 经过审核后的字符串。不合规部分会被替换为'<吃掉了>'，全部不合规则是'<全部吃掉了>'，结构为[{'审核后的字符串': 处理结果（True/False，默认为True）}]
     '''
@@ -65,87 +197,15 @@ async def check(*text) -> list:
     if not text:
         return []
     query_list = {}
-    count = 0
-    for t in text:
+    for t in dict.fromkeys(text):
         if t == '':
-            query_list.update({count: {t: {'content': t, 'status': True, 'original': t}}})
-        else:
-            query_list.update({count: {t: False}})
-        count += 1
-    for q in query_list:
-        for pq in query_list[q]:
-            if not query_list[q][pq]:
-                cache = DirtyWordCache(pq)
-                if not cache.need_insert:
-                    query_list.update({q: {pq: parse_data(cache.get())}})
-    call_api_list = {}
-    for q in query_list:
-        for pq in query_list[q]:
-            if not query_list[q][pq]:
-                if pq not in call_api_list:
-                    call_api_list.update({pq: []})
-                print(call_api_list)
-                call_api_list[pq].append(q)
-    call_api_list_ = [x for x in call_api_list]
-    if call_api_list_:
-        body = {
-            "scenes": [
-                "antispam"
-            ],
-            "tasks": list(map(lambda x: {
-                "dataId": "Nullcat is god {}".format(time.time()),
-                "content": x
-            }, call_api_list_))
-        }
-        clientInfo = '{}'
-        root = 'https://green.cn-shanghai.aliyuncs.com'
-        url = '/green/text/scan?{}'.format(clientInfo)
-
-        GMT_FORMAT = '%a, %d %b %Y %H:%M:%S GMT'
-        date = datetime.datetime.utcnow().strftime(GMT_FORMAT)
-        nonce = 'LittleC is god forever {}'.format(time.time())
-        contentMd5 = base64.b64encode(hashlib.md5(json.dumps(body).encode('utf-8')).digest()).decode('utf-8')
-        headers = {
-            'Accept': 'application/json',
-            'Content-Type': 'application/json',
-            'Content-MD5': contentMd5,
-            'Date': date,
-            'x-acs-version': '2018-05-09',
-            'x-acs-signature-nonce': nonce,
-            'x-acs-signature-version': '1.0',
-            'x-acs-signature-method': 'HMAC-SHA1'
-        }
-        tmp = {
-            'x-acs-version': '2018-05-09',
-            'x-acs-signature-nonce': nonce,
-            'x-acs-signature-version': '1.0',
-            'x-acs-signature-method': 'HMAC-SHA1'
-        }
-        sorted_header = {k: tmp[k] for k in sorted(tmp)}
-        step1 = '\n'.join(list(map(lambda x: "{}:{}".format(x, sorted_header[x]), list(sorted_header.keys()))))
-        step2 = url
-        step3 = "POST\napplication/json\n{contentMd5}\napplication/json\n{date}\n{step1}\n{step2}".format(
-            contentMd5=contentMd5,
-            date=headers['Date'], step1=step1, step2=step2)
-        sign = "acs {}:{}".format(accessKeyId, hash_hmac(accessKeySecret, step3, hashlib.sha1))
-        headers['Authorization'] = sign
-        # 'Authorization': "acs {}:{}".format(accessKeyId, sign)
-        async with aiohttp.ClientSession(headers=headers) as session:
-            async with session.post('{}{}'.format(root, url), data=json.dumps(body)) as resp:
-                if resp.status == 200:
-                    result = await resp.json()
-                    print(result)
-                    for item in result['data']:
-                        content = item['content']
-                        for n in call_api_list[content]:
-                            print(n)
-                            query_list.update({n: {content: parse_data(item)}})
-                        DirtyWordCache(content).update(item)
-                else:
-                    raise ValueError(await resp.text())
-    results = []
-    print(query_list)
-    for x in query_list:
-        for y in query_list[x]:
-            results.append(query_list[x][y])
-    return results
+            query_list[t] = {'content': t, 'status': True, 'original': t}
+            continue
+        cache = await run_sync(DirtyWordCache, t)
+        if not cache.need_insert:
+            query_list[t] = parse_data(cache.get())
+    call_api_list = [t for t in dict.fromkeys(text) if t not in query_list]
+    if call_api_list:
+        for t, item in (await CheckBatcher.scan(call_api_list)).items():
+            query_list[t] = parse_data(item)
+    return [query_list[t] for t in text]
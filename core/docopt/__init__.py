@@ -654,6 +654,53 @@ class ParsedOptions(dict):
                                   name in [k.lstrip("-"), k.lstrip("<").rstrip(">")]}.get(name)
 
 
+class DocoptGrammar:
+    """Usage patterns of `docstring`, parsed once and reusable for any number of argv matches.
+
+    `docopt` re-tokenizes the docstring on every call; callers which match the
+    same docstring repeatedly can build a `DocoptGrammar` once and call
+    `match` instead, which only parses and matches the argument vector.
+    """
+
+    def __init__(self, docstring: str) -> None:
+        usage_sections = parse_section("usage:", docstring)
+        if len(usage_sections) == 0:
+            raise DocoptLanguageError('"usage:" section (case-insensitive) not found. Perhaps missing indentation?')
+        if len(usage_sections) > 1:
+            raise DocoptLanguageError('More than one "usage:" (case-insensitive).')
+        options_pattern = re.compile(r"\n\s*?options:", re.IGNORECASE)
+        if options_pattern.search(usage_sections[0]):
+            raise DocoptExit(
+                "Warning: options (case-insensitive) was found in usage." "Use a blank line between each section..")
+        self.docstring = docstring
+        self.usage = usage_sections[0]
+        self.options = parse_defaults(docstring)
+        pattern = parse_pattern(formal_usage(self.usage), self.options)
+        pattern_options = set(pattern.flat(Option))
+        for options_shortcut in pattern.flat(OptionsShortcut):
+            doc_options = parse_defaults(docstring)
+            options_shortcut.children = [opt for opt in doc_options if opt not in pattern_options]
+        self.pattern = pattern.fix()
+
+    def match(self, argvs: List[str], default_help: bool = True, version: Any = None,
+              options_first: bool = False) -> ParsedOptions:
+        DocoptExit.usage = self.usage
+        parsed_arg_vector = parse_argv(Tokens(argvs), list(self.options), options_first)
+        extras(default_help, version, parsed_arg_vector, self.docstring)
+        matched, left, collected = self.pattern.match(parsed_arg_vector)
+        if matched and left == []:
+            return ParsedOptions((a.name, list(a.value) if isinstance(a.value, list) else a.value)
+                                 for a in (self.pattern.flat() + collected))
+        if left:
+            argv_length = len(argvs) - 1
+            if argv_length > 0:
+                argvs1 = argvs[0: argv_length - 1]
+                argvs1.append(' '.join(argvs[-2:]))
+                return self.match(argvs1, default_help, version, options_first)
+            raise DocoptExit(f"Warning: found unmatched (duplicate?) arguments {left}")
+        raise DocoptExit(collected=collected, left=left)
+
+
 def docopt(
     docstring: Optional[str] = None,
     argvs: Optional[Union[List[str], str]] = None,
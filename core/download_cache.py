@@ -0,0 +1,115 @@
+'''按url与内容哈希保存下载文件的缓存（./cache/download目录）。'''
+import asyncio
+import hashlib
+import os
+import time
+import uuid
+from os.path import abspath
+from typing import Union
+
+import aiohttp
+import filetype
+
+from config import Config
+from core.http_client import HTTPClient
+
+CACHE_DIR = abspath((Config('cache_path') or './cache/') + 'download/')
+MAX_SIZE = int(Config('download_max_size') or 50 * 1024 * 1024)  # 单个文件的大小上限（字节）
+URL_TTL = int(Config('download_cache_ttl') or 86400)  # 同一url在此秒数内直接使用已下载的文件
+CHUNK_SIZE = 64 * 1024
+
+
+class DownloadTooLarge(Exception):
+    pass
+
+
+class DownloadCache:
+    """
+    下载时以分块的方式写入磁盘并计算SHA-256，内容相同的文件只保存一份；
+    同一url在URL_TTL秒内再次下载时直接返回已有的文件路径。
+    """
+    _downloading = {}
+    _stats = {'hits': 0, 'misses': 0, 'deduplicated': 0}
+
+    @staticmethod
+    def url_index(url: str) -> str:
+        return os.path.join(CACHE_DIR, 'url', hashlib.sha1(url.encode('utf-8')).hexdigest())
+
+    @staticmethod
+    def lookup(url: str, ttl: int = URL_TTL) -> Union[str, None]:
+        '''返回url对应的已下载文件，文件不存在或超过ttl秒时返回None。'''
+        index = DownloadCache.url_index(url)
+        try:
+            if time.time() - os.path.getmtime(index) > ttl:
+                return None
+            with open(index, 'r', encoding='utf-8') as f:
+                path = os.path.join(CACHE_DIR, f.read().strip())
+            os.utime(path)  # 更新访问时间，缓存目录按最近访问时间清理
+        except OSError:
+            return None
+        return path
+
+    @staticmethod
+    async def download(url: str, headers: dict = None, max_size: int = MAX_SIZE, ttl: int = URL_TTL) -> str:
+        '''下载url指向的文件并返回其路径，同一url同时只会下载一次。
+
+        :param url: 需要下载的url。
+        :param headers: 请求时使用的http头。
+        :param max_size: 文件的大小上限，超过时抛出DownloadTooLarge。
+        :param ttl: 在此秒数内下载过的url直接返回已有的文件。
+        :returns: 文件的绝对路径。'''
+        path = DownloadCache.lookup(url, ttl)
+        if path is not None:
+            DownloadCache._stats['hits'] += 1
+            return path
+        task = DownloadCache._downloading.get(url)
+        if task is None:
+            task = asyncio.ensure_future(DownloadCache._download(url, headers, max_size))
+            DownloadCache._downloading[url] = task
+            task.add_done_callback(lambda _: DownloadCache._downloading.pop(url, None))
+        return await asyncio.shield(task)
+
+    @staticmethod
+    async def _download(url: str, headers: dict = None, max_size: int = MAX_SIZE) -> str:
+        DownloadCache._stats['misses'] += 1
+        os.makedirs(os.path.join(CACHE_DIR, 'url'), exist_ok=True)
+        tmp = os.path.join(CACHE_DIR, f'{uuid.uuid4()}.tmp')
+        sha256 = hashlib.sha256()
+        head = b''
+        size = 0
+        try:
+            session = HTTPClient.get_session()
+            async with session.get(url, timeout=aiohttp.ClientTimeout(total=60), headers=headers) as resp:
+                resp.raise_for_status()
+                if resp.content_length is not None and resp.content_length > max_size:
+                    raise DownloadTooLarge(f'{url} ({resp.content_length} bytes)')
+                with open(tmp, 'wb') as file:
+                    async for chunk in resp.content.iter_chunked(CHUNK_SIZE):
+                        size += len(chunk)
+                        if size > max_size:
+                            raise DownloadTooLarge(f'{url} (>{max_size} bytes)')
+                        if len(head) < 262:
+                            head += chunk[:262 - len(head)]
+                        sha256.update(chunk)
+                        file.write(chunk)
+            kind = filetype.guess(head)
+            name = sha256.hexdigest() + (f'.{kind.extension}' if kind is not None else '')
+            path = os.path.join(CACHE_DIR, name)
+            if os.path.exists(path):
+                DownloadCache._stats['deduplicated'] += 1
+                os.remove(tmp)
+            else:
+                os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        with open(DownloadCache.url_index(url), 'w', encoding='utf-8') as f:
+            f.write(name)
+        return path
+
+    @staticmethod
+    def stats() -> dict:
+        return dict(DownloadCache._stats)
+
+
+__all__ = ["DownloadCache", "DownloadTooLarge"]
@@ -41,13 +41,14 @@ class MessageSession:
     """
     消息会话，囊括了处理一条消息所需要的东西。
     """
-    __slots__ = ("target", "session", "trigger_msg", "parsed_msg", "matched_msg",)
+    __slots__ = ("target", "session", "trigger_msg", "parsed_msg", "matched_msg", "context",)
 
     def __init__(self,
                  target: MsgInfo,
                  session: Session):
         self.target = target
         self.session = session
+        self.context = None
 
     async def sendMessage(self,
                           msgchain,
@@ -69,7 +70,7 @@ class MessageSession:
         :param disable_secret_check: 是否禁用消息检查（默认为False）
         :return: 被发送的消息链
         """
-        await self.sendMessage(msgchain, disable_secret_check=disable_secret_check, quote=False)
+        return await self.sendMessage(msgchain, disable_secret_check=disable_secret_check, quote=False)
 
     async def waitConfirm(self, msgchain=None, quote=True):
         """
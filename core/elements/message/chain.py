@@ -58,36 +58,24 @@ class MessageChain:
         def unsafeprompt(name, secret, text):
             return f'{name} contains unsafe text "{secret}": {text}'
 
+        texts = []
         for v in self.value:
             if isinstance(v, Plain):
-                for secret in Secret.list:
-                    if v.text.upper().find(secret.upper()) != -1:
-                        Logger.warn(unsafeprompt('Plain', secret, v.text))
-                        return False
+                texts.append(('Plain', v.text))
             elif isinstance(v, Embed):
-                for secret in Secret.list:
-                    if v.title.upper().find(secret.upper()) != -1:
-                        Logger.warn(unsafeprompt('Embed.title', secret, v.title))
-                        return False
-                    if v.description.upper().find(secret.upper()) != -1:
-                        Logger.warn(unsafeprompt('Embed.description', secret, v.description))
-                        return False
-                    if v.footer.upper().find(secret.upper()) != -1:
-                        Logger.warn(unsafeprompt('Embed.footer', secret, v.footer))
-                        return False
-                    if v.author.upper().find(secret.upper()) != -1:
-                        Logger.warn(unsafeprompt('Embed.author', secret, v.author))
-                        return False
-                    if v.url.upper().find(secret.upper()) != -1:
-                        Logger.warn(unsafeprompt('Embed.url', secret, v.url))
-                        return False
-                    for f in v.fields:
-                        if f.name.upper().find(secret.upper()) != -1:
-                            Logger.warn(unsafeprompt('Embed.field.name', secret, f.name))
-                            return False
-                        if f.value.upper().find(secret.upper()) != -1:
-                            Logger.warn(unsafeprompt('Embed.field.value', secret, f.value))
-                            return False
+                texts += [('Embed.title', v.title), ('Embed.description', v.description), ('Embed.footer', v.footer),
+                          ('Embed.author', v.author), ('Embed.url', v.url)]
+                for f in v.fields or []:
+                    texts += [('Embed.field.name', f.name), ('Embed.field.value', f.value)]
+        texts = [(name, text) for name, text in texts if text]
+        # 先将所有文本合并后查找一次，仅在找到时再确定所在的元素
+        if Secret.find('\0'.join(text for _, text in texts)) is None:
+            return True
+        for name, text in texts:
+            secret = Secret.find(text)
+            if secret is not None:
+                Logger.warn(unsafeprompt(name, secret, text))
+                return False
         return True
 
     def asSendable(self, embed=True):
@@ -115,60 +103,64 @@ class MessageChain:
 site_whitelist = ['http.cat']
 
 
+kecode_pattern = re.compile(r'\[Ke:([^\]\n]*)]')
+kecode_arg_pattern = re.compile(r'(.*?)=(.*)')
+
+
 def match_kecode(text: str) -> List[Union[Plain, Image, Voice, Embed]]:
-    split_all = re.split(r'(\[Ke:.*?])', text)
-    for x in split_all:
-        if x == '':
-            split_all.remove('')
+    first = kecode_pattern.search(text)
+    if first is None:  # 绝大多数消息不含KE码，无需解析
+        return [Plain(text)] if text != '' else []
     elements = []
-    for e in split_all:
-        match = re.match(r'\[Ke:(.*?),(.*)]', e)
-        if not match:
-            if e != '':
-                elements.append(Plain(e))
-        else:
-            element_type = match.group(1).lower()
-            args = re.split(r',|,.\s', match.group(2))
-            for x in args:
-                if x == '':
-                    args.remove('')
-            if element_type == 'plain':
-                for a in args:
-                    ma = re.match(r'(.*?)=(.*)', a)
-                    if ma:
-                        if ma.group(1) == 'text':
-                            elements.append(Plain(ma.group(2)))
-                        else:
-                            elements.append(Plain(a))
-                    else:
-                        elements.append(Plain(a))
-            elif element_type == 'image':
-                for a in args:
-                    ma = re.match(r'(.*?)=(.*)', a)
-                    if ma:
-                        img = None
-                        if ma.group(1) == 'path':
-                            parse_url = urlparse(ma.group(2))
-                            if parse_url[0] == 'file' or parse_url[1] in site_whitelist:
-                                img = Image(path=ma.group(2))
-                        if ma.group(1) == 'headers':
-                            img.headers = json.loads(str(base64.b64decode(ma.group(2)), "UTF-8"))
-                        if img is not None:
-                            elements.append(img)
-                    else:
-                        elements.append(Image(a))
-            elif element_type == 'voice':
-                for a in args:
-                    ma = re.match(r'(.*?)=(.*)', a)
-                    if ma:
-                        if ma.group(1) == 'path':
-                            parse_url = urlparse(ma.group(2))
-                            if parse_url[0] == 'file' or parse_url[1] in site_whitelist:
-                                elements.append(Voice(path=ma.group(2)))
-                        else:
-                            elements.append(Voice(a))
-                    else:
-                        elements.append(Voice(a))
+    last = 0
+    for match in kecode_pattern.finditer(text, first.start()):
+        if match.start() > last:
+            elements.append(Plain(text[last:match.start()]))
+        last = match.end()
+        element_type, comma, args = match.group(1).partition(',')
+        if not comma:
+            elements.append(Plain(match.group(0)))
+            continue
+        elements += parse_kecode(element_type.lower(), [a for a in args.split(',') if a != ''])
+    if last < len(text):
+        elements.append(Plain(text[last:]))
+    return elements
+
+
+def parse_kecode(element_type: str, args: List[str]) -> List[Union[Plain, Image, Voice]]:
+    elements = []
+    if element_type == 'plain':
+        for a in args:
+            ma = kecode_arg_pattern.match(a)
+            if ma and ma.group(1) == 'text':
+                elements.append(Plain(ma.group(2)))
+            else:
+                elements.append(Plain(a))
+    elif element_type == 'image':
+        img = None
+        for a in args:
+            ma = kecode_arg_pattern.match(a)
+            if ma:
+                if ma.group(1) == 'path':
+                    img = None
+                    parse_url = urlparse(ma.group(2))
+                    if parse_url[0] == 'file' or parse_url[1] in site_whitelist:
+                        img = Image(path=ma.group(2))
+                        elements.append(img)
+                elif ma.group(1) == 'headers' and img is not None:
+                    img.headers = json.loads(str(base64.b64decode(ma.group(2)), "UTF-8"))
+            else:
+                img = Image(a)
+                elements.append(img)
+    elif element_type == 'voice':
+        for a in args:
+            ma = kecode_arg_pattern.match(a)
+            if ma and ma.group(1) == 'path':
+                parse_url = urlparse(ma.group(2))
+                if parse_url[0] == 'file' or parse_url[1] in site_whitelist:
+                    elements.append(Voice(path=ma.group(2)))
+            else:
+                elements.append(Voice(a))
     return elements
 
 
@@ -1,15 +1,16 @@
 import re
 import uuid
+from io import BytesIO
 from os.path import abspath
 from typing import List
 from urllib import parse
 
-import aiohttp
 import filetype
 from PIL import Image as PImage
 from tenacity import retry, stop_after_attempt
 
 from config import CachePath
+from core.download_cache import DownloadCache
 
 
 class Plain:
@@ -46,29 +47,41 @@ class Image:
         self.need_get = False
         self.path = path
         self.headers = headers
+        self.data = None
         if isinstance(path, PImage.Image):
-            save = f'{CachePath}{str(uuid.uuid4())}.jpg'
-            path.convert('RGB').save(save)
-            self.path = save
+            buffer = BytesIO()
+            path.convert('RGB').save(buffer, 'JPEG')
+            self.data = buffer.getvalue()
+            self.path = None
+        elif isinstance(path, bytes):
+            self.data = path
+            self.path = None
         elif re.match('^https?://.*', path):
             self.need_get = True
 
+    def __str__(self):
+        return self.path if self.path is not None else f'<{len(self.data)} bytes in memory>'
+
+    @property
+    def filename(self) -> str:
+        kind = filetype.guess(self.data) if self.data is not None else None
+        return f'image.{kind.extension if kind is not None else "jpg"}'
+
     async def get(self):
+        """
+        返回图片在磁盘上的路径。内存中的图片只在第一次调用时写入缓存目录，能直接上传内存中数据的平台应优先使用data。
+        """
+        if self.path is None:
+            self.path = abspath(f'{CachePath}{str(uuid.uuid4())}.{self.filename.split(".")[-1]}')
+            with open(self.path, 'wb') as f:
+                f.write(self.data)
         if self.need_get:
             return abspath(await self.get_image())
         return abspath(self.path)
 
     @retry(stop=stop_after_attempt(3))
     async def get_image(self):
-        url = self.path
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, timeout=aiohttp.ClientTimeout(total=20)) as req:
-                raw = await req.read()
-                ft = filetype.match(raw).extension
-                img_path = f'{CachePath}{str(uuid.uuid4())}.{ft}'
-                with open(img_path, 'wb+') as image_cache:
-                    image_cache.write(raw)
-                return img_path
+        return await DownloadCache.download(self.path, headers=self.headers)
 
 
 class Voice:
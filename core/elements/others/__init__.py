@@ -1,4 +1,5 @@
 import os
+import re
 import traceback
 from configparser import ConfigParser
 from os.path import abspath
@@ -33,10 +34,35 @@ class PrivateAssets:
 
 class Secret:
     list = []
+    patterns = ()  # 预先转为大写并去除冗余后的敏感文本
 
     @staticmethod
     def add(secret):
         Secret.list.append(secret)
+        Secret.compile()
+
+    @staticmethod
+    def compile():
+        """
+        预处理敏感文本：统一转为大写，包含了其他敏感文本的项无需再单独查找
+        """
+        patterns = []
+        for secret in sorted(set(s.upper() for s in Secret.list if s), key=len):
+            if not any(p in secret for p in patterns):
+                patterns.append(secret)
+        Secret.patterns = tuple(patterns)
+
+    @staticmethod
+    def find(text: str):
+        """
+        不区分大小写地查找文本中的敏感文本
+        :return: 找到的敏感文本，没有则返回None
+        """
+        folded = text.upper()
+        for pattern in Secret.patterns:
+            if pattern in folded:
+                return pattern
+        return None
 
 
 class ErrorMessage:
@@ -51,6 +77,17 @@ class ErrorMessage:
         return self.error_message
 
 
+non_secret_options = ['db_cache', 'db_pool_size', 'db_pool_recycle', 'db_cache_size', 'db_cache_ttl',
+                      'db_cache_sync_interval', 'http_pool_limit', 'http_pool_limit_per_host', 'http_dns_cache_ttl',
+                      'http_cache_size', 'http_rate_limit', 'http_rate_burst', 'http_circuit_threshold',
+                      'http_circuit_timeout', 'download_max_size', 'download_cache_ttl', 'cache_max_size',
+                      'cache_max_age', 'cache_cleanup_interval', 'send_rate_limit', 'send_rate_burst',
+                      'send_target_rate_limit', 'send_target_rate_burst', 'send_queue_size',
+                      'send_queue_merge', 'broadcast_concurrency', 'broadcast_rate_limit', 'broadcast_retries',
+                      'qq_roster_ttl', 'qq_roster_concurrency',
+                      'media_cache_size', 'dirty_check_batch_window']  # 数值类的调优选项，不视为敏感文本
+
+
 def load_secret():
     config_filename = 'config.cfg'
     config_path = abspath('./config/' + config_filename)
@@ -63,8 +100,13 @@ def load_secret():
     options = cp.options(section)
     for option in options:
         value = cp.get(section, option)
-        if value.upper() not in ['', 'TRUE', 'FALSE']:
-            Secret.add(value.upper())
+        if value.upper() in ['', 'TRUE', 'FALSE'] or option in non_secret_options:
+            continue
+        # Secret.find按子串查找，"5"、"0.5"这类短数值会拦截几乎所有含数字的消息；
+        # 不超过5位的数字最多只有十万种取值，不可能是密钥或令牌，因此不视为敏感文本
+        if re.fullmatch(r'[\d.]{1,5}', value):
+            continue
+        Secret.list.append(value.upper())
     try:
         ip = requests.get('https://api.ip.sb/ip', timeout=10)
         if ip:
@@ -72,6 +114,7 @@ def load_secret():
     except:
         Logger.error(traceback.format_exc())
         pass
+    Secret.compile()
 
 
 load_secret()
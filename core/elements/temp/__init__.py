@@ -1,30 +1,131 @@
+import threading
+import time
+from collections import OrderedDict
 from typing import Union
 
+from config import Config
 from core.elements import MessageSession
 
 
+class LRUCache:
+    """
+    有容量上限的LRU缓存，每个条目在写入ttl秒后过期，可在多个线程中同时使用
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: Union[int, float, None] = 300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                value, expire = item
+                if expire is None or expire > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl if self.ttl else None)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def remove(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {'size': len(self._data), 'maxsize': self.maxsize, 'hits': self.hits, 'misses': self.misses,
+                'evictions': self.evictions, 'hit_rate': self.hits / total if total else 0}
+
+
 class EnabledModulesCache:
-    _cache = {}
+    """
+    对象已打开的模块列表，仅在db_cache开启时使用
+    """
+    _cache = LRUCache(maxsize=int(Config('db_cache_size') or 10000), ttl=int(Config('db_cache_ttl') or 300))
+
+    @staticmethod
+    def add_cache(key, value: list):
+        EnabledModulesCache._cache.set(key, value)
+
+    @staticmethod
+    def get_cache(key) -> Union[list, None]:
+        return EnabledModulesCache._cache.get(key)
 
     @staticmethod
-    def add_cache(key, value):
-        EnabledModulesCache._cache[key] = value
+    def remove_cache(key):
+        EnabledModulesCache._cache.remove(key)
 
     @staticmethod
-    def get_cache(key):
-        return EnabledModulesCache._cache.get(key, False)
+    def stats() -> dict:
+        return EnabledModulesCache._cache.stats()
 
 
 class SenderInfoCache:
-    _cache = {}
+    """
+    发送者信息各列的值，仅在db_cache开启时使用
+    """
+    _cache = LRUCache(maxsize=int(Config('db_cache_size') or 10000), ttl=int(Config('db_cache_ttl') or 300))
+
+    @staticmethod
+    def add_cache(key, value: dict):
+        SenderInfoCache._cache.set(key, value)
+
+    @staticmethod
+    def get_cache(key) -> Union[dict, None]:
+        return SenderInfoCache._cache.get(key)
+
+    @staticmethod
+    def remove_cache(key):
+        SenderInfoCache._cache.remove(key)
+
+    @staticmethod
+    def stats() -> dict:
+        return SenderInfoCache._cache.stats()
+
+
+class RegexEnabledCache:
+    """
+    对象是否打开了任一正则模块，未知时为None
+    """
+    _cache = LRUCache(maxsize=int(Config('db_cache_size') or 10000), ttl=int(Config('db_cache_ttl') or 300))
+
+    @staticmethod
+    def add_cache(key, value: bool):
+        RegexEnabledCache._cache.set(key, value)
+
+    @staticmethod
+    def get_cache(key) -> Union[bool, None]:
+        return RegexEnabledCache._cache.get(key)
 
     @staticmethod
-    def add_cache(key, value):
-        SenderInfoCache._cache[key] = value
+    def remove_cache(key):
+        RegexEnabledCache._cache.remove(key)
 
     @staticmethod
-    def get_cache(key) -> Union[dict, bool]:
-        return SenderInfoCache._cache.get(key, False)
+    def clear():
+        RegexEnabledCache._cache.clear()
 
 
 class ExecutionLockList:
@@ -47,4 +148,4 @@ class ExecutionLockList:
         return True if targetId in ExecutionLockList._list else False
 
 
-__all__ = ["EnabledModulesCache", "SenderInfoCache", "ExecutionLockList"]
+__all__ = ["LRUCache", "EnabledModulesCache", "SenderInfoCache", "RegexEnabledCache", "ExecutionLockList"]
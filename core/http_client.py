@@ -0,0 +1,192 @@
+'''进程内共用的HTTP客户端，以及按主机限制请求速率的熔断器。'''
+import asyncio
+import time
+from typing import Union
+
+import aiohttp
+
+from config import Config
+from core.logger import Logger
+
+POOL_LIMIT = int(Config('http_pool_limit') or 100)
+POOL_LIMIT_PER_HOST = int(Config('http_pool_limit_per_host') or 10)
+DNS_CACHE_TTL = int(Config('http_dns_cache_ttl') or 300)
+RATE_LIMIT = float(Config('http_rate_limit') or 10)  # 每个主机每秒的请求数
+RATE_BURST = int(Config('http_rate_burst') or 20)
+CIRCUIT_THRESHOLD = int(Config('http_circuit_threshold') or 5)  # 连续失败此次数后熔断
+CIRCUIT_TIMEOUT = int(Config('http_circuit_timeout') or 30)  # 熔断后经过此秒数允许一次试探请求
+
+
+class CircuitOpenError(aiohttp.ClientConnectionError):
+    '''主机已被熔断，请求未被发出。'''
+    pass
+
+
+class TokenBucket:
+    def __init__(self, rate: float = RATE_LIMIT, burst: int = RATE_BURST):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def delay(self) -> float:
+        '''距离下一个令牌可用还需等待的秒数，为0时可以立即取得令牌。'''
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return 0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def full(self) -> bool:
+        self.delay()
+        return self.tokens >= self.burst
+
+    async def acquire(self):
+        while True:
+            delay = self.delay()
+            if delay == 0:
+                self.tokens -= 1
+                return
+            await asyncio.sleep(delay)
+
+
+class CircuitBreaker:
+    '''
+    连续失败CIRCUIT_THRESHOLD次后进入open状态，此时的请求会直接抛出CircuitOpenError；
+    经过CIRCUIT_TIMEOUT秒后进入half-open状态并放行一个试探请求，成功则恢复，失败则再次熔断。
+    '''
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, host: str, threshold: int = CIRCUIT_THRESHOLD, timeout: int = CIRCUIT_TIMEOUT):
+        self.host = host
+        self.threshold = threshold
+        self.timeout = timeout
+        self.state = CircuitBreaker.CLOSED
+        self.failures = 0
+        self.opened_at = 0
+        self.trial = False
+
+    def before_request(self):
+        if self.state == CircuitBreaker.OPEN:
+            if time.monotonic() - self.opened_at < self.timeout:
+                raise CircuitOpenError(f'{self.host} is temporarily unavailable (circuit open)')
+            self.state = CircuitBreaker.HALF_OPEN
+            Logger.info(f'Circuit for {self.host} is half-open, sending a trial request.')
+        if self.state == CircuitBreaker.HALF_OPEN:
+            if self.trial:
+                raise CircuitOpenError(f'{self.host} is temporarily unavailable (circuit half-open)')
+            self.trial = True
+
+    def record_success(self):
+        if self.state != CircuitBreaker.CLOSED:
+            Logger.info(f'Circuit for {self.host} is closed.')
+        self.state = CircuitBreaker.CLOSED
+        self.failures = 0
+        self.trial = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.trial = False
+        if self.state == CircuitBreaker.HALF_OPEN or \
+                (self.state == CircuitBreaker.CLOSED and self.failures >= self.threshold):
+            Logger.warn(f'Circuit for {self.host} is open after {self.failures} failures, '
+                        f'requests will fail fast for {self.timeout}s.')
+            self.state = CircuitBreaker.OPEN
+            self.opened_at = time.monotonic()
+
+    def release(self):
+        '''试探请求被取消时调用，允许下一个请求继续试探。'''
+        self.trial = False
+
+
+class HostPolicy:
+    '''
+    每个主机各自的请求速率限制与熔断器，通过TraceConfig作用于共用ClientSession发出的所有请求。
+    '''
+    _policies = {}
+
+    def __init__(self, host: str):
+        self.bucket = TokenBucket()
+        self.breaker = CircuitBreaker(host)
+
+    @staticmethod
+    def get(host: str) -> 'HostPolicy':
+        if host not in HostPolicy._policies:
+            HostPolicy._policies[host] = HostPolicy(host)
+        return HostPolicy._policies[host]
+
+    @staticmethod
+    def states() -> dict:
+        return {host: policy.breaker.state for host, policy in HostPolicy._policies.items()}
+
+    @staticmethod
+    async def on_request_start(session, ctx, params):
+        policy = HostPolicy.get(params.url.host)
+        # 先取得令牌再占用试探名额，等待令牌时被取消不会让熔断器停留在half-open状态
+        await policy.bucket.acquire()
+        policy.breaker.before_request()
+        ctx.policy = policy
+
+    @staticmethod
+    async def on_request_end(session, ctx, params):
+        policy = getattr(ctx, 'policy', None)
+        if policy is not None:
+            if params.response.status >= 500 or params.response.status == 429:
+                policy.breaker.record_failure()
+            else:
+                policy.breaker.record_success()
+
+    @staticmethod
+    async def on_request_exception(session, ctx, params):
+        policy = getattr(ctx, 'policy', None)
+        if policy is not None:
+            if isinstance(params.exception, asyncio.CancelledError):
+                policy.breaker.release()
+            else:
+                policy.breaker.record_failure()
+
+    @staticmethod
+    def trace_config() -> aiohttp.TraceConfig:
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(HostPolicy.on_request_start)
+        trace_config.on_request_end.append(HostPolicy.on_request_end)
+        trace_config.on_request_exception.append(HostPolicy.on_request_exception)
+        return trace_config
+
+
+class HTTPClient:
+    """
+    同一进程内的所有请求共用一个ClientSession，以复用连接池中的连接（keep-alive）与DNS缓存。
+    """
+    _session: Union[aiohttp.ClientSession, None] = None
+    _loop: Union[asyncio.AbstractEventLoop, None] = None
+
+    @staticmethod
+    def get_session() -> aiohttp.ClientSession:
+        """
+        获取共用的ClientSession，需要在事件循环中调用。请求时直接传入headers等参数，不要关闭此会话。
+        """
+        loop = asyncio.get_running_loop()
+        if HTTPClient._session is None or HTTPClient._session.closed or HTTPClient._loop is not loop:
+            connector = aiohttp.TCPConnector(limit=POOL_LIMIT, limit_per_host=POOL_LIMIT_PER_HOST,
+                                             ttl_dns_cache=DNS_CACHE_TTL)
+            # 不保存cookie，以免某个模块收到的cookie被带到其他模块对同一主机的请求中
+            HTTPClient._session = aiohttp.ClientSession(connector=connector, cookie_jar=aiohttp.DummyCookieJar(),
+                                                        trace_configs=[HostPolicy.trace_config()])
+            HTTPClient._loop = loop
+        return HTTPClient._session
+
+    @staticmethod
+    async def close():
+        """
+        关闭共用的ClientSession及其连接池，在机器人退出时调用。
+        """
+        session = HTTPClient._session
+        HTTPClient._session = None
+        HTTPClient._loop = None
+        if session is not None and not session.closed:
+            await session.close()
+
+
+__all__ = ["HTTPClient", "HostPolicy", "CircuitBreaker", "CircuitOpenError", "TokenBucket"]
@@ -2,10 +2,13 @@ import importlib
 import os
 import re
 import traceback
-from typing import Dict, Union
+from types import MappingProxyType
+from typing import Dict, Union, Mapping, Tuple
 
-from core.elements import Command, Option, Schedule, RegexCommand, StartUp, PrivateAssets
+from core.elements import Command, Option, Schedule, RegexCommand, StartUp, PrivateAssets, RegexEnabledCache
+from core.elements.module.component_meta import CommandMeta
 from core.logger import Logger
+from core.parser.regex import RegexMatcher
 
 load_dir_path = os.path.abspath('./modules/')
 
@@ -40,13 +43,34 @@ def load_modules():
     openloadercache.close()
 
 
+class ModulesDispatchTable:
+    """
+    单个平台的模块分发表，由ModulesManager在模块变动后重新生成，生成后不再修改。
+    """
+    __slots__ = ("targetFrom", "modules", "aliases", "regex_modules", "regex_matcher", "command_matches")
+
+    def __init__(self, targetFrom: str):
+        self.targetFrom = targetFrom
+        modules = ModulesManager.build_modules_list_as_dict(targetFrom)
+        self.modules: Mapping[str, Union[Command, RegexCommand, Schedule, StartUp]] = MappingProxyType(modules)
+        self.aliases: Mapping[str, str] = ModulesManager.return_modules_alias_map()
+        self.regex_modules: Mapping[str, RegexCommand] = MappingProxyType(
+            {m: modules[m] for m in modules if isinstance(modules[m], RegexCommand)})
+        self.regex_matcher = RegexMatcher(self.regex_modules)
+        self.command_matches: Mapping[str, Tuple[CommandMeta, ...]] = MappingProxyType(
+            {m: tuple(modules[m].match_list.get(targetFrom)) for m in modules if isinstance(modules[m], Command)})
+
+
 class ModulesManager:
     modules: Dict[str, Union[Command, Option, Schedule, RegexCommand, StartUp]] = {}
+    _dispatch_tables: Dict[str, ModulesDispatchTable] = {}
+    _alias_map: Union[Mapping[str, str], None] = None
 
     @staticmethod
     def add_module(module: Union[Command, Option, Schedule, RegexCommand, StartUp]):
         if module.bind_prefix not in ModulesManager.modules:
             ModulesManager.modules.update({module.bind_prefix: module})
+            ModulesManager._invalidate_dispatch_tables()
         else:
             raise ValueError(f'Duplicate bind prefix "{module.bind_prefix}"')
 
@@ -54,35 +78,62 @@ class ModulesManager:
     def bind_to_module(bind_prefix: str, meta):
         if bind_prefix in ModulesManager.modules:
             ModulesManager.modules[bind_prefix].match_list.add(meta)
+            ModulesManager._invalidate_dispatch_tables()
 
     @staticmethod
-    def return_modules_list_as_dict(targetFrom: str = None) ->\
-            Dict[str, Union[Command, RegexCommand, Schedule, StartUp, Option]]:
-        if targetFrom is not None:
-            returns = {}
-            for m in ModulesManager.modules:
-                if isinstance(ModulesManager.modules[m], (Command, RegexCommand, Schedule, StartUp)):
-                    if targetFrom in ModulesManager.modules[m].exclude_from:
-                        continue
-                    available = ModulesManager.modules[m].available_for
-                    if targetFrom in available or '*' in available:
-                        returns.update({m: ModulesManager.modules[m]})
-            return returns
-        return ModulesManager.modules
+    def _invalidate_dispatch_tables():
+        ModulesManager._dispatch_tables.clear()
+        ModulesManager._alias_map = None
+        RegexEnabledCache.clear()
 
     @staticmethod
-    def return_modules_alias_map() -> Dict[str, str]:
+    def return_dispatch_table(targetFrom: str) -> ModulesDispatchTable:
         """
-        返回每个别名映射到的模块
+        返回此平台的模块分发表，仅在首次调用或模块变动后重新生成
         """
-        modules = ModulesManager.return_modules_list_as_dict()
+        table = ModulesManager._dispatch_tables.get(targetFrom)
+        if table is None:
+            table = ModulesManager._dispatch_tables[targetFrom] = ModulesDispatchTable(targetFrom)
+        return table
+
+    @staticmethod
+    def build_modules_list_as_dict(targetFrom: str) -> \
+            Dict[str, Union[Command, RegexCommand, Schedule, StartUp]]:
+        returns = {}
+        for m in ModulesManager.modules:
+            if isinstance(ModulesManager.modules[m], (Command, RegexCommand, Schedule, StartUp)):
+                if targetFrom in ModulesManager.modules[m].exclude_from:
+                    continue
+                available = ModulesManager.modules[m].available_for
+                if targetFrom in available or '*' in available:
+                    returns.update({m: ModulesManager.modules[m]})
+        return returns
+
+    @staticmethod
+    def build_modules_alias_map() -> Dict[str, str]:
         alias_map = {}
-        for m in modules:
-            module = modules[m]
+        for m in ModulesManager.modules:
+            module = ModulesManager.modules[m]
             if module.alias is not None:
                 alias_map.update(module.alias)
         return alias_map
 
+    @staticmethod
+    def return_modules_list_as_dict(targetFrom: str = None) -> \
+            Mapping[str, Union[Command, RegexCommand, Schedule, StartUp, Option]]:
+        if targetFrom is not None:
+            return ModulesManager.return_dispatch_table(targetFrom).modules
+        return ModulesManager.modules
+
+    @staticmethod
+    def return_modules_alias_map() -> Mapping[str, str]:
+        """
+        返回每个别名映射到的模块
+        """
+        if ModulesManager._alias_map is None:
+            ModulesManager._alias_map = MappingProxyType(ModulesManager.build_modules_alias_map())
+        return ModulesManager._alias_map
+
     @staticmethod
     def return_module_alias(module_name) -> Dict[str, str]:
         """
@@ -106,7 +157,9 @@ class ModulesManager:
     @staticmethod
     def return_specified_type_modules(module_type: [Command, RegexCommand, Schedule, StartUp, Option],
                                       targetFrom: str = None) \
-            -> Dict[str, Union[Command, RegexCommand, Schedule, StartUp, Option]]:
+            -> Mapping[str, Union[Command, RegexCommand, Schedule, StartUp, Option]]:
+        if targetFrom is not None and module_type is RegexCommand:
+            return ModulesManager.return_dispatch_table(targetFrom).regex_modules
         d = {}
         modules = ModulesManager.return_modules_list_as_dict()
         for m in modules:
@@ -0,0 +1,59 @@
+'''记录已上传到平台的媒体文件，内容相同的文件再次发送时直接引用平台上已有的文件。'''
+import asyncio
+import hashlib
+from typing import Union
+
+from config import Config
+from core.elements import Image, Voice
+from core.elements.temp import LRUCache
+
+MEDIA_CACHE_SIZE = int(Config('media_cache_size') or 1000)
+CHUNK_SIZE = 64 * 1024
+
+
+def file_sha256(path: str) -> str:
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+class MediaCache:
+    """
+    每个平台一个缓存，以文件内容的SHA-256为键，保存上传后平台返回的文件标识（如Telegram的file_id、Discord附件的url）。
+    """
+    caches = {}
+
+    def __init__(self, platform: str, maxsize: int = MEDIA_CACHE_SIZE, ttl: Union[int, None] = None):
+        """
+        :param platform: 平台名称。
+        :param ttl: 文件标识的有效秒数，为None时不会过期。
+        """
+        self.platform = platform
+        self._cache = LRUCache(maxsize=maxsize, ttl=ttl)
+        MediaCache.caches[platform] = self
+
+    @staticmethod
+    async def digest(element: Union[Image, Voice]) -> str:
+        '''计算图片或语音内容的SHA-256，磁盘上的文件在线程池中读取。'''
+        if isinstance(element, Image) and element.data is not None:
+            return hashlib.sha256(element.data).hexdigest()
+        path = await element.get() if isinstance(element, Image) else element.path
+        return await asyncio.get_running_loop().run_in_executor(None, file_sha256, path)
+
+    def get(self, digest: str) -> Union[str, None]:
+        return self._cache.get(digest)
+
+    def set(self, digest: str, file_id: str):
+        self._cache.set(digest, file_id)
+
+    def remove(self, digest: str):
+        '''平台拒绝已记录的文件标识时调用，下次发送时重新上传。'''
+        self._cache.remove(digest)
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+
+__all__ = ["MediaCache"]
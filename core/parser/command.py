@@ -1,10 +1,12 @@
 import re
 import shlex
 import traceback
-from typing import Union
+from functools import lru_cache
+from typing import Union, Dict, Tuple
 
-from core.docopt import docopt, DocoptExit
+from core.docopt import DocoptGrammar, DocoptExit
 from core.elements import Command, Option, Schedule, StartUp, RegexCommand, command_prefix, MessageSession
+from core.elements.module.component_meta import CommandMeta
 
 command_prefix_first = command_prefix[0]
 
@@ -19,6 +21,70 @@ class InvalidCommandFormatError(BaseException):
         pass
 
 
+def build_usage(args: list, bind_prefix: str = None) -> Tuple[list, str]:
+    """
+    将帮助信息转换为docopt可用的格式
+    :return: (补全命令前缀后的帮助信息, docopt格式的用法字符串)
+    """
+    arglst_raw = []
+    arglst = []
+    for x in args:
+        split = x.split(' ')[0]
+        if bind_prefix is not None:
+            if split not in [command_prefix_first + bind_prefix, bind_prefix]:
+                x = f'{command_prefix_first}{bind_prefix} {x}'
+        arglst_raw.append(x)
+        match_detail_help = re.match('(.*){.*}$', x, re.M | re.S)
+        if match_detail_help:
+            x = match_detail_help.group(1)
+        arglst.append(x)
+    return arglst_raw, 'Usage:\n  ' + '\n  '.join(y for y in arglst)
+
+
+@lru_cache(maxsize=1024)
+def compile_usage(usage: str) -> DocoptGrammar:
+    return DocoptGrammar(usage)
+
+
+class CommandGrammar:
+    """
+    某一模块在某一平台上的命令语法，生成后缓存，直到模块绑定了新的命令为止
+    """
+    _cache: Dict[Tuple[Command, Union[str, None]], 'CommandGrammar'] = {}
+
+    def __init__(self, module: Command, targetFrom: str = None):
+        self.bind_prefix = module.bind_prefix
+        self.bound_count = len(module.match_list.set)
+        self.matches: Tuple[CommandMeta, ...] = tuple(module.match_list.set if targetFrom is None else
+                                                      module.match_list.get(targetFrom))
+        self.options_desc = []
+        help_doc_list = []
+        none_doc = True
+        for match in self.matches:
+            if match.help_doc is not None:
+                none_doc = False
+                help_doc_list = help_doc_list + match.help_doc
+            if match.options_desc is not None:
+                for m in match.options_desc:
+                    self.options_desc.append(f'{m}  {match.options_desc[m]}')
+        self.args_raw = None
+        self.args = None
+        self.sub_args = []
+        if not none_doc:
+            self.args_raw, self.args = build_usage(help_doc_list, self.bind_prefix)
+            for match in self.matches:
+                if match.help_doc is not None:
+                    self.sub_args.append((match, build_usage(match.help_doc, self.bind_prefix)[1]))
+
+    @staticmethod
+    def get(module: Command, targetFrom: str = None) -> 'CommandGrammar':
+        key = (module, targetFrom)
+        grammar = CommandGrammar._cache.get(key)
+        if grammar is None or grammar.bound_count != len(module.match_list.set):
+            grammar = CommandGrammar._cache[key] = CommandGrammar(module, targetFrom)
+        return grammar
+
+
 class CommandParser:
     def __init__(self, args: Union[str, list, tuple, Command, Option, Schedule, StartUp, RegexCommand], prefix=None,
                  msg: MessageSession = None):
@@ -32,19 +98,11 @@ class CommandParser:
         self.options_desc = []
         if isinstance(args, Command):
             self.bind_prefix = args.bind_prefix
-            help_doc_list = []
-            none_doc = True
-            for match in (args.match_list.set if self.msg is None else args.match_list.get(self.msg.target.targetFrom)):
-                if match.help_doc is not None:
-                    none_doc = False
-                    help_doc_list = help_doc_list + match.help_doc
-                if match.options_desc is not None:
-                    for m in match.options_desc:
-                        self.options_desc.append(f'{m}  {match.options_desc[m]}')
-            if not none_doc:
-                args = help_doc_list
-            else:
-                args = None
+            self.grammar = CommandGrammar.get(args, None if self.msg is None else self.msg.target.targetFrom)
+            self.options_desc = self.grammar.options_desc
+            self.args_raw = self.grammar.args_raw
+            self.args = self.grammar.args
+            return
         elif isinstance(args, (Schedule, StartUp, Option, RegexCommand)):
             args = None
         if args is None:
@@ -56,20 +114,7 @@ class CommandParser:
         elif isinstance(args, tuple):
             args = list(args)
         if isinstance(args, list):
-            arglst_raw = []
-            arglst = []
-            for x in args:
-                split = x.split(' ')[0]
-                if self.bind_prefix is not None:
-                    if split not in [command_prefix_first + self.bind_prefix, self.bind_prefix]:
-                        x = f'{command_prefix_first}{self.bind_prefix} {x}'
-                arglst_raw.append(x)
-                match_detail_help = re.match('(.*){.*}$', x, re.M | re.S)
-                if match_detail_help:
-                    x = match_detail_help.group(1)
-                arglst.append(x)
-            self.args_raw = arglst_raw
-            self.args = 'Usage:\n  ' + '\n  '.join(y for y in arglst)
+            self.args_raw, self.args = build_usage(args, self.bind_prefix)
         else:
             raise InvalidHelpDocTypeError
 
@@ -105,27 +150,18 @@ class CommandParser:
             if not isinstance(self.origin_template, Command):
                 if len(split_command) == 1:
                     return None
-                return docopt(self.args, argvs=split_command[1:], default_help=False)
+                return compile_usage(self.args).match(split_command[1:], default_help=False)
             else:
                 if len(split_command) == 1:
-                    for match in (self.origin_template.match_list.set if self.msg is None else
-                    self.origin_template.match_list.get(self.msg.target.targetFrom)):
+                    for match in self.grammar.matches:
                         if match.help_doc is None:
                             return match, None
                     raise InvalidCommandFormatError
                 else:
-                    base_match = docopt(self.args, argvs=split_command[1:], default_help=False)
-                    for match in (self.origin_template.match_list.set if self.msg is None else
-                    self.origin_template.match_list.get(self.msg.target.targetFrom)):
-                        if match.help_doc is None:
-                            continue
+                    base_match = compile_usage(self.args).match(split_command[1:], default_help=False)
+                    for match, sub_args in self.grammar.sub_args:
                         try:
-                            sub_args = CommandParser(match.help_doc, prefix=self.bind_prefix).args
-                            if sub_args is not None:
-                                get_parse = docopt(sub_args,
-                                                   argvs=split_command[1:], default_help=False)
-                            else:
-                                continue
+                            get_parse = compile_usage(sub_args).match(split_command[1:], default_help=False)
                         except DocoptExit:
                             continue
                         correct = True
@@ -134,8 +170,6 @@ class CommandParser:
                                 correct = False
                         if correct:
                             return match, get_parse
-
-
         except DocoptExit:
             traceback.print_exc()
             raise InvalidCommandFormatError
@@ -1,16 +1,16 @@
-import re
 import traceback
 from aiocqhttp.exceptions import ActionFailed
 from datetime import datetime
 
-from core.elements import MessageSession, Command, command_prefix, ExecutionLockList, RegexCommand, ErrorMessage
+from core.elements import MessageSession, Command, command_prefix, ExecutionLockList, ErrorMessage, \
+    RegexEnabledCache
 from core.exceptions import AbuseWarning
 from core.loader import ModulesManager
 from core.logger import Logger
 from core.parser.command import CommandParser, InvalidCommandFormatError, InvalidHelpDocTypeError
 from core.tos import warn_target
 from core.utils import remove_ineffective_text, RemoveDuplicateSpace
-from database import BotDBUtil
+from database import BotDBUtil, run_sync
 
 
 counter_same = {}  # 命令使用次数计数（重复使用单一命令）
@@ -53,14 +53,12 @@ async def parser(msg: MessageSession, require_enable_modules: bool = True, prefi
     :param prefix: 使用的命令前缀。如果为None，则使用默认的命令前缀，存在''值的情况下则代表无需命令前缀
     :return: 无返回
     """
-    modules = ModulesManager.return_modules_list_as_dict(msg.target.targetFrom)
-    modulesAliases = ModulesManager.return_modules_alias_map()
-    modulesRegex = ModulesManager.return_specified_type_modules(RegexCommand, targetFrom=msg.target.targetFrom)
+    dispatch_table = ModulesManager.return_dispatch_table(msg.target.targetFrom)
+    modules = dispatch_table.modules
+    modulesAliases = dispatch_table.aliases
     display = RemoveDuplicateSpace(msg.asDisplay())  # 将消息转换为一般显示形式
     # Logger.info(f'[{msg.target.senderId}{f" ({msg.target.targetId})" if msg.target.targetFrom != msg.target.senderFrom else ""}] -> [Bot]: {display}')
     msg.trigger_msg = display
-    msg.target.senderInfo = senderInfo = BotDBUtil.SenderInfo(msg.target.senderId)
-    enabled_modules_list = BotDBUtil.Module(msg).check_target_enabled_module_list()
     if len(display) == 0:
         return
     disable_prefix = False
@@ -74,6 +72,13 @@ async def parser(msg: MessageSession, require_enable_modules: bool = True, prefi
         if len(display) <= 1 or (display[0] == '~' and display[1] == '~'):
             return
         is_command = True
+    elif not dispatch_table.regex_matcher.possible(display) \
+            or RegexEnabledCache.get_cache(msg.target.targetId) is False:  # 在查询数据库前排除不会被正则模块处理的消息
+        return
+    context = await run_sync(BotDBUtil.TargetContext.get, msg)  # 一次性载入此消息所需的对象数据
+    msg.target.senderInfo = senderInfo = context.senderInfo
+    enabled_modules_list = context.modules.check_target_enabled_module_list()
+    if is_command:
         Logger.info(
             f'[{msg.target.senderId}{f" ({msg.target.targetId})" if msg.target.targetFrom != msg.target.senderFrom else ""}] -> [Bot]: {display}')
         if disable_prefix and display[0] not in command_prefix:
@@ -106,7 +111,7 @@ async def parser(msg: MessageSession, require_enable_modules: bool = True, prefi
             if senderInfo.query.isInBlockList and not senderInfo.query.isInAllowList and not sudo:  # 如果是以 sudo 执行的命令，则不检查是否已 ban
                 ExecutionLockList.remove(msg)
                 return
-            in_mute = BotDBUtil.Muting(msg).check()
+            in_mute = context.muted
             if in_mute and not mute:
                 ExecutionLockList.remove(msg)
                 return
@@ -159,7 +164,7 @@ async def parser(msg: MessageSession, require_enable_modules: bool = True, prefi
                         await msg.sendMessage(ErrorMessage(f'{command_first_word}未绑定任何命令，请联系开发者处理。'))
                         continue
                     none_doc = True
-                    for func in module.match_list.get(msg.target.targetFrom):
+                    for func in dispatch_table.command_matches[command_first_word]:
                         if func.help_doc is not None:
                             none_doc = False
                     if not none_doc:
@@ -214,44 +219,32 @@ async def parser(msg: MessageSession, require_enable_modules: bool = True, prefi
                     continue
         ExecutionLockList.remove(msg)
     if not is_command:
-        for regex in modulesRegex:  # 遍历正则模块列表
+        has_regex_enabled = False
+        for bind_prefix in dispatch_table.regex_modules:
+            if bind_prefix in enabled_modules_list:
+                has_regex_enabled = True
+                break
+        RegexEnabledCache.add_cache(msg.target.targetId, has_regex_enabled)
+        for regex_module, matches in dispatch_table.regex_matcher.match(display, enabled_modules_list):  # 遍历匹配成功的正则模块
             try:
-                if regex in enabled_modules_list:
-                    regex_module = modulesRegex[regex]
-                    if regex_module.required_superuser:
-                        if not msg.checkSuperUser():
-                            continue
-                    elif regex_module.required_admin:
-                        if not await msg.checkPermission():
-                            continue
-                    for rfunc in regex_module.match_list.set:
-                        msg.matched_msg = False
-                        matched = False
-                        if rfunc.mode.upper() in ['M', 'MATCH']:
-                            msg.matched_msg = re.match(rfunc.pattern, display, flags=rfunc.flags)
-                            if msg.matched_msg is not None:
-                                matched = True
-                        elif rfunc.mode.upper() in ['A', 'FINDALL']:
-                            msg.matched_msg = re.findall(rfunc.pattern, display, flags=rfunc.flags)
-                            if msg.matched_msg:
-                                matched = True
-                        if matched:
-                            if regex_module.required_superuser:
-                                if not msg.checkSuperUser():
-                                    continue
-                            elif regex_module.required_admin:
-                                if not await msg.checkPermission():
-                                    continue
-                            if not ExecutionLockList.check(msg):
-                                ExecutionLockList.add(msg)
-                            else:
-                                return await msg.sendMessage('您有命令正在执行，请稍后再试。')
-                            if rfunc.show_typing and not senderInfo.query.disable_typing:
-                                async with msg.Typing(msg):
-                                    await rfunc.function(msg)  # 将msg传入下游模块
-                            else:
-                                await rfunc.function(msg)  # 将msg传入下游模块
-                        ExecutionLockList.remove(msg)
+                if regex_module.required_superuser:
+                    if not msg.checkSuperUser():
+                        continue
+                elif regex_module.required_admin:
+                    if not await msg.checkPermission():
+                        continue
+                for rfunc, matched_msg in matches:
+                    msg.matched_msg = matched_msg
+                    if not ExecutionLockList.check(msg):
+                        ExecutionLockList.add(msg)
+                    else:
+                        return await msg.sendMessage('您有命令正在执行，请稍后再试。')
+                    if rfunc.show_typing and not senderInfo.query.disable_typing:
+                        async with msg.Typing(msg):
+                            await rfunc.function(msg)  # 将msg传入下游模块
+                    else:
+                        await rfunc.function(msg)  # 将msg传入下游模块
+                    ExecutionLockList.remove(msg)
             except AbuseWarning as e:
                 await warn_target(msg, str(e))
                 temp_ban_counter[msg.target.senderId] = {'count': 1,
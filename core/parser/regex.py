@@ -0,0 +1,175 @@
+import re
+from typing import List, Mapping, Tuple, Union, Iterator
+
+try:
+    from re import _parser as sre_parse
+    from re import _constants as sre_constants
+except ImportError:
+    import sre_parse
+    import sre_constants
+
+from core.elements import RegexCommand
+from core.elements.module.component_meta import RegexMeta
+
+MATCH_MODES = ['M', 'MATCH']
+FINDALL_MODES = ['A', 'FINDALL']
+
+
+def _literal_usable(literal: str, ignore_case: bool) -> bool:
+    if not ignore_case:
+        return True
+    for c in literal:
+        if c.lower() != c.upper() and (not c.isascii() or c in 'iI'):
+            return False
+    return True
+
+
+def _sequence_literals(subpattern, ignore_case: bool) -> Tuple[Union[Tuple[str, ...], None], str]:
+    """
+    找出匹配此序列时必定会出现的字面量
+    :return: (必定出现其一的字面量组, 序列开头的字面量前缀)
+    """
+    candidates = []
+    prefix = None
+    run = []
+
+    def flush():
+        if run:
+            candidates.append((''.join(run),))
+            run.clear()
+
+    for op, av in subpattern:
+        if op is sre_constants.LITERAL:
+            run.append(chr(av))
+            continue
+        if prefix is None:
+            prefix = ''.join(run)
+        flush()
+        if op is sre_constants.AT and av is sre_constants.AT_BEGINNING and not candidates:
+            prefix = None
+            continue
+        if op is sre_constants.SUBPATTERN:
+            # (?i:...)等局部标志会改变组内字面量的匹配方式，不对其预过滤
+            found = _sequence_literals(av[-1], ignore_case)[0] if not av[1] and not av[2] else None
+        elif op is sre_constants.BRANCH:
+            found = _branch_literals(av[1], ignore_case)
+        elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT) and av[0] >= 1:
+            found = _sequence_literals(av[2], ignore_case)[0]
+        else:
+            found = None
+        if found is not None:
+            candidates.append(found)
+    if prefix is None:
+        prefix = ''.join(run)
+    flush()
+    candidates = [c for c in candidates if all(x and _literal_usable(x, ignore_case) for x in c)]
+    if not candidates:
+        return None, prefix if _literal_usable(prefix, ignore_case) else ''
+    best = max(candidates, key=lambda c: min(len(x) for x in c))
+    return best, prefix if _literal_usable(prefix, ignore_case) else ''
+
+
+def _branch_literals(branches, ignore_case: bool) -> Union[Tuple[str, ...], None]:
+    literals = []
+    for branch in branches:
+        found = _sequence_literals(branch, ignore_case)[0]
+        if found is None:
+            return None
+        literals += found
+    return tuple(literals)
+
+
+def required_literals(pattern: str, flags: re.RegexFlag = 0) -> Tuple[Union[Tuple[str, ...], None], str, bool]:
+    """
+    分析正则表达式，找出能够匹配的文本中必定出现的字面量，用于在执行正则前快速排除不可能匹配的文本。
+    :return: (必定出现其一的字面量组，无法确定时为None, 表达式开头的字面量前缀, 是否忽略大小写)
+    """
+    try:
+        parsed = sre_parse.parse(pattern, flags)
+    except Exception:
+        return None, '', False
+    ignore_case = bool(parsed.state.flags & re.IGNORECASE)
+    literals, prefix = _sequence_literals(parsed, ignore_case)
+    if ignore_case:
+        if literals is not None:
+            literals = tuple(x.casefold() for x in literals)
+        prefix = prefix.casefold()
+    return literals, prefix, ignore_case
+
+
+class RegexEntry:
+    __slots__ = ("meta", "compiled", "findall", "literals", "prefix", "ignore_case")
+
+    def __init__(self, meta: RegexMeta):
+        self.meta = meta
+        self.compiled = re.compile(meta.pattern, flags=meta.flags)
+        self.findall = meta.mode.upper() in FINDALL_MODES
+        self.literals, self.prefix, self.ignore_case = required_literals(meta.pattern, meta.flags)
+        if self.findall:
+            self.prefix = ''
+
+    def possible(self, text: str, folded: str) -> bool:
+        target = folded if self.ignore_case else text
+        if self.prefix and not target.startswith(self.prefix):
+            return False
+        if self.literals is not None:
+            for literal in self.literals:
+                if literal in target:
+                    return True
+            return False
+        return True
+
+    def match(self, text: str):
+        if self.findall:
+            matched = self.compiled.findall(text)
+            return matched if matched else None
+        return self.compiled.match(text)
+
+
+class RegexMatcher:
+    """
+    正则模块的分发器，预先编译所有正则并通过字面量预筛选跳过不可能匹配的表达式。
+    """
+
+    def __init__(self, regex_modules: Mapping[str, RegexCommand]):
+        self.modules: List[Tuple[str, RegexCommand, Tuple[RegexEntry, ...]]] = []
+        for bind_prefix in regex_modules:
+            module = regex_modules[bind_prefix]
+            entries = tuple(RegexEntry(meta) for meta in module.match_list.set
+                            if meta.mode.upper() in MATCH_MODES + FINDALL_MODES)
+            if entries:
+                self.modules.append((bind_prefix, module, entries))
+        self.has_ignore_case = any(e.ignore_case for m in self.modules for e in m[2])
+
+    def __bool__(self):
+        return bool(self.modules)
+
+    def possible(self, text: str) -> bool:
+        """
+        不考虑模块是否启用，检查文本是否可能被任一表达式匹配
+        """
+        folded = text.casefold() if self.has_ignore_case else text
+        for _, _, entries in self.modules:
+            for entry in entries:
+                if entry.possible(text, folded):
+                    return True
+        return False
+
+    def match(self, text: str, enabled_modules: Union[list, set]) \
+            -> Iterator[Tuple[RegexCommand, List[Tuple[RegexMeta, object]]]]:
+        """
+        依次返回已启用且至少有一个表达式匹配成功的模块，以及匹配成功的表达式与结果
+        """
+        folded = text.casefold() if self.has_ignore_case else text
+        for bind_prefix, module, entries in self.modules:
+            if bind_prefix not in enabled_modules:
+                continue
+            matches = []
+            for entry in entries:
+                if not entry.possible(text, folded):
+                    continue
+                matched = entry.match(text)
+                if matched is not None:
+                    matches.append((entry.meta, matched))
+            if matches:
+                yield module, matches
@@ -0,0 +1,226 @@
+'''按平台排队发送消息，平滑突发的消息以免触发平台的频率限制或风控。'''
+import asyncio
+import time
+import traceback
+from collections import deque
+from typing import Any, Callable, Union
+
+from config import Config
+from core.http_client import TokenBucket
+from core.logger import Logger
+
+RATE_LIMIT = float(Config('send_rate_limit') or 5)  # 每个平台每秒发送的消息数
+RATE_BURST = int(Config('send_rate_burst') or 10)
+TARGET_RATE_LIMIT = float(Config('send_target_rate_limit') or 1)  # 每个对象（群、频道、私聊）每秒发送的消息数
+TARGET_RATE_BURST = int(Config('send_target_rate_burst') or 3)
+QUEUE_SIZE = int(Config('send_queue_size') or 1000)  # 排队中的消息超过此数量时，发送消息的一方需要等待
+MERGE = Config('send_queue_merge') is True  # 是否合并发往同一对象的相邻消息
+
+
+class SendJob:
+    __slots__ = ('priority', 'seq', 'func', 'args', 'kwargs', 'mergeable', 'futures', 'enqueued')
+
+    def __init__(self, priority: int, seq: int, func: Callable, args: tuple, kwargs: dict, mergeable: bool):
+        self.priority = priority
+        self.seq = seq
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.mergeable = mergeable
+        self.futures = [asyncio.get_running_loop().create_future()]
+        self.enqueued = time.monotonic()
+
+    @property
+    def cancelled(self) -> bool:
+        return all(f.done() for f in self.futures)
+
+    def resolve(self, result=None, exception: BaseException = None):
+        for f in self.futures:
+            if not f.done():
+                if exception is not None:
+                    f.set_exception(exception)
+                else:
+                    f.set_result(result)
+
+
+class SendQueue:
+    """
+    每个平台一个发送队列。同一对象的消息按顺序逐条发送，不同对象之间按优先级与入队顺序轮流发送；
+    每次发送前需要同时取得平台与对象两个令牌桶中的令牌。
+    """
+    HIGH = 0  # 回复用户的消息
+    LOW = 1  # 主动推送的消息
+    queues = {}
+
+    def __init__(self, name: str, rate: float = RATE_LIMIT, burst: int = RATE_BURST,
+                 target_rate: float = TARGET_RATE_LIMIT, target_burst: int = TARGET_RATE_BURST,
+                 max_pending: int = QUEUE_SIZE, merge: Union[Callable[[tuple, tuple], Any], None] = None):
+        """
+        :param name: 平台名称。
+        :param merge: 合并两条消息的函数，传入两条消息的参数，返回合并后的参数，无法合并时返回None。
+        """
+        self.name = name
+        self.bucket = TokenBucket(rate, burst)
+        self.target_rate = target_rate
+        self.target_burst = target_burst
+        self.max_pending = max_pending
+        self.merge = merge if MERGE else None
+        self.pending = {}  # 对象 -> 排队中的SendJob
+        self.buckets = {}
+        self.busy = set()
+        self.seq = 0
+        self.size = 0
+        self.worker = None
+        self.wakeup = None
+        self.space = None
+        self.latency = deque(maxlen=1000)  # (排队耗时, 发送耗时)
+        self.merged = deque(maxlen=max_pending)  # 最近由多条消息合并发送得到的返回值
+        self._stats = {'sent': 0, 'merged': 0, 'failed': 0}
+        SendQueue.queues[name] = self
+
+    async def put(self, target, func: Callable, *args, priority: int = HIGH, mergeable: bool = False, **kwargs):
+        """
+        将一次发送加入队列并等待其完成，返回func的返回值。队列已满时会先等待队列空出位置。
+
+        :param target: 发送对象的标识，同一对象的消息按顺序发送。
+        :param func: 实际发送消息的协程函数，以args与kwargs为参数调用。
+        :param priority: 优先级，SendQueue.HIGH或SendQueue.LOW。
+        :param mergeable: 是否允许与同一对象的相邻消息合并，合并后的消息共用同一个返回值，可用is_merged判断。
+        """
+        if self.worker is None or self.worker.done():
+            self.wakeup = asyncio.Event()
+            self.space = asyncio.Condition()
+            self.worker = asyncio.ensure_future(self._run())
+        async with self.space:
+            await self.space.wait_for(lambda: self.size < self.max_pending)
+            self.size += 1
+        self.seq += 1
+        job = SendJob(priority, self.seq, func, args, kwargs, mergeable)
+        self.pending.setdefault(target, deque()).append(job)
+        self.wakeup.set()
+        try:
+            return await job.futures[0]
+        finally:
+            async with self.space:
+                self.size -= 1
+                self.space.notify()
+
+    def target_bucket(self, target) -> TokenBucket:
+        if target not in self.buckets:
+            if len(self.buckets) >= self.max_pending:
+                for t in [t for t, b in self.buckets.items() if t not in self.pending and b.full()]:
+                    del self.buckets[t]
+            self.buckets[target] = TokenBucket(self.target_rate, self.target_burst)
+        return self.buckets[target]
+
+    def select(self):
+        '''选出下一个可以发送的对象，没有时返回(None, 需要等待的秒数)。'''
+        selected = None
+        head = None
+        wait = None
+        for target, jobs in list(self.pending.items()):
+            while jobs and jobs[0].cancelled:
+                jobs.popleft()
+            if not jobs:
+                del self.pending[target]
+                continue
+            if target in self.busy:
+                continue
+            try:
+                delay = self.target_bucket(target).delay()
+            except Exception as e:  # 只让出错的消息失败，不中断队列
+                Logger.error(traceback.format_exc())
+                self.fail_head(target, e)
+                continue
+            if delay > 0:
+                wait = delay if wait is None else min(wait, delay)
+                continue
+            if head is None or (jobs[0].priority, jobs[0].seq) < (head.priority, head.seq):
+                selected, head = target, jobs[0]
+        return selected, wait
+
+    def take(self, target) -> SendJob:
+        jobs = self.pending[target]
+        job = jobs.popleft()
+        while self.merge is not None and job.mergeable and jobs and jobs[0].mergeable \
+                and jobs[0].kwargs == job.kwargs:
+            try:
+                args = self.merge(job.args, jobs[0].args)
+            except Exception:
+                Logger.error(traceback.format_exc())
+                args = None
+            if args is None:
+                break
+            merged = jobs.popleft()
+            job.args = args
+            job.futures += merged.futures
+            job.enqueued = min(job.enqueued, merged.enqueued)
+            self._stats['merged'] += 1
+        if not jobs:
+            del self.pending[target]
+        return job
+
+    async def _run(self):
+        while True:
+            delay = self.bucket.delay()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            self.wakeup.clear()
+            target, wait = self.select()
+            if target is not None:
+                try:
+                    job = self.take(target)
+                except Exception as e:  # 只让出错的消息失败，不中断队列
+                    Logger.error(traceback.format_exc())
+                    self.fail_head(target, e)
+                    continue
+            if target is None:
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            self.bucket.tokens -= 1
+            self.target_bucket(target).tokens -= 1
+            self.busy.add(target)
+            asyncio.ensure_future(self._send(target, job))
+
+    def fail_head(self, target, exception: BaseException):
+        jobs = self.pending.get(target)
+        if jobs:
+            jobs.popleft().resolve(exception=exception)
+            self._stats['failed'] += 1
+            if not jobs:
+                del self.pending[target]
+
+    async def _send(self, target, job: SendJob):
+        start = time.monotonic()
+        try:
+            result = await job.func(*job.args, **job.kwargs)
+            if len(job.futures) > 1:
+                self.merged.append(result)
+            job.resolve(result)
+            self._stats['sent'] += 1
+        except Exception as e:
+            job.resolve(exception=e)
+            self._stats['failed'] += 1
+        finally:
+            self.latency.append((start - job.enqueued, time.monotonic() - start))
+            self.busy.discard(target)
+            self.wakeup.set()
+
+    def is_merged(self, result) -> bool:
+        '''返回值是否由多条消息共用，撤回这样的消息会同时撤回其他调用方的消息。'''
+        return any(x is result for x in self.merged)
+
+    def stats(self) -> dict:
+        latency = sorted(wait + cost for wait, cost in self.latency)
+        return {**self._stats,
+                'pending': sum(len(jobs) for jobs in self.pending.values()),
+                'wait_avg': sum(wait for wait, _ in self.latency) / len(self.latency) if self.latency else 0,
+                'latency_avg': sum(latency) / len(latency) if latency else 0,
+                'latency_p95': latency[int(len(latency) * 0.95)] if latency else 0}
+
+
+__all__ = ["SendQueue"]
@@ -1,10 +1,10 @@
 from core.elements import MessageSession
-from database import BotDBUtil
+from database import BotDBUtil, run_sync
 
 
 async def warn_target(msg: MessageSession, reason=None):
     current_warns = int(msg.target.senderInfo.query.warns) + 1
-    msg.target.senderInfo.edit('warns', current_warns)
+    await run_sync(msg.target.senderInfo.edit, 'warns', current_warns)
     warn_template = ['警告：',
                      '根据服务条款，你已违反我们的行为准则。']
     if reason is not None:
@@ -16,18 +16,20 @@ async def warn_target(msg: MessageSession, reason=None):
     if current_warns == 5:
         warn_template.append(f'这是对你的最后一次警告。')
     if current_warns > 5:
-        msg.target.senderInfo.edit('isInBlockList', True)
+        await run_sync(msg.target.senderInfo.edit, 'isInBlockList', True)
         return
     await msg.sendMessage('\n'.join(warn_template))
 
 
 async def pardon_user(user: str):
-    BotDBUtil.SenderInfo(user).edit('warns', 0)
+    sender_info = await run_sync(BotDBUtil.SenderInfo, user)
+    await run_sync(sender_info.edit, 'warns', 0)
 
 
 async def warn_user(user: str, count=1):
-    current_warns = int(BotDBUtil.SenderInfo(user).query.warns) + count
-    BotDBUtil.SenderInfo(user).edit('warns', current_warns)
+    sender_info = await run_sync(BotDBUtil.SenderInfo, user)
+    current_warns = int(sender_info.query.warns) + count
+    await run_sync(sender_info.edit, 'warns', current_warns)
     if current_warns > 5:
-        BotDBUtil.SenderInfo(user).edit('isInBlockList', True)
+        await run_sync(sender_info.edit, 'isInBlockList', True)
     return current_warns
@@ -1,17 +1,22 @@
 '''编写机器人时可能会用到的一些工具类方法。'''
+import asyncio
+import copy
 import os
+import time
 import traceback
 import uuid
 from os.path import abspath
 from typing import Union
 
 import aiohttp
-import filetype as ft
 import ujson as json
-from tenacity import retry, wait_fixed, stop_after_attempt
+from tenacity import retry, retry_if_not_exception_type, stop_after_attempt, wait_random_exponential
 
+from core.download_cache import DownloadCache
 from core.elements import PrivateAssets
+from core.http_client import CircuitOpenError, HTTPClient
 from core.loader import load_modules
+from core.utils.http_cache import CachedResponse, ResponseCache, CACHE_FORMATS
 from core.logger import Logger
 
 
@@ -34,60 +39,133 @@ def init() -> None:
     write_tag.close()
 
 
-@retry(stop=stop_after_attempt(3), wait=wait_fixed(3), reraise=True)
-async def get_url(url: str, status_code: int = False, headers: dict = None, fmt=None, log=False):
-    """利用AioHttp获取指定url的内容。
+class SingleFlight:
+    '''合并同时发出的相同请求：同一个键的请求完成前只会实际执行一次，其余调用等待并共享其结果。'''
+
+    def __init__(self):
+        self.calls = {}
+        self.requests = 0
+        self.deduplicated = 0
+
+    async def do(self, key, func, *args, **kwargs):
+        '''执行func(*args, **kwargs)，若相同键的调用正在进行中则等待其结果。
+
+        :param key: 用于判断请求是否相同的键，需要可以被哈希。
+        :param func: 需要执行的协程函数。
+        :returns: func的返回值，等待其他调用的结果时返回其副本。'''
+        self.requests += 1
+        task = self.calls.get(key)
+        if task is not None:
+            self.deduplicated += 1
+            return copy.deepcopy(await asyncio.shield(task))
+        task = asyncio.ensure_future(func(*args, **kwargs))
+        self.calls[key] = task
+        task.add_done_callback(lambda _: self.calls.pop(key, None))
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        return {'requests': self.requests, 'deduplicated': self.deduplicated, 'in_flight': len(self.calls)}
+
+
+get_url_flight = SingleFlight()
+
+
+async def get_url(url: str, status_code: int = False, headers: dict = None, fmt=None, log=False,
+                  cache_ttl: int = None):
+    """利用AioHttp获取指定url的内容。同时发出的相同请求只会实际请求一次。
 
     :param url: 需要获取的url。
     :param status_code: 指定请求到的状态码，若不符则抛出ValueError。
     :param headers: 请求时使用的http头。
     :param fmt: 指定返回的格式。
     :param log: 是否输出日志。
+    :param cache_ttl: 缓存响应的秒数，为None时不使用缓存。超过此时间后会携带ETag/Last-Modified重新验证，为0时每次都重新验证。
     :returns: 指定url的内容（字符串）。
     """
-    async with aiohttp.ClientSession(headers=headers) as session:
-        async with session.get(url, timeout=aiohttp.ClientTimeout(total=20), headers=headers) as req:
-            if log:
-                Logger.info(await req.read())
-            if status_code and req.status != status_code:
-                raise ValueError(f'{str(req.status)}[Ke:Image,path=https://http.cat/{str(req.status)}.jpg]')
-            if fmt is not None:
-                if hasattr(req, fmt):
-                    return await getattr(req, fmt)()
-                else:
-                    raise ValueError(f"NoSuchMethod: {fmt}")
+    key = ('GET', url, tuple(sorted(headers.items())) if headers else None, status_code, fmt)
+    if cache_ttl is not None and fmt in CACHE_FORMATS:
+        cached = await ResponseCache.get(url, headers, cache_ttl)
+        if cached is not None and cached.fresh(cache_ttl):
+            ResponseCache.count('hits')
+            if status_code and status_code != 200:
+                raise ValueError('200[Ke:Image,path=https://http.cat/200.jpg]')
+            return cached.as_format(fmt)
+        return await get_url_flight.do(key + (cache_ttl,), _get_url_cached, url, status_code, headers, fmt, log,
+                                       cache_ttl)
+    return await get_url_flight.do(key, _get_url, url, status_code, headers, fmt, log)
+
+
+@retry(stop=stop_after_attempt(3), wait=wait_random_exponential(multiplier=0.5, max=4),
+       retry=retry_if_not_exception_type(CircuitOpenError), reraise=True)
+async def _get_url(url: str, status_code: int = False, headers: dict = None, fmt=None, log=False):
+    session = HTTPClient.get_session()
+    async with session.get(url, timeout=aiohttp.ClientTimeout(total=20), headers=headers) as req:
+        if log:
+            Logger.info(await req.read())
+        if status_code and req.status != status_code:
+            raise ValueError(f'{str(req.status)}[Ke:Image,path=https://http.cat/{str(req.status)}.jpg]')
+        if fmt is not None:
+            if hasattr(req, fmt):
+                return await getattr(req, fmt)()
             else:
-                text = await req.text()
-                return text
-
-
-@retry(stop=stop_after_attempt(3), wait=wait_fixed(3), reraise=True)
+                raise ValueError(f"NoSuchMethod: {fmt}")
+        else:
+            text = await req.text()
+            return text
+
+
+@retry(stop=stop_after_attempt(3), wait=wait_random_exponential(multiplier=0.5, max=4),
+       retry=retry_if_not_exception_type(CircuitOpenError), reraise=True)
+async def _get_url_cached(url: str, status_code: int = False, headers: dict = None, fmt=None, log=False,
+                          cache_ttl: int = 0):
+    cached = await ResponseCache.get(url, headers)
+    request_headers = dict(headers) if headers else {}
+    if cached is not None:
+        request_headers.update(cached.validators())
+    session = HTTPClient.get_session()
+    async with session.get(url, timeout=aiohttp.ClientTimeout(total=20), headers=request_headers) as req:
+        if req.status == 304 and cached is not None:
+            ResponseCache.count('revalidated')
+            cached.validated = time.time()
+            await ResponseCache.set(url, headers, cached, write_body=False)
+            response = cached
+            status = 200
+        else:
+            ResponseCache.count('misses')
+            response = CachedResponse(url, await req.read(), charset=req.charset, etag=req.headers.get('ETag'),
+                                      last_modified=req.headers.get('Last-Modified'), validated=time.time())
+            status = req.status
+            if status == 200:
+                await ResponseCache.set(url, headers, response)
+    if log:
+        Logger.info(response.body)
+    if status_code and status != status_code:
+        raise ValueError(f'{str(status)}[Ke:Image,path=https://http.cat/{str(status)}.jpg]')
+    return response.as_format(fmt)
+
+
+@retry(stop=stop_after_attempt(3), wait=wait_random_exponential(multiplier=0.5, max=4),
+       retry=retry_if_not_exception_type(CircuitOpenError), reraise=True)
 async def post_url(url: str, data: any, headers: dict = None):
     '''发送POST请求。
     :param url: 需要发送的url。
     :param data: 需要发送的数据。
     :param headers: 请求时使用的http头。
     :returns: 发送请求后的响应。'''
-    async with aiohttp.ClientSession(headers=headers) as session:
-        async with session.post(url, data=data, headers=headers) as req:
-            return await req.text()
+    session = HTTPClient.get_session()
+    async with session.post(url, data=data, headers=headers) as req:
+        return await req.text()
 
 
-@retry(stop=stop_after_attempt(3), wait=wait_fixed(3), reraise=True)
+@retry(stop=stop_after_attempt(3), wait=wait_random_exponential(multiplier=0.5, max=4),
+       retry=retry_if_not_exception_type(CircuitOpenError), reraise=True)
 async def download_to_cache(link: str) -> Union[str, bool]:
-    '''利用AioHttp下载指定url的内容，并保存到缓存（./cache目录）。
+    '''利用AioHttp下载指定url的内容，并保存到缓存（./cache/download目录），已下载过的文件会直接返回。
 
     :param link: 需要获取的link。
     :returns: 文件的相对路径，若获取失败则返回False。'''
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(link) as resp:
-                res = await resp.read()
-                ftt = ft.match(res).extension
-                path = abspath(f'./cache/{str(uuid.uuid4())}.{ftt}')
-                with open(path, 'wb+') as file:
-                    file.write(res)
-                    return path
+        return await DownloadCache.download(link)
     except:
         Logger.error(traceback.format_exc())
         return False
@@ -0,0 +1,140 @@
+'''get_url使用的HTTP响应缓存，分为内存与磁盘（./cache/http目录）两级。'''
+import asyncio
+import hashlib
+import os
+import time
+import traceback
+from os.path import abspath
+from typing import Union
+
+import ujson as json
+
+from config import Config
+from core.elements.temp import LRUCache
+from core.logger import Logger
+
+CACHE_DIR = abspath((Config('cache_path') or './cache/') + 'http/')
+MAX_BODY_SIZE = 5 * 1024 * 1024  # 超过此大小的响应不会被缓存
+CACHE_FORMATS = (None, 'text', 'json', 'read')  # 可以从缓存中返回的格式
+
+
+class CachedResponse:
+    __slots__ = ("url", "body", "charset", "etag", "last_modified", "validated")
+
+    def __init__(self, url: str, body: bytes, charset: Union[str, None] = None, etag: Union[str, None] = None,
+                 last_modified: Union[str, None] = None, validated: float = 0):
+        """
+        :param validated: 最近一次从服务器获取或验证此响应的时间戳
+        """
+        self.url = url
+        self.body = body
+        self.charset = charset
+        self.etag = etag
+        self.last_modified = last_modified
+        self.validated = validated
+
+    def fresh(self, ttl: int) -> bool:
+        return self.validated + ttl > time.time()
+
+    def validators(self) -> dict:
+        '''返回重新验证缓存时使用的条件请求头。'''
+        headers = {}
+        if self.etag is not None:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified is not None:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+    def as_format(self, fmt=None):
+        if fmt == 'read':
+            return self.body
+        text = self.body.decode(self.charset or 'utf-8')
+        if fmt == 'json':
+            return json.loads(text)
+        return text
+
+    def meta(self) -> dict:
+        return {'url': self.url, 'charset': self.charset, 'etag': self.etag, 'last_modified': self.last_modified,
+                'validated': self.validated}
+
+
+class ResponseCache:
+    """
+    按url与请求头缓存状态码为200的响应，过期后携带ETag/Last-Modified重新验证，服务器返回304时继续使用缓存。
+    """
+    _memory = LRUCache(maxsize=int(Config('http_cache_size') or 1000), ttl=None)
+    _stats = {'hits': 0, 'disk_hits': 0, 'revalidated': 0, 'misses': 0}
+
+    @staticmethod
+    def key(url: str, headers: Union[dict, None] = None) -> str:
+        raw = url if not headers else url + json.dumps(sorted(headers.items()))
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _read_disk(key: str) -> Union[CachedResponse, None]:
+        path = os.path.join(CACHE_DIR, key)
+        if not os.path.exists(path + '.json'):
+            return None
+        try:
+            with open(path + '.json', 'r', encoding='utf-8') as f:
+                meta = json.loads(f.read())
+            with open(path + '.bin', 'rb') as f:
+                body = f.read()
+            return CachedResponse(body=body, **meta)
+        except Exception:
+            return None
+
+    @staticmethod
+    def _write_disk(key: str, response: CachedResponse, write_body: bool = True):
+        path = os.path.join(CACHE_DIR, key)
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            if write_body:
+                with open(path + '.bin.tmp', 'wb') as f:
+                    f.write(response.body)
+                os.replace(path + '.bin.tmp', path + '.bin')
+            with open(path + '.json.tmp', 'w', encoding='utf-8') as f:
+                f.write(json.dumps(response.meta()))
+            os.replace(path + '.json.tmp', path + '.json')
+        except Exception:
+            Logger.error(traceback.format_exc())
+
+    @staticmethod
+    async def get(url: str, headers: Union[dict, None] = None, ttl: int = 0) -> Union[CachedResponse, None]:
+        '''依次从内存与磁盘中读取缓存的响应，不检查是否过期。
+
+        :param ttl: 仅用于统计从磁盘读取到的未过期响应。'''
+        key = ResponseCache.key(url, headers)
+        response = ResponseCache._memory.get(key)
+        if response is None:
+            response = await asyncio.get_running_loop().run_in_executor(None, ResponseCache._read_disk, key)
+            if response is not None:
+                ResponseCache._memory.set(key, response)
+                if response.fresh(ttl):
+                    ResponseCache._stats['disk_hits'] += 1
+        return response
+
+    @staticmethod
+    async def set(url: str, headers: Union[dict, None], response: CachedResponse, write_body: bool = True):
+        if len(response.body) > MAX_BODY_SIZE:
+            return
+        key = ResponseCache.key(url, headers)
+        ResponseCache._memory.set(key, response)
+        await asyncio.get_running_loop().run_in_executor(None, ResponseCache._write_disk, key, response, write_body)
+
+    @staticmethod
+    def count(name: str):
+        ResponseCache._stats[name] += 1
+
+    @staticmethod
+    def stats() -> dict:
+        '''hits为未过期直接返回的次数（其中disk_hits次读取了磁盘），revalidated为服务器返回304的次数，
+        misses为下载完整响应的次数。'''
+        stats = dict(ResponseCache._stats)
+        total = stats['hits'] + stats['revalidated'] + stats['misses']
+        stats['hit_rate'] = (stats['hits'] + stats['revalidated']) / total if total else 0
+        stats['memory'] = ResponseCache._memory.stats()
+        return stats
+
+
+__all__ = ["CachedResponse", "ResponseCache", "CACHE_FORMATS"]
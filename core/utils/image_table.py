@@ -5,11 +5,11 @@ import uuid
 from html import escape
 from typing import List, Union
 
-import aiohttp
 import ujson as json
 from tabulate import tabulate
 
 from config import Config
+from core.http_client import HTTPClient
 from core.logger import Logger
 
 web_render = Config('web_render')
@@ -58,12 +58,12 @@ async def image_table_render(table: Union[ImageTable, List[ImageTable]]):
         picname = os.path.abspath(f'./cache/{str(uuid.uuid4())}.jpg')
         if os.path.exists(picname):
             os.remove(picname)
-        async with aiohttp.ClientSession() as session:
-            async with session.post(web_render, headers={
-                'Content-Type': 'application/json',
-            }, data=json.dumps(html)) as resp:
-                with open(picname, 'wb+') as jpg:
-                    jpg.write(await resp.read())
+        session = HTTPClient.get_session()
+        async with session.post(web_render, headers={
+            'Content-Type': 'application/json',
+        }, data=json.dumps(html)) as resp:
+            with open(picname, 'wb+') as jpg:
+                jpg.write(await resp.read())
         return picname
     except Exception:
         Logger.error(traceback.format_exc())
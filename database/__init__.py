@@ -1,14 +1,23 @@
 import datetime
+import os
+import platform
+import time
+from typing import Union
 
+from sqlalchemy import and_, func, literal, or_, select
 from tenacity import retry, stop_after_attempt
 
 from config import Config
 from core.elements.message import MessageSession
-from core.elements.temp import EnabledModulesCache, SenderInfoCache
+from core.elements.temp import EnabledModulesCache, SenderInfoCache, RegexEnabledCache
+from core.scheduler import Scheduler
+from database.executor import register_scoped_session, run_sync
 from database.orm import DBSession
-from database.tables import EnabledModules, MuteList, SenderInfo, TargetAdmin, CommandTriggerTime, GroupAllowList
+from database.tables import EnabledModules, TargetEnabledModule, MuteList, SenderInfo, TargetAdmin, CommandTriggerTime, \
+    GroupAllowList, CacheChangeLog
 
 cache = Config('db_cache')
+cache_sync_interval = int(Config('db_cache_sync_interval') or 2)
 
 
 def convert_list_to_str(lst: list) -> str:
@@ -31,7 +40,8 @@ class Dict2Object(dict):
         self[key] = value
 
 
-session = DBSession().session
+session = DBSession().scoped_session
+register_scoped_session(session)
 
 
 def auto_rollback_error(func):
@@ -48,28 +58,34 @@ def auto_rollback_error(func):
 class BotDBUtil:
     class Module:
         @retry(stop=stop_after_attempt(3))
-        def __init__(self, msg: [MessageSession, str]):
+        def __init__(self, msg: [MessageSession, str], enabled_modules: Union[list, None] = None,
+                     preloaded: bool = False):
+            """
+            :param enabled_modules: 已经查询到的已打开模块列表（由TargetContext预先载入）
+            :param preloaded: 是否使用enabled_modules的值而不再查询数据库
+            """
             if isinstance(msg, MessageSession):
                 self.targetId = str(msg.target.targetId)
             else:
                 self.targetId = msg
-            self.need_insert = False
-            self.enable_modules_list = EnabledModulesCache.get_cache(self.targetId) if cache else False
-            if not self.enable_modules_list:
-                query = self.query_EnabledModules
-                if query is None:
-                    self.need_insert = True
-                    self.enable_modules_list = []
-                else:
-                    query_ = query.enabledModules
-                    self.enable_modules_list = convert_str_to_list(query_)
+            if preloaded:
+                self.enable_modules_list = enabled_modules if enabled_modules is not None else []
+                if cache:
+                    EnabledModulesCache.add_cache(self.targetId, list(self.enable_modules_list))
+                return
+            query_cache = EnabledModulesCache.get_cache(self.targetId) if cache else None
+            if query_cache is not None:
+                self.enable_modules_list = list(query_cache)
+            else:
+                self.enable_modules_list = self.query_EnabledModules
                 if cache:
-                    EnabledModulesCache.add_cache(self.targetId, self.enable_modules_list)
+                    EnabledModulesCache.add_cache(self.targetId, list(self.enable_modules_list))
 
         @property
         @auto_rollback_error
-        def query_EnabledModules(self):
-            return session.query(EnabledModules).filter_by(targetId=self.targetId).first()
+        def query_EnabledModules(self) -> list:
+            return [x.moduleName for x in
+                    session.query(TargetEnabledModule.moduleName).filter_by(targetId=self.targetId)]
 
         def check_target_enabled_module_list(self) -> list:
             return self.enable_modules_list
@@ -80,72 +96,128 @@ class BotDBUtil:
         @retry(stop=stop_after_attempt(3))
         @auto_rollback_error
         def enable(self, module_name) -> bool:
-            if isinstance(module_name, str):
-                if module_name not in self.enable_modules_list:
-                    self.enable_modules_list.append(module_name)
-            elif isinstance(module_name, (list, tuple)):
-                for x in module_name:
-                    if x not in self.enable_modules_list:
-                        self.enable_modules_list.append(x)
-            value = convert_list_to_str(self.enable_modules_list)
-            if self.need_insert:
-                table = EnabledModules(targetId=self.targetId,
-                                       enabledModules=value)
-                session.add_all([table])
-            else:
-                self.query_EnabledModules.enabledModules = value
-            session.commit()
-            session.expire_all()
-            if cache:
-                EnabledModulesCache.add_cache(self.targetId, self.enable_modules_list)
+            modules = [module_name] if isinstance(module_name, str) else list(module_name)
+            exists = set(x.moduleName for x in session.query(TargetEnabledModule.moduleName).filter(
+                TargetEnabledModule.targetId == self.targetId, TargetEnabledModule.moduleName.in_(modules)))
+            insert = [x for x in dict.fromkeys(modules) if x not in exists]
+            if insert:
+                session.add_all([TargetEnabledModule(targetId=self.targetId, moduleName=x) for x in insert])
+                BotDBUtil.CacheChangeLog.add('modules', self.targetId)
+                session.commit()
+            for x in modules:
+                if x not in self.enable_modules_list:
+                    self.enable_modules_list.append(x)
+            BotDBUtil.Module.invalidate(self.targetId, self.enable_modules_list)
             return True
 
         @retry(stop=stop_after_attempt(3))
         @auto_rollback_error
         def disable(self, module_name) -> bool:
-            if isinstance(module_name, str):
-                if module_name in self.enable_modules_list:
-                    self.enable_modules_list.remove(module_name)
-            elif isinstance(module_name, (list, tuple)):
-                for x in module_name:
-                    if x in self.enable_modules_list:
-                        self.enable_modules_list.remove(x)
-            if not self.need_insert:
-                self.query_EnabledModules.enabledModules = convert_list_to_str(self.enable_modules_list)
-                session.commit()
-                session.expire_all()
-                if cache:
-                    EnabledModulesCache.add_cache(self.targetId, self.enable_modules_list)
+            modules = [module_name] if isinstance(module_name, str) else list(module_name)
+            session.query(TargetEnabledModule).filter(TargetEnabledModule.targetId == self.targetId,
+                                                      TargetEnabledModule.moduleName.in_(modules)) \
+                .delete(synchronize_session=False)
+            BotDBUtil.CacheChangeLog.add('modules', self.targetId)
+            session.commit()
+            for x in modules:
+                if x in self.enable_modules_list:
+                    self.enable_modules_list.remove(x)
+            BotDBUtil.Module.invalidate(self.targetId, self.enable_modules_list)
             return True
 
+        @staticmethod
+        def invalidate(targetId, enabled_modules: list = None):
+            """
+            对象已打开的模块变动后调用，更新或清除相关的缓存
+            :param enabled_modules: 变动后的模块列表，若为None则仅清除缓存
+            """
+            RegexEnabledCache.remove_cache(targetId)
+            if cache:
+                if enabled_modules is None:
+                    EnabledModulesCache.remove_cache(targetId)
+                else:
+                    EnabledModulesCache.add_cache(targetId, list(enabled_modules))
+
         @staticmethod
         @retry(stop=stop_after_attempt(3))
         @auto_rollback_error
-        def get_enabled_this(module_name):
-            query = session.query(EnabledModules).filter(EnabledModules.enabledModules.like(f'%{module_name}%'))
-            targetIds = []
-            for x in query:
-                enabled_list = convert_str_to_list(x.enabledModules)
-                if module_name in enabled_list:
-                    targetIds.append(x.targetId)
-            return targetIds
+        def get_enabled_this(module_name) -> list:
+            return [x.targetId for x in
+                    session.query(TargetEnabledModule.targetId).filter_by(moduleName=module_name)]
+
+        @staticmethod
+        @retry(stop=stop_after_attempt(3))
+        @auto_rollback_error
+        def migrate_legacy_table() -> int:
+            """
+            将旧版EnabledModules表中以'|'连接的模块列表迁移至TargetEnabledModule表，迁移完成的行会被删除。
+            :return: 迁移的对象数量
+            """
+            migrated = 0
+            while True:
+                legacy = session.query(EnabledModules).limit(1000).all()
+                if not legacy:
+                    return migrated
+                targetIds = [x.targetId for x in legacy]
+                exists = set(session.query(TargetEnabledModule.targetId, TargetEnabledModule.moduleName)
+                             .filter(TargetEnabledModule.targetId.in_(targetIds)))
+                rows = []
+                for x in legacy:
+                    for module_name in dict.fromkeys(convert_str_to_list(x.enabledModules or '')):
+                        if module_name != '' and (x.targetId, module_name) not in exists:
+                            rows.append(TargetEnabledModule(targetId=x.targetId, moduleName=module_name))
+                session.add_all(rows)
+                session.query(EnabledModules).filter(EnabledModules.targetId.in_(targetIds)) \
+                    .delete(synchronize_session=False)
+                session.commit()
+                migrated += len(legacy)
 
     class SenderInfo:
         @retry(stop=stop_after_attempt(3))
         @auto_rollback_error
-        def __init__(self, senderId):
+        def __init__(self, senderId, query: Union[SenderInfo, None] = None, preloaded: bool = False,
+                     target_admins: dict = None):
+            """
+            发送者信息，数据库中没有此发送者时使用默认值，直到首次修改时才会写入数据库。
+            :param query: 已经查询到的SenderInfo行（由TargetContext预先载入）
+            :param preloaded: 是否使用query的值而不再查询数据库
+            :param target_admins: 已知的对象管理员状态，{targetId: bool}
+            """
             self.senderId = senderId
-            query_cache = SenderInfoCache.get_cache(self.senderId) if cache else False
-            if query_cache:
+            self.target_admins = target_admins if target_admins is not None else {}
+            query_cache = SenderInfoCache.get_cache(self.senderId) if cache and not preloaded else None
+            if query_cache is not None:
                 self.query = Dict2Object(query_cache)
-            else:
-                self.query = self.query_SenderInfo
-                if self.query is None:
-                    session.add_all([SenderInfo(id=senderId)])
-                    session.commit()
-                    self.query = session.query(SenderInfo).filter_by(id=senderId).first()
-                if cache:
-                    SenderInfoCache.add_cache(self.senderId, self.query.__dict__)
+                return
+            if not preloaded:
+                query = self.query_SenderInfo
+            self.query = query if query is not None else self.default_SenderInfo(senderId)
+            if cache:
+                SenderInfoCache.add_cache(self.senderId, self.to_dict(self.query))
+
+        @staticmethod
+        def to_dict(query) -> dict:
+            return {column.name: getattr(query, column.name) for column in SenderInfo.__table__.columns}
+
+        @staticmethod
+        def invalidate(senderId, query=None):
+            """
+            发送者信息变动后调用，更新或清除相关的缓存
+            :param query: 变动后的SenderInfo行，若为None则仅清除缓存
+            """
+            if cache:
+                if query is None:
+                    SenderInfoCache.remove_cache(senderId)
+                else:
+                    SenderInfoCache.add_cache(senderId, BotDBUtil.SenderInfo.to_dict(query))
+
+        @staticmethod
+        def default_SenderInfo(senderId) -> Dict2Object:
+            default = Dict2Object()
+            for column in SenderInfo.__table__.columns:
+                default[column.name] = column.default.arg if column.default is not None else None
+            default.id = senderId
+            return default
 
         @property
         @retry(stop=stop_after_attempt(3))
@@ -157,20 +229,23 @@ class BotDBUtil:
         @auto_rollback_error
         def edit(self, column: str, value):
             query = self.query_SenderInfo
+            if query is None:
+                query = SenderInfo(id=self.senderId)
+                session.add_all([query])
             setattr(query, column, value)
+            BotDBUtil.CacheChangeLog.add('sender', self.senderId)
             session.commit()
-            session.expire_all()
-            if cache:
-                SenderInfoCache.add_cache(self.senderId, query.__dict__)
+            self.query = query
+            BotDBUtil.SenderInfo.invalidate(self.senderId, query)
             return True
 
         @retry(stop=stop_after_attempt(3))
         @auto_rollback_error
-        def check_TargetAdmin(self, targetId):
-            query = session.query(TargetAdmin).filter_by(senderId=self.senderId, targetId=targetId).first()
-            if query is not None:
-                return query
-            return False
+        def check_TargetAdmin(self, targetId) -> bool:
+            if targetId not in self.target_admins:
+                query = session.query(TargetAdmin.id).filter_by(senderId=self.senderId, targetId=targetId).first()
+                self.target_admins[targetId] = query is not None
+            return self.target_admins[targetId]
 
         @retry(stop=stop_after_attempt(3))
         @auto_rollback_error
@@ -178,15 +253,17 @@ class BotDBUtil:
             if not self.check_TargetAdmin(targetId):
                 session.add_all([TargetAdmin(senderId=self.senderId, targetId=targetId)])
                 session.commit()
+                self.target_admins[targetId] = True
             return True
 
         @retry(stop=stop_after_attempt(3))
         @auto_rollback_error
         def remove_TargetAdmin(self, targetId):
-            query = self.check_TargetAdmin(targetId)
-            if query:
+            query = session.query(TargetAdmin).filter_by(senderId=self.senderId, targetId=targetId).first()
+            if query is not None:
                 session.delete(query)
                 session.commit()
+            self.target_admins[targetId] = False
             return True
 
     class CoolDown:
@@ -211,16 +288,17 @@ class BotDBUtil:
         @auto_rollback_error
         def reset(self):
             if not self.need_insert:
-                session.delete(self.query)
+                session.query(CommandTriggerTime).filter_by(targetId=str(self.msg.target.targetId),
+                                                            commandName=self.name).delete()
                 session.commit()
             session.add_all([CommandTriggerTime(targetId=self.msg.target.targetId, commandName=self.name)])
             session.commit()
+            self.need_insert = False
 
     @staticmethod
     @retry(stop=stop_after_attempt(3))
     @auto_rollback_error
     def isGroupInAllowList(targetId):
-        session.expire_all()
         query = session.query(GroupAllowList).filter_by(targetId=targetId).first()
         if query is not None:
             return True
@@ -250,9 +328,152 @@ class BotDBUtil:
         @retry(stop=stop_after_attempt(3))
         @auto_rollback_error
         def remove(self):
-            if self.query is not None:
-                session.delete(self.query)
+            session.query(MuteList).filter_by(targetId=self.targetId).delete()
+            session.commit()
+
+    class CacheChangeLog:
+        """
+        各机器人进程的缓存互相独立，写入数据库时会同时记录一条变动，其他进程定时读取并清除对应的缓存。
+        并发写入时自增id的提交顺序与大小顺序不一定一致，读取时跳过的id会在gap_timeout秒内反复检查，以免漏掉晚提交的变动。
+        """
+        origin = f'{platform.node()}:{os.getpid()}'
+        last_id = None
+        gaps = {}  # 小于last_id但尚未读到的id -> 发现缺失的时间
+        gap_timeout = 60  # 超过此秒数仍未出现的id视为已回滚
+        max_gaps = 1000  # 两次读取之间最多记录的缺失id数量
+        keep = 10000  # 保留的变动记录数量
+
+        @staticmethod
+        def add(cache_name: str, key):
+            """
+            在当前事务中记录一条缓存变动，随事务一同提交，未开启db_cache时不记录
+            :param cache_name: 缓存的名称，'modules'或'sender'
+            :param key: 缓存的键，如targetId或senderId
+            """
+            if not cache:
+                return
+            session.add(CacheChangeLog(cacheName=cache_name, cacheKey=str(key), origin=BotDBUtil.CacheChangeLog.origin))
+
+        @staticmethod
+        @retry(stop=stop_after_attempt(3))
+        @auto_rollback_error
+        def apply() -> int:
+            """
+            读取其他进程新增的变动记录并清除本进程中对应的缓存，首次调用时仅记录当前的位置。
+            :return: 清除的缓存数量
+            """
+            last_id = BotDBUtil.CacheChangeLog.last_id
+            if last_id is None:
+                BotDBUtil.CacheChangeLog.last_id = session.query(func.max(CacheChangeLog.id)).scalar() or 0
+                return 0
+            gaps = BotDBUtil.CacheChangeLog.gaps
+            now = time.monotonic()
+            for gap in [x for x, found in gaps.items() if now - found > BotDBUtil.CacheChangeLog.gap_timeout]:
+                del gaps[gap]
+            condition = CacheChangeLog.id > last_id
+            if gaps:
+                condition = or_(condition, CacheChangeLog.id.in_(list(gaps)))
+            changes = session.query(CacheChangeLog).filter(condition).order_by(CacheChangeLog.id).all()
+            if not changes:
+                return 0
+            handlers = {'modules': BotDBUtil.Module.invalidate, 'sender': BotDBUtil.SenderInfo.invalidate}
+            applied = 0
+            newest = last_id
+            for change in changes:
+                if change.id > newest:
+                    for gap in range(max(newest + 1, change.id - BotDBUtil.CacheChangeLog.max_gaps), change.id):
+                        gaps[gap] = now
+                    newest = change.id
+                else:
+                    gaps.pop(change.id, None)
+                if change.origin != BotDBUtil.CacheChangeLog.origin and change.cacheName in handlers:
+                    handlers[change.cacheName](change.cacheKey)
+                    applied += 1
+            BotDBUtil.CacheChangeLog.last_id = newest
+            if newest // 1000 != last_id // 1000:  # 每1000条变动清理一次旧记录
+                session.query(CacheChangeLog) \
+                    .filter(CacheChangeLog.id <= newest - BotDBUtil.CacheChangeLog.keep) \
+                    .delete(synchronize_session=False)
                 session.commit()
+            return applied
+
+    class TargetContext:
+        """
+        处理一条消息所需的对象数据，包括发送者信息、已启用的模块、禁言状态、对象管理员以及各模块注册的对象设置。
+        这些数据通过一次查询一并取得，并在消息的生命周期内缓存于MessageSession中。
+        已启用的模块通过外连接按行取得（每个模块一行），已有缓存时不再连接。
+        """
+        module_tables = {}
+
+        @staticmethod
+        def register_table(table, target_id=None):
+            """
+            注册需要随上下文一并载入的模块对象设置表，该表需要有targetId列。
+            :param table: ORM表
+            :param target_id: 从MessageSession取得该表所用targetId的函数，默认为msg.target.targetId
+            """
+            BotDBUtil.TargetContext.module_tables[table] = target_id
+
+        @staticmethod
+        def get(msg: MessageSession) -> 'BotDBUtil.TargetContext':
+            """
+            取得消息的上下文，若尚未载入则进行载入。
+            """
+            context = getattr(msg, 'context', None)
+            if context is None:
+                context = msg.context = BotDBUtil.TargetContext(msg)
+            return context
+
+        @retry(stop=stop_after_attempt(3))
+        @auto_rollback_error
+        def __init__(self, msg: MessageSession):
+            self.msg = msg
+            self.targetId = str(msg.target.targetId)
+            self.senderId = msg.target.senderId
+            module_tables = list(BotDBUtil.TargetContext.module_tables.items())
+            cached_modules = EnabledModulesCache.get_cache(self.targetId) if cache else None
+            columns = [SenderInfo, MuteList.targetId, TargetAdmin.id, *[table for table, _ in module_tables]]
+            if cached_modules is None:
+                columns.append(TargetEnabledModule.moduleName)
+            anchor = select(literal(1).label('anchor')).subquery()
+            query = session.query(*columns).select_from(anchor) \
+                .outerjoin(SenderInfo, SenderInfo.id == self.senderId) \
+                .outerjoin(MuteList, MuteList.targetId == self.targetId) \
+                .outerjoin(TargetAdmin, and_(TargetAdmin.senderId == self.senderId,
+                                             TargetAdmin.targetId == self.targetId))
+            for table, target_id in module_tables:
+                query = query.outerjoin(table, table.targetId == (target_id(msg) if target_id is not None
+                                                                  else self.targetId))
+            if cached_modules is None:
+                query = query.outerjoin(TargetEnabledModule, TargetEnabledModule.targetId == self.targetId)
+            result = query.all()
+            row = result[0]
+            sender_info, mute, target_admin = row[:3]
+            self.muted = mute is not None
+            self.senderInfo = BotDBUtil.SenderInfo(self.senderId, query=sender_info, preloaded=True,
+                                                   target_admins={self.targetId: target_admin is not None})
+            if cached_modules is None:
+                # 按行读取而不在数据库中拼接字符串，以免受GROUP_CONCAT长度上限影响
+                enabled_modules = list(dict.fromkeys(r[-1] for r in result if r[-1] is not None))
+            else:
+                enabled_modules = list(cached_modules)
+            self.modules = BotDBUtil.Module(self.targetId, enabled_modules=enabled_modules, preloaded=True)
+            self.rows = {table: row[3 + i] for i, (table, _) in enumerate(module_tables)}
+
+        def get_row(self, table):
+            """
+            取得已注册的模块对象设置表中该对象的行，不存在时为None
+            """
+            return self.rows.get(table)
+
+        def set_row(self, table, query):
+            self.rows[table] = query
+
+
+if cache:  # 未开启缓存时没有需要清除的内容，不必轮询变动记录
+    @Scheduler.scheduled_job('interval', seconds=cache_sync_interval, next_run_time=datetime.datetime.now())
+    async def sync_cache_changes():
+        await run_sync(BotDBUtil.CacheChangeLog.apply)
 
 
-__all__ = ["BotDBUtil", "auto_rollback_error", "session"]
+__all__ = ["BotDBUtil", "auto_rollback_error", "session", "run_sync"]
@@ -0,0 +1,42 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from sqlalchemy.orm import scoped_session
+
+from database.orm import POOL_SIZE
+
+DBExecutor = ThreadPoolExecutor(max_workers=POOL_SIZE, thread_name_prefix='database')
+
+_scoped_sessions = []
+
+
+def register_scoped_session(session: scoped_session):
+    """
+    注册一个线程会话，使其在每次数据库操作结束后被关闭
+    """
+    _scoped_sessions.append(session)
+
+
+def unit_of_work(func, *args, **kwargs):
+    """
+    将一次数据库操作作为一个工作单元执行，结束后关闭本线程的会话，下一次操作会重新从数据库读取数据
+    """
+    try:
+        return func(*args, **kwargs)
+    finally:
+        for session in _scoped_sessions:
+            session.remove()
+
+
+async def run_sync(func, *args, **kwargs):
+    """
+    在数据库线程池中执行同步的数据库操作并等待其结果，避免查询与提交阻塞事件循环。
+    每次调用都是一个独立的工作单元，拥有自己的会话，因此不同的调用之间可以并发执行。
+    :param func: 需要执行的函数，如BotDBUtil.SenderInfo或其方法
+    :return: 函数的返回值
+    """
+    return await asyncio.get_running_loop().run_in_executor(DBExecutor, partial(unit_of_work, func, *args, **kwargs))
+
+
+__all__ = ["DBExecutor", "register_scoped_session", "unit_of_work", "run_sync"]
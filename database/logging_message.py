@@ -3,9 +3,11 @@ import datetime
 import ujson as json
 from sqlalchemy import create_engine, Column, String, Text, Integer, TIMESTAMP, text
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, scoped_session
 from tenacity import retry, stop_after_attempt
 
+from database.executor import register_scoped_session
+
 Base = declarative_base()
 
 DB_LINK = 'sqlite:///database/msg.db'
@@ -38,17 +40,21 @@ class UnfriendlyActionsTable(Base):
 
 class MSGDBSession:
     def __init__(self):
-        self.engine = engine = create_engine(DB_LINK)
+        self.engine = engine = create_engine(DB_LINK, connect_args={'check_same_thread': False})
         Base.metadata.create_all(bind=engine, checkfirst=True)
-        self.Session = sessionmaker()
-        self.Session.configure(bind=self.engine)
+        self.Session = sessionmaker(bind=self.engine, expire_on_commit=False)
 
     @property
     def session(self):
         return self.Session()
 
+    @property
+    def scoped_session(self) -> scoped_session:
+        return scoped_session(self.Session)
+
 
-session = MSGDBSession().session
+session = MSGDBSession().scoped_session
+register_scoped_session(session)
 
 
 def auto_rollback_error(func):
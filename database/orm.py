@@ -1,19 +1,50 @@
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, scoped_session
 
 from config import Config
 from database.tables import *
 
 DB_LINK = Config('db_path')
+POOL_SIZE = int(Config('db_pool_size') or 5)
+POOL_RECYCLE = int(Config('db_pool_recycle') or 3600)
+
+
+def engine_options(db_link: str) -> dict:
+    """
+    返回创建引擎所用的连接池配置
+    """
+    if db_link.startswith('sqlite'):
+        return {'connect_args': {'check_same_thread': False}}
+    options = {'pool_size': POOL_SIZE, 'max_overflow': POOL_SIZE, 'pool_pre_ping': True}
+    if db_link.startswith('mysql'):
+        options['pool_recycle'] = POOL_RECYCLE  # 避免使用已被MySQL的wait_timeout断开的连接
+    return options
 
 
 class DBSession:
+    _engines = {}
+
     def __init__(self):
-        self.engine = engine = create_engine(DB_LINK)
+        self.engine = engine = DBSession.get_engine(DB_LINK)
         Base.metadata.create_all(bind=engine, checkfirst=True)
-        self.Session = sessionmaker()
-        self.Session.configure(bind=self.engine)
+        self.Session = sessionmaker(bind=engine, expire_on_commit=False)
+
+    @staticmethod
+    def get_engine(db_link: str):
+        """
+        同一数据库的所有会话共用一个引擎，即共用一个连接池
+        """
+        if db_link not in DBSession._engines:
+            DBSession._engines[db_link] = create_engine(db_link, **engine_options(db_link))
+        return DBSession._engines[db_link]
 
     @property
     def session(self):
         return self.Session()
+
+    @property
+    def scoped_session(self) -> scoped_session:
+        """
+        每个线程各自使用一个会话，需要在一次数据库操作结束后调用remove()
+        """
+        return scoped_session(self.Session)
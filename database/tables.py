@@ -1,16 +1,24 @@
-from sqlalchemy import Column, Integer, String, Text, TIMESTAMP, Boolean, text
+from sqlalchemy import Column, Integer, String, Text, TIMESTAMP, Boolean, Index, text
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
 
 
 class EnabledModules(Base):
-    """已打开的模块"""
+    """已打开的模块（旧版，以'|'连接的字符串储存，仅用于迁移）"""
     __tablename__ = "EnabledModules"
     targetId = Column(String(512), primary_key=True)
     enabledModules = Column(Text)
 
 
+class TargetEnabledModule(Base):
+    """已打开的模块，每个对象的每个模块各占一行"""
+    __tablename__ = "TargetEnabledModule"
+    targetId = Column(String(512), primary_key=True)
+    moduleName = Column(String(128), primary_key=True)
+    __table_args__ = (Index('ix_TargetEnabledModule_moduleName_targetId', 'moduleName', 'targetId'),)
+
+
 class SenderInfo(Base):
     """发送者信息"""
     __tablename__ = "SenderInfo"
@@ -49,4 +57,14 @@ class GroupAllowList(Base):
     targetId = Column(String(512), primary_key=True)
 
 
-__all__ = ["Base", "EnabledModules", "TargetAdmin", "SenderInfo", "CommandTriggerTime", "GroupAllowList"]
+class CacheChangeLog(Base):
+    """缓存变动记录，用于通知其他机器人进程清除对应的缓存"""
+    __tablename__ = "CacheChangeLog"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    cacheName = Column(String(64))
+    cacheKey = Column(String(512))
+    origin = Column(String(64))
+
+
+__all__ = ["Base", "EnabledModules", "TargetEnabledModule", "TargetAdmin", "SenderInfo", "CommandTriggerTime", "GroupAllowList",
+           "CacheChangeLog"]
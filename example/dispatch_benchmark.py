@@ -0,0 +1,27 @@
+import timeit
+
+from core.elements import Command, RegexCommand
+from core.loader import ModulesManager
+
+for i in range(60):
+    ModulesManager.add_module(Command(f'bench_command_{i}', alias=f'bc{i}', exclude_from='QQ|Guild'))
+for i in range(10):
+    ModulesManager.add_module(RegexCommand(f'bench_regex_{i}', available_for=['QQ', 'QQ|Group']))
+
+
+def before():
+    modules = ModulesManager.build_modules_list_as_dict('QQ|Group')
+    aliases = ModulesManager.build_modules_alias_map()
+    regex = {m: modules[m] for m in modules if isinstance(modules[m], RegexCommand)}
+    return modules, aliases, regex
+
+
+def after():
+    table = ModulesManager.return_dispatch_table('QQ|Group')
+    return table.modules, table.aliases, table.regex_modules
+
+
+number = 10000
+for name, func in (('before', before), ('after', after)):
+    cost = timeit.timeit(func, number=number) / number
+    print(f'{name}: {cost * 1e6:.2f} us/message')
@@ -0,0 +1,38 @@
+import re
+import timeit
+
+from core.elements import Plain
+from core.elements.message.chain import match_kecode
+
+rc = ''.join(f'{i}. 12:00:00 - 用户{i} 编辑了 页面{i}（+{i * 7}）：修正错别字\n' for i in range(500))
+with_kecode = '获取失败：404[Ke:Image,path=https://http.cat/404.jpg]\n' + rc
+many_kecode = '[Ke:plain,text=a][Ke:plain,text=b]' * 500
+
+
+def before(text):
+    split_all = re.split(r'(\[Ke:.*?])', text)
+    for x in split_all:
+        if x == '':
+            split_all.remove('')
+    elements = []
+    for e in split_all:
+        match = re.match(r'\[Ke:(.*?),(.*)]', e)
+        if not match:
+            if e != '':
+                elements.append(Plain(e))
+        else:
+            args = re.split(r',|,.\s', match.group(2))
+            for x in args:
+                if x == '':
+                    args.remove('')
+            for a in args:
+                ma = re.match(r'(.*?)=(.*)', a)
+                elements.append(Plain(ma.group(2) if ma and ma.group(1) == 'text' else a))
+    return elements
+
+
+number = 1000
+for text_name, text in (('rc', rc), ('rc with kecode', with_kecode), ('many kecode', many_kecode)):
+    for name, func in (('before', before), ('after', match_kecode)):
+        cost = timeit.timeit(lambda: func(text), number=number) / number
+        print(f'{text_name} {name}: {cost * 1e6:.2f} us/message')
@@ -0,0 +1,43 @@
+import base64
+
+from core.elements import Image, Plain, Voice
+from core.elements.message.chain import match_kecode
+
+
+def dump(elements):
+    result = []
+    for e in elements:
+        if isinstance(e, Plain):
+            result.append(('Plain', e.text))
+        elif isinstance(e, Image):
+            result.append(('Image', e.path, e.headers))
+        elif isinstance(e, Voice):
+            result.append(('Voice', e.path))
+    return result
+
+
+headers = base64.b64encode(b'{"referer": "https://http.cat/"}').decode()
+cases = [
+    ('普通消息', [('Plain', '普通消息')]),
+    ('', []),
+    ('[Ke:plain,text=你好]', [('Plain', '你好')]),
+    ('前[Ke:plain,a,b]后', [('Plain', '前'), ('Plain', 'a'), ('Plain', 'b'), ('Plain', '后')]),
+    ('[Ke:Plain,key=value]', [('Plain', 'key=value')]),
+    ('404[Ke:Image,path=https://http.cat/404.jpg]',
+     [('Plain', '404'), ('Image', 'https://http.cat/404.jpg', None)]),
+    ('[Ke:image,path=https://example.com/a.jpg]', []),
+    ('[Ke:image,path=file:///tmp/a.png]', [('Image', 'file:///tmp/a.png', None)]),
+    (f'[Ke:image,path=https://http.cat/200.jpg,headers={headers}]',
+     [('Image', 'https://http.cat/200.jpg', {'referer': 'https://http.cat/'})]),
+    ('[Ke:voice,path=file:///tmp/a.mp3]', [('Voice', 'file:///tmp/a.mp3')]),
+    ('[Ke:voice,a.mp3]', [('Voice', 'a.mp3')]),
+    ('[Ke:unknown,a]', []),
+    ('[Ke:noargs]', [('Plain', '[Ke:noargs]')]),
+    ('[Ke:plain,text=a\n]', [('Plain', '[Ke:plain,text=a\n]')]),
+    ('a[Ke:plain,x][Ke:plain,y]b', [('Plain', 'a'), ('Plain', 'x'), ('Plain', 'y'), ('Plain', 'b')]),
+]
+
+for text, expected in cases:
+    result = dump(match_kecode(text))
+    assert result == expected, f'{text!r}: {result} != {expected}'
+print(f'{len(cases)} cases passed.')
@@ -0,0 +1,44 @@
+import random
+import string
+import timeit
+
+from core.elements import Embed, EmbedField, Plain, Secret
+from core.elements.message.chain import MessageChain
+
+random.seed(0)
+Secret.list = [''.join(random.choice(string.ascii_letters + string.digits) for _ in range(random.randint(8, 40)))
+               for _ in range(25)] + ['127.0.0.1:11451', 'mysql+pymysql://', '2052142661', 'QQ|2596322644']
+Secret.compile()
+
+wiki = MessageChain([Plain('您要的Minecraft Wiki页面：https://minecraft.fandom.com/zh/wiki/%E7%BA%A2%E7%9F%B3\n'
+                           + '红石是一种矿物，可以用于传输红石信号。' * 80)])
+rc = MessageChain([Plain(f'{i}. 12:00:00 - 用户{i} 编辑了 页面{i}（+{i * 7}）\n') for i in range(50)])
+embed = MessageChain([Embed(title='Mojira', description='描述' * 200, url='https://bugs.mojang.com/browse/MC-4',
+                            author='Mojang', footer='Teahouse',
+                            fields=[EmbedField(f'字段{i}', f'值{i}' * 20) for i in range(10)])])
+
+
+def before(chain):
+    for v in chain.value:
+        if isinstance(v, Plain):
+            for secret in Secret.list:
+                if v.text.upper().find(secret.upper()) != -1:
+                    return False
+        elif isinstance(v, Embed):
+            for secret in Secret.list:
+                for text in [v.title, v.description, v.footer, v.author, v.url] \
+                        + [x for f in v.fields for x in (f.name, f.value)]:
+                    if text.upper().find(secret.upper()) != -1:
+                        return False
+    return True
+
+
+def after(chain):
+    return chain.is_safe
+
+
+number = 1000
+for chain_name, chain in (('wiki', wiki), ('rc', rc), ('embed', embed)):
+    for name, func in (('before', before), ('after', after)):
+        cost = timeit.timeit(lambda: func(chain), number=number) / number
+        print(f'{chain_name} {name}: {cost * 1e6:.2f} us/message')
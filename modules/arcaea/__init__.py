@@ -5,6 +5,7 @@ from config import Config
 from core.component import on_command
 from core.elements import MessageSession, Plain, Image
 from core.utils import get_url
+from database import run_sync
 from .dbutils import ArcBindInfoManager
 from .getb30 import getb30
 from .getb30_official import getb30_official
@@ -38,7 +39,7 @@ async def _(msg: MessageSession):
         else:
             return await msg.sendMessage('请输入正确的好友码！')
     else:
-        get_friendcode_from_db = ArcBindInfoManager(msg).get_bind_friendcode()
+        get_friendcode_from_db = await run_sync(lambda: ArcBindInfoManager(msg).get_bind_friendcode())
         if get_friendcode_from_db is not None:
             query_code = get_friendcode_from_db
     if query_code is not None:
@@ -46,8 +47,8 @@ async def _(msg: MessageSession):
             try:
                 resp = await getb30_official(query_code)
                 msgchain = [Plain(resp['text'])]
-                if 'file' in resp and msg.Feature.image:
-                    msgchain.append(Image(path=resp['file']))
+                if 'image' in resp and msg.Feature.image:
+                    msgchain.append(Image(path=resp['image']))
                 await msg.sendMessage(msgchain)
             except Exception:
                 traceback.print_exc()
@@ -57,8 +58,8 @@ async def _(msg: MessageSession):
             try:
                 resp = await getb30(query_code)
                 msgchain = [Plain(resp['text'])]
-                if 'file' in resp and msg.Feature.image:
-                    msgchain.append(Image(path=resp['file']))
+                if 'image' in resp and msg.Feature.image:
+                    msgchain.append(Image(path=resp['image']))
                 await msg.sendMessage(msgchain)
             except Exception:
                 await msg.sendMessage('获取失败。')
@@ -85,7 +86,7 @@ async def _(msg: MessageSession):
         else:
             return await msg.sendMessage('请输入正确的好友码！')
     else:
-        get_friendcode_from_db = ArcBindInfoManager(msg).get_bind_friendcode()
+        get_friendcode_from_db = await run_sync(lambda: ArcBindInfoManager(msg).get_bind_friendcode())
         if get_friendcode_from_db is not None:
             query_code = get_friendcode_from_db
     if query_code is not None:
@@ -118,12 +119,13 @@ async def _(msg: MessageSession):
     code: str = msg.parsed_msg['<friendcode/username>']
     getcode = await get_userinfo(code)
     if getcode:
-        bind = ArcBindInfoManager(msg).set_bind_info(username=getcode[0], friendcode=getcode[1])
+        bind = await run_sync(lambda: ArcBindInfoManager(msg).set_bind_info(username=getcode[0],
+                                                                            friendcode=getcode[1]))
         if bind:
             await msg.sendMessage(f'绑定成功：{getcode[0]}({getcode[1]})')
     else:
         if code.isdigit():
-            bind = ArcBindInfoManager(msg).set_bind_info(username='', friendcode=code)
+            bind = await run_sync(lambda: ArcBindInfoManager(msg).set_bind_info(username='', friendcode=code))
             if bind:
                 await msg.sendMessage('绑定成功，但是无法获取用户信息。请自行检查命令是否可用。')
         else:
@@ -132,7 +134,7 @@ async def _(msg: MessageSession):
 
 @arc.handle('unbind {取消绑定用户}')
 async def _(msg: MessageSession):
-    unbind = ArcBindInfoManager(msg).remove_bind_info()
+    unbind = await run_sync(lambda: ArcBindInfoManager(msg).remove_bind_info())
     if unbind:
         await msg.sendMessage('取消绑定成功。')
 
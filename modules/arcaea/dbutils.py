@@ -29,6 +29,7 @@ class ArcBindInfoManager:
     @retry(stop=stop_after_attempt(3), reraise=True)
     @auto_rollback_error
     def set_bind_info(self, username, friendcode):
+        session.add(self.query)
         self.query.username = username
         self.query.friendcode = friendcode
         session.commit()
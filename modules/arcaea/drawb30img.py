@@ -1,7 +1,6 @@
 import os
 import random
 import traceback
-import uuid
 
 from PIL import Image, ImageDraw, ImageFont, ImageFilter
 
@@ -158,9 +157,7 @@ def drawb30(Username, b30, r10, ptt, character, path='', official=False):
     if __name__ == '__main__':
         b30img.show()
     else:
-        savefilename = os.path.abspath(f'./cache/{str(uuid.uuid4())}.jpg')
-        b30img.convert("RGB").save(savefilename)
-        return savefilename
+        return b30img
 
 
 if __name__ == '__main__':
@@ -120,9 +120,9 @@ async def getb30_official(usercode):
         last5list += f'[{last5rank}] {trackname}\n' \
                      f'[{last5rank}] {score} / {realptt / 10} -> {round(ptt, 4)}\n'
     print(last5list)
-    filename = drawb30(username, b30_avg, r10_avg, potential, 0, newdir, official=True)
+    b30img = drawb30(username, b30_avg, r10_avg, potential, 0, newdir, official=True)
     filelist = os.listdir(newdir)
     for x in filelist:
         os.remove(f'{newdir}/{x}')
     os.removedirs(newdir)
-    return {'text': f'获取结果\nB30: {b30_avg} | R10: {r10_avg}\nB30倒5列表：\n{last5list}', 'file': filename}
+    return {'text': f'获取结果\nB30: {b30_avg} | R10: {r10_avg}\nB30倒5列表：\n{last5list}', 'image': b30img}
@@ -17,7 +17,7 @@ async def bugtracker_get(MojiraID):
     FixVersion = False
     ID = str.upper(MojiraID)
     json_url = 'https://bugs.mojang.com/rest/api/2/issue/' + ID
-    get_json = await get_url(json_url)
+    get_json = await get_url(json_url, cache_ttl=60)
     if get_json:
         load_json = json.loads(get_json)
         errmsg = ''
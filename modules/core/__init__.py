@@ -6,14 +6,19 @@ import traceback
 import psutil
 import ujson as json
 
+from core.cache_manager import CacheManager
 from core.component import on_command
 from core.elements import MessageSession, Command, PrivateAssets, Image, Plain
 from core.loader import ModulesManager
+from core.media_cache import MediaCache
 from core.parser.command import CommandParser, InvalidHelpDocTypeError
 from core.parser.message import remove_temp_ban
+from core.send_queue import SendQueue
 from core.tos import pardon_user, warn_user
+from core.utils.bot import get_url_flight
+from core.utils.http_cache import ResponseCache
 from core.utils.image_table import ImageTable, image_table_render, web_render
-from database import BotDBUtil
+from database import BotDBUtil, run_sync
 
 module = on_command('module',
                     base=True,
@@ -47,7 +52,7 @@ async def config_modules(msg: MessageSession):
                 wait_config_list.append(alias[module_])
             else:
                 wait_config_list.append(module_)
-    query = BotDBUtil.Module(msg)
+    query = (await run_sync(BotDBUtil.TargetContext.get, msg)).modules
     msglist = []
     recommend_modules_list = []
     recommend_modules_help_doc_list = []
@@ -79,12 +84,12 @@ async def config_modules(msg: MessageSession):
         if '-g' in msg.parsed_msg and msg.parsed_msg['-g']:
             get_all_channel = await msg.get_text_channel_list()
             for x in get_all_channel:
-                query = BotDBUtil.Module(f'{msg.target.targetFrom}|{x}')
-                query.enable(enable_list)
+                query = await run_sync(BotDBUtil.Module, f'{msg.target.targetFrom}|{x}')
+                await run_sync(query.enable, enable_list)
             for x in enable_list:
                 msglist.append(f'成功：为所有文字频道打开“{x}”模块')
         else:
-            if query.enable(enable_list):
+            if await run_sync(query.enable, enable_list):
                 for x in enable_list:
                     msglist.append(f'成功：打开模块“{x}”')
         if recommend_modules_list:
@@ -117,12 +122,12 @@ async def config_modules(msg: MessageSession):
         if '-g' in msg.parsed_msg and msg.parsed_msg['-g']:
             get_all_channel = await msg.get_text_channel_list()
             for x in get_all_channel:
-                query = BotDBUtil.Module(f'{msg.target.targetFrom}|{x}')
-                query.disable(disable_list)
+                query = await run_sync(BotDBUtil.Module, f'{msg.target.targetFrom}|{x}')
+                await run_sync(query.disable, disable_list)
             for x in disable_list:
                 msglist.append(f'成功：为所有文字频道关闭“{x}”模块')
         else:
-            if query.disable(disable_list):
+            if await run_sync(query.disable, disable_list):
                 for x in disable_list:
                     msglist.append(f'成功：关闭模块“{x}”')
     if msglist is not None:
@@ -133,8 +138,8 @@ async def config_modules(msg: MessageSession):
                                         '\n'.join(recommend_modules_help_doc_list) +
                                         '\n是否一并打开？')
         if confirm:
-            query = BotDBUtil.Module(msg)
-            if query.enable(recommend_modules_list):
+            query = (await run_sync(BotDBUtil.TargetContext.get, msg)).modules
+            if await run_sync(query.enable, recommend_modules_list):
                 msglist = []
                 for x in recommend_modules_list:
                     msglist.append(f'成功：打开模块“{x}”')
@@ -191,7 +196,7 @@ async def bot_help(msg: MessageSession):
 @hlp.handle()
 async def _(msg: MessageSession):
     module_list = ModulesManager.return_modules_list_as_dict(targetFrom=msg.target.targetFrom)
-    target_enabled_list = BotDBUtil.Module(msg).check_target_enabled_module_list()
+    target_enabled_list = (await run_sync(BotDBUtil.TargetContext.get, msg)).modules.check_target_enabled_module_list()
     developers = ModulesManager.return_modules_developers_map()
     legacy_help = True
     if web_render and msg.Feature.image:
@@ -360,6 +365,11 @@ async def _(msg: MessageSession):
         Swap_percent = psutil.swap_memory().percent
         Disk = int(psutil.disk_usage('/').used / (1024 * 1024 * 1024))
         DiskTotal = int(psutil.disk_usage('/').total / (1024 * 1024 * 1024))
+        flight = get_url_flight.stats()
+        http_cache = ResponseCache.stats()
+        cache_dir = CacheManager.stats()
+        send_queues = {name: queue.stats() for name, queue in SendQueue.queues.items()}
+        media_caches = {name: cache.stats() for name, cache in MediaCache.caches.items()}
         """
         try:
             GroupList = len(await app.groupList())
@@ -376,6 +386,15 @@ async def _(msg: MessageSession):
                    + f"\n物理内存：{RAM}M 使用率：{RAM_percent}{BFH}"
                    + f"\nSwap内存：{Swap}M 使用率：{Swap_percent}{BFH}"
                    + f"\n磁盘容量：{Disk}G/{DiskTotal}G"
+                   + f"\n已合并的重复请求：{flight['deduplicated']}/{flight['requests']}"
+                   + f"\nHTTP缓存命中率：{http_cache['hit_rate'] * 100:.1f}{BFH}"
+                   + f"\n缓存目录：{cache_dir['size'] / (1024 * 1024):.1f}M/{int(cache_dir['max_size'] / (1024 * 1024))}M"
+                   + f"（{cache_dir['files']}个文件，已清理{cache_dir['removed_files']}个）"
+                   + ''.join(f"\n{name}消息队列：排队{q['pending']}条，已发送{q['sent']}条（合并{q['merged']}条）"
+                             f"，平均延迟{q['latency_avg'] * 1000:.0f}ms，P95延迟{q['latency_p95'] * 1000:.0f}ms"
+                             for name, q in send_queues.items())
+                   + ''.join(f"\n{name}媒体缓存命中率：{m['hit_rate'] * 100:.1f}{BFH}（{m['size']}个文件）"
+                             for name, m in media_caches.items())
                    # + f"\n已加入QQ群聊：{GroupList}"
                    # + f" | 已添加QQ好友：{FriendList}" """
                    )
@@ -393,13 +412,16 @@ admin = on_command('admin',
 async def config_gu(msg: MessageSession):
     if msg.parsed_msg['add']:
         user = msg.parsed_msg['<UserID>']
-        if user and not BotDBUtil.SenderInfo(f"{msg.target.senderFrom}|{user}").check_TargetAdmin(msg.target.targetId):
-            if BotDBUtil.SenderInfo(f"{msg.target.senderFrom}|{user}").add_TargetAdmin(msg.target.targetId):
+        if user:
+            sender_info = await run_sync(BotDBUtil.SenderInfo, f"{msg.target.senderFrom}|{user}")
+            if not await run_sync(sender_info.check_TargetAdmin, msg.target.targetId) \
+                    and await run_sync(sender_info.add_TargetAdmin, msg.target.targetId):
                 await msg.sendMessage("成功")
     if msg.parsed_msg['del']:
         user = msg.parsed_msg['<UserID>']
         if user:
-            if BotDBUtil.SenderInfo(f"{msg.target.senderFrom}|{user}").remove_TargetAdmin(msg.target.targetId):
+            sender_info = await run_sync(BotDBUtil.SenderInfo, f"{msg.target.senderFrom}|{user}")
+            if await run_sync(sender_info.remove_TargetAdmin, msg.target.targetId):
                 await msg.sendMessage("成功")
 
 
@@ -411,7 +433,7 @@ async def add_su(message: MessageSession):
     user = message.parsed_msg['<user>']
     print(message.parsed_msg)
     if user:
-        if BotDBUtil.SenderInfo(user).edit('isSuperUser', True):
+        if await run_sync(lambda: BotDBUtil.SenderInfo(user).edit('isSuperUser', True)):
             await message.sendMessage('操作成功：已将' + user + '设置为超级用户。')
 
 
@@ -419,7 +441,7 @@ async def add_su(message: MessageSession):
 async def del_su(message: MessageSession):
     user = message.parsed_msg['<user>']
     if user:
-        if BotDBUtil.SenderInfo(user).edit('isSuperUser', False):
+        if await run_sync(lambda: BotDBUtil.SenderInfo(user).edit('isSuperUser', False)):
             await message.sendMessage('操作成功：已将' + user + '移出超级用户。')
 
 
@@ -445,7 +467,7 @@ ae = on_command('abuse', alias=['ae'], developers=['Dianliang233'], required_sup
 @ae.handle('check <user>')
 async def _(msg: MessageSession):
     user = msg.parsed_msg['<user>']
-    warns = BotDBUtil.SenderInfo(user).query.warns
+    warns = (await run_sync(BotDBUtil.SenderInfo, user)).query.warns
     await msg.sendMessage(f'{user} 已被警告 {warns} 次。')
 
 
@@ -482,14 +504,14 @@ async def _(msg: MessageSession):
 @ae.handle('ban <user>')
 async def _(msg: MessageSession):
     user = msg.parsed_msg['<user>']
-    if BotDBUtil.SenderInfo(user).edit('isInBlockList', True):
+    if await run_sync(lambda: BotDBUtil.SenderInfo(user).edit('isInBlockList', True)):
         await msg.sendMessage(f'成功封禁 {user}。')
 
 
 @ae.handle('unban <user>')
 async def _(msg: MessageSession):
     user = msg.parsed_msg['<user>']
-    if BotDBUtil.SenderInfo(user).edit('isInBlockList', False):
+    if await run_sync(lambda: BotDBUtil.SenderInfo(user).edit('isInBlockList', False)):
         await msg.sendMessage(f'成功解除 {user} 的封禁。')
 
 
@@ -572,13 +594,13 @@ tog = on_command('toggle', developers=['OasisAkari'], base=True)
 
 @tog.handle('typing {切换是否展示输入提示}')
 async def _(msg: MessageSession):
-    target = BotDBUtil.SenderInfo(msg.target.senderId)
+    target = (await run_sync(BotDBUtil.TargetContext.get, msg)).senderInfo
     state = target.query.disable_typing
     if not state:
-        target.edit('disable_typing', True)
+        await run_sync(target.edit, 'disable_typing', True)
         await msg.sendMessage('成功关闭输入提示。')
     else:
-        target.edit('disable_typing', False)
+        await run_sync(target.edit, 'disable_typing', False)
         await msg.sendMessage('成功打开输入提示。')
 
 
@@ -587,9 +609,12 @@ mute = on_command('mute', developers=['Dianliang233'], base=True, required_admin
 
 @mute.handle()
 async def _(msg: MessageSession):
-    if BotDBUtil.Muting(msg).check():
-        BotDBUtil.Muting(msg).remove()
+    context = await run_sync(BotDBUtil.TargetContext.get, msg)
+    if context.muted:
+        await run_sync(lambda: BotDBUtil.Muting(msg).remove())
+        context.muted = False
         await msg.sendMessage('成功取消禁言。')
     else:
-        BotDBUtil.Muting(msg).add()
+        await run_sync(lambda: BotDBUtil.Muting(msg).add())
+        context.muted = True
         await msg.sendMessage('成功禁言。')
@@ -1,6 +1,6 @@
 from core.component import on_command
 from core.elements import MessageSession, Image
-from database import BotDBUtil
+from database import BotDBUtil, run_sync
 from .dbutils import CytoidBindInfoManager
 from .profile import cytoid_profile
 from .rating import get_rating
@@ -28,20 +28,20 @@ async def _(msg: MessageSession):
     if pat:
         query_id = pat
     else:
-        query_id = CytoidBindInfoManager(msg).get_bind_username()
+        query_id = await run_sync(lambda: CytoidBindInfoManager(msg).get_bind_username())
         if query_id is None:
             return await msg.sendMessage('未绑定用户，请使用~cytoid bind <friendcode>绑定一个用户。')
     if query:
-        qc = BotDBUtil.CoolDown(msg, 'cytoid_rank')
+        qc = await run_sync(BotDBUtil.CoolDown, msg, 'cytoid_rank')
         c = qc.check(300)
         if c == 0:
             img = await get_rating(query_id, query)
-            if 'path' in img:
-                await msg.sendMessage([Image(path=img['path'])])
+            if 'image' in img:
+                await msg.sendMessage([Image(path=img['image'])])
             if 'text' in img:
                 await msg.sendMessage(img['text'])
             if img['status']:
-                qc.reset()
+                await run_sync(qc.reset)
         else:
             await msg.sendMessage(f'距离上次执行已过去{int(c)}秒，本命令的冷却时间为300秒。')
 
@@ -51,7 +51,7 @@ async def _(msg: MessageSession):
     code: str = msg.parsed_msg['<username>']
     getcode = await get_profile_name(code)
     if getcode:
-        bind = CytoidBindInfoManager(msg).set_bind_info(username=getcode[0])
+        bind = await run_sync(lambda: CytoidBindInfoManager(msg).set_bind_info(username=getcode[0]))
         if bind:
             if getcode[1]:
                 m = f'{getcode[1]}({getcode[0]})'
@@ -64,6 +64,6 @@ async def _(msg: MessageSession):
 
 @cytoid.handle('unbind {取消绑定用户}')
 async def _(msg: MessageSession):
-    unbind = CytoidBindInfoManager(msg).remove_bind_info()
+    unbind = await run_sync(lambda: CytoidBindInfoManager(msg).remove_bind_info())
     if unbind:
         await msg.sendMessage('取消绑定成功。')
@@ -2,6 +2,7 @@ import ujson as json
 
 from core.elements import MessageSession, Plain, Image
 from core.utils import get_url
+from database import run_sync
 from .dbutils import CytoidBindInfoManager
 
 
@@ -10,11 +11,11 @@ async def cytoid_profile(msg: MessageSession):
     if pat:
         query_id = pat
     else:
-        query_id = CytoidBindInfoManager(msg).get_bind_username()
+        query_id = await run_sync(lambda: CytoidBindInfoManager(msg).get_bind_username())
         if query_id is None:
             return await msg.sendMessage('未绑定用户，请使用~cytoid bind <friendcode>绑定一个用户。')
     profile_url = 'http://services.cytoid.io/profile/' + query_id
-    profile = json.loads(await get_url(profile_url))
+    profile = json.loads(await get_url(profile_url, cache_ttl=60))
     if 'statusCode' in profile:
         if profile['statusCode'] == 404:
             await msg.sendMessage('发生错误：此用户不存在。')
@@ -12,6 +12,7 @@ from PIL import Image, ImageEnhance, ImageFont, ImageDraw, ImageFilter, ImageOps
 from gql import Client, gql
 from gql.transport.aiohttp import AIOHTTPTransport
 
+from core.http_client import HTTPClient
 from core.utils import get_url
 
 
@@ -22,7 +23,7 @@ async def get_rating(uid, query_type):
         elif query_type == 'r30':
             query_type = 'recentRecords'
         Profile_url = 'http://services.cytoid.io/profile/' + uid
-        Profile_json = json.loads(await get_url(Profile_url))
+        Profile_json = json.loads(await get_url(Profile_url, cache_ttl=60))
         if 'statusCode' in Profile_json:
             if Profile_json['statusCode'] == 404:
                 return {'status': False, 'text': '发生错误：此用户不存在。'}
@@ -181,10 +182,8 @@ async def get_rating(uid, query_type):
         if __name__ == '__main__':
             b30img.show()
         else:
-            savefilename = os.path.abspath(f'./cache/{str(uuid.uuid4())}.jpg')
-            b30img.convert("RGB").save(savefilename)
             shutil.rmtree(workdir)
-            return {'status': True, 'path': savefilename}
+            return {'status': True, 'image': b30img}
     except Exception as e:
         traceback.print_exc()
         return {'status': False, 'text': '发生错误：' + str(e)}
@@ -200,13 +199,13 @@ async def download_cover_thumb(uid):
             os.mkdir(d)
         if not os.path.exists(path):
             level_url = 'http://services.cytoid.io/levels/' + uid
-            get_level = json.loads(await get_url(level_url))
+            get_level = json.loads(await get_url(level_url, cache_ttl=3600))
             cover_thumbnail = get_level['cover']['thumbnail']
-            async with aiohttp.ClientSession() as session:
-                async with session.get(cover_thumbnail) as resp:
-                    with open(path, 'wb+') as jpg:
-                        jpg.write(await resp.read())
-                        return path
+            session = HTTPClient.get_session()
+            async with session.get(cover_thumbnail) as resp:
+                with open(path, 'wb+') as jpg:
+                    jpg.write(await resp.read())
+                    return path
         else:
             return path
     except:
@@ -224,11 +223,11 @@ async def download_avatar_thumb(link, id):
             os.mkdir(d)
         if os.path.exists(path):
             os.remove(path)
-        async with aiohttp.ClientSession() as session:
-            async with session.get(link, timeout=aiohttp.ClientTimeout(total=20)) as resp:
-                with open(path, 'wb+') as jpg:
-                    jpg.write(await resp.read())
-                    return path
+        session = HTTPClient.get_session()
+        async with session.get(link, timeout=aiohttp.ClientTimeout(total=20)) as resp:
+            with open(path, 'wb+') as jpg:
+                jpg.write(await resp.read())
+                return path
     except:
         traceback.print_exc()
         return False
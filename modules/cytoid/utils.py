@@ -5,7 +5,7 @@ from core.utils import get_url
 
 async def get_profile_name(userid):
     profile_url = 'http://services.cytoid.io/profile/' + userid
-    profile = json.loads(await get_url(profile_url))
+    profile = json.loads(await get_url(profile_url, cache_ttl=60))
     if 'statusCode' in profile:
         if profile['statusCode'] == 404:
             return False
@@ -8,7 +8,7 @@ from modules.github.utils import time_diff, dirty_check, darkCheck
 
 async def repo(msg: MessageSession):
     try:
-        result = await get_url('https://api.github.com/repos/' + msg.parsed_msg['<name>'], fmt='json')
+        result = await get_url('https://api.github.com/repos/' + msg.parsed_msg['<name>'], fmt='json', cache_ttl=300)
         if 'message' in result and result['message'] == 'Not Found':
             raise RuntimeError('此仓库不存在。')
         elif 'message' in result and result['message']:
@@ -8,7 +8,8 @@ from modules.github.utils import dirty_check, darkCheck
 
 async def search(msg: MessageSession):
     try:
-        result = await get_url('https://api.github.com/search/repositories?q=' + msg.parsed_msg['<query>'], fmt='json')
+        result = await get_url('https://api.github.com/search/repositories?q=' + msg.parsed_msg['<query>'], fmt='json',
+                               cache_ttl=300)
         items = result['items']
         item_count_expected = int(result['total_count']) if result['total_count'] < 5 else 5
         items_out = []
@@ -8,7 +8,7 @@ from modules.github.utils import time_diff, dirty_check, darkCheck
 
 async def user(msg: MessageSession):
     try:
-        result = await get_url('https://api.github.com/users/' + msg.parsed_msg['<name>'], fmt='json')
+        result = await get_url('https://api.github.com/users/' + msg.parsed_msg['<name>'], fmt='json', cache_ttl=300)
         optional = []
         if 'hireable' in result and result['hireable'] is True:
             optional.append('Hireable')
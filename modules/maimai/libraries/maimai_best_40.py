@@ -3,9 +3,9 @@ import math
 import os
 from typing import Optional, Dict, List
 
-import aiohttp
 from PIL import Image, ImageDraw, ImageFont, ImageFilter
 
+from core.http_client import HTTPClient
 from modules.maimai.libraries.maimaidx_music import total_list
 
 scoreRank = 'D C B BB BBB A AA AAA S S+ SS SS+ SSS SSS+'.split(' ')
@@ -388,8 +388,8 @@ def computeRa(ds: float, achievement: float) -> int:
 
 
 async def generate(payload: Dict) -> (Optional[Image.Image], bool):
-    async with aiohttp.request("POST", "https://www.diving-fish.com/api/maimaidxprober/query/player",
-                               json=payload) as resp:
+    async with HTTPClient.get_session().post("https://www.diving-fish.com/api/maimaidxprober/query/player",
+                                             json=payload) as resp:
         if resp.status == 400:
             return None, 400
         if resp.status == 403:
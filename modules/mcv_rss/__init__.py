@@ -29,7 +29,7 @@ async def mcv_rss(bot: FetchTarget):
     try:
         version_file = os.path.abspath(f'{PrivateAssets.path}/mcversion.txt')
         verlist = getfileversions(version_file)
-        file = json.loads(await get_url(url))
+        file = json.loads(await get_url(url, cache_ttl=0))
         release = file['latest']['release']
         snapshot = file['latest']['snapshot']
         if release not in verlist:
@@ -57,7 +57,7 @@ async def mcv_jira_rss(bot: FetchTarget):
     try:
         version_file = os.path.abspath(f'{PrivateAssets.path}/mcjira_Java.txt')
         verlist = getfileversions(version_file)
-        file = json.loads(await get_url('https://bugs.mojang.com/rest/api/2/project/10400/versions'))
+        file = json.loads(await get_url('https://bugs.mojang.com/rest/api/2/project/10400/versions', cache_ttl=0))
         releases = []
         for v in file:
             if not v['archived']:
@@ -85,7 +85,7 @@ async def mcbv_jira_rss(bot: FetchTarget):
     try:
         version_file = os.path.abspath(f'{PrivateAssets.path}/mcjira_Bedrock.txt')
         verlist = getfileversions(version_file)
-        file = json.loads(await get_url('https://bugs.mojang.com/rest/api/2/project/10200/versions'))
+        file = json.loads(await get_url('https://bugs.mojang.com/rest/api/2/project/10200/versions', cache_ttl=0))
         releases = []
         for v in file:
             if not v['archived']:
@@ -113,7 +113,7 @@ async def mcdv_jira_rss(bot: FetchTarget):
     try:
         version_file = os.path.abspath(f'{PrivateAssets.path}/mcjira_Minecraft Dungeons.txt')
         verlist = getfileversions(version_file)
-        file = json.loads(await get_url('https://bugs.mojang.com/rest/api/2/project/11901/versions'))
+        file = json.loads(await get_url('https://bugs.mojang.com/rest/api/2/project/11901/versions', cache_ttl=0))
         releases = []
         for v in file:
             if not v['archived']:
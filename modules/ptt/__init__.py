@@ -1,10 +1,10 @@
 import os
+from io import BytesIO
 
 from PIL import Image, ImageDraw, ImageFont
 
 from core.component import on_command
 from core.elements import Image as Img, MessageSession
-from core.utils import cache_name
 
 assets_path = os.path.abspath('./assets/arcaea')
 
@@ -98,6 +98,6 @@ async def pttimg(msg: MessageSession):
     ptttext.alpha_composite(pttimg,
                             (int((ptttext_width - pttimg_width) / 2), int((ptttext_height - pttimg_height) / 2) - 11))
     pttimgr.alpha_composite(ptttext, (0, 0))
-    savepath = cache_name() + '.png'
-    pttimgr.save(savepath)
-    await msg.sendMessage([Img(path=savepath)])
+    buffer = BytesIO()
+    pttimgr.save(buffer, 'PNG')  # 保留透明背景
+    await msg.sendMessage([Img(buffer.getvalue())])
@@ -3,7 +3,7 @@ import asyncio
 from core.component import on_command, on_option
 from core.dirty_check import check
 from core.elements import MessageSession
-from database import BotDBUtil
+from database import BotDBUtil, run_sync
 from .server import server
 
 on_option('server_disable_revoke', desc='关闭server命令的自动撤回')  # 临时解决方案，后续会改动，归属到toggle命令下
@@ -14,7 +14,8 @@ s = on_command('server', alias='s', developers=['_LittleC_', 'OasisAkari'])
 @s.handle('<ServerIP>:<Port> [-r] [-p] {获取Minecraft Java/基岩版服务器motd。}',
           options_desc={'-r': '显示原始信息', '-p': '显示玩家列表'})
 async def main(msg: MessageSession):
-    enabled_addon = BotDBUtil.Module(msg).check_target_enabled_module('server_disable_revoke')
+    enabled_addon = (await run_sync(BotDBUtil.TargetContext.get, msg)).modules.check_target_enabled_module(
+        'server_disable_revoke')
     gather_list = []
     sm = ['j', 'b']
     for x in sm:
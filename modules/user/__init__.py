@@ -2,6 +2,7 @@ import re
 
 from core.component import on_command
 from core.elements import Plain, Image, MessageSession
+from database import run_sync
 from modules.wiki.dbutils import WikiTargetInfo
 from .userlib import GetUser
 
@@ -19,7 +20,7 @@ async def user(msg: MessageSession):
         mode = '-r'
     if msg.parsed_msg['-p'] is True:
         mode = '-p'
-    get_url = WikiTargetInfo(msg).get_start_wiki()
+    get_url = (await run_sync(WikiTargetInfo, msg)).get_start_wiki()
     if get_url:
         metaurl = get_url
         username = msg.parsed_msg['<username>']
@@ -27,7 +28,7 @@ async def user(msg: MessageSession):
         await msg.sendMessage('未设置起始wiki且没有提供Interwiki。')
     match_interwiki = re.match(r'(.*?):(.*)', username)
     if match_interwiki:
-        get_iw = WikiTargetInfo(msg).get_interwikis()
+        get_iw = (await run_sync(WikiTargetInfo, msg)).get_interwikis()
         if get_iw and match_interwiki.group(1) in get_iw:
             metaurl = get_iw[match_interwiki.group(1)]
             username = match_interwiki.group(2)
@@ -1,8 +1,7 @@
 import os
 from os.path import abspath
 
-import aiohttp
-
+from core.http_client import HTTPClient
 from modules.wiki.wikilib_v2 import WikiLib
 
 
@@ -20,11 +19,11 @@ async def dpng(link, ss):
                 if not os.path.exists(d):
                     os.mkdir(d)
                 if not os.path.exists(path):
-                    async with aiohttp.ClientSession() as session:
-                        async with session.get(imgurl) as resp:
-                            with open(path, 'wb+') as jpg:
-                                jpg.write(await resp.read())
-                                return True
+                    session = HTTPClient.get_session()
+                    async with session.get(imgurl) as resp:
+                        with open(path, 'wb+') as jpg:
+                            jpg.write(await resp.read())
+                            return True
                 else:
                     return True
             except Exception:
@@ -5,6 +5,7 @@ import urllib.parse
 import aiohttp
 
 from core.elements import Url
+from core.http_client import HTTPClient
 from core.elements.others import ErrorMessage
 from modules.wiki.utils.UTC8 import UTC8
 from modules.wiki.wikilib_v2 import WikiLib
@@ -12,12 +13,12 @@ from .gender import gender
 
 
 async def get_data(url: str, fmt: str):
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, timeout=aiohttp.ClientTimeout(total=20)) as req:
-            if hasattr(req, fmt):
-                return await getattr(req, fmt)()
-            else:
-                raise ValueError(f"NoSuchMethod: {fmt}")
+    session = HTTPClient.get_session()
+    async with session.get(url, timeout=aiohttp.ClientTimeout(total=20)) as req:
+        if hasattr(req, fmt):
+            return await getattr(req, fmt)()
+        else:
+            raise ValueError(f"NoSuchMethod: {fmt}")
 
 
 async def getwikiname(wikiurl):
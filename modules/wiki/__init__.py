@@ -11,7 +11,7 @@ from core.elements import MessageSession, Plain, Image, Voice, Url
 from core.exceptions import AbuseWarning
 from core.utils import download_to_cache
 from core.utils.image_table import image_table_render, ImageTable
-from database import BotDBUtil
+from database import BotDBUtil, run_sync
 from .dbutils import WikiTargetInfo, Audit
 from .getinfobox import get_infobox_pic
 from .utils.ab import ab
@@ -46,11 +46,11 @@ async def _(msg: MessageSession):
 
 @wiki.handle('set <WikiUrl> {设置起始查询Wiki}', required_admin=True)
 async def set_start_wiki(msg: MessageSession):
-    target = WikiTargetInfo(msg)
+    target = await run_sync(WikiTargetInfo, msg)
     check = await WikiLib(msg.parsed_msg['<WikiUrl>'], headers=target.get_headers()).check_wiki_available()
     if check.available:
         if not check.value.in_blocklist or check.value.in_allowlist:
-            result = WikiTargetInfo(msg).add_start_wiki(check.value.api)
+            result = await run_sync(target.add_start_wiki, check.value.api)
             if result:
                 await msg.sendMessage(
                     f'成功添加起始Wiki：{check.value.name}' + ('\n' + check.message if check.message != '' else ''))
@@ -65,11 +65,11 @@ async def set_start_wiki(msg: MessageSession):
 async def _(msg: MessageSession):
     iw = msg.parsed_msg['<Interwiki>']
     url = msg.parsed_msg['<WikiUrl>']
-    target = WikiTargetInfo(msg)
+    target = await run_sync(WikiTargetInfo, msg)
     check = await WikiLib(url, headers=target.get_headers()).check_wiki_available()
     if check.available:
         if not check.value.in_blocklist or check.value.in_allowlist:
-            result = target.config_interwikis(iw, check.value.api, let_it=True)
+            result = await run_sync(target.config_interwikis, iw, check.value.api, let_it=True)
             if result:
                 await msg.sendMessage(f'成功：添加自定义Interwiki\n{iw} -> {check.value.name}')
         else:
@@ -82,8 +82,8 @@ async def _(msg: MessageSession):
 @wiki.handle('iw (del|delete|remove|rm) <Interwiki> {删除自定义Interwiki}', required_admin=True)
 async def _(msg: MessageSession):
     iw = msg.parsed_msg['<Interwiki>']
-    target = WikiTargetInfo(msg)
-    result = target.config_interwikis(iw, let_it=False)
+    target = await run_sync(WikiTargetInfo, msg)
+    result = await run_sync(target.config_interwikis, iw, let_it=False)
     if result:
         await msg.sendMessage(f'成功：删除自定义Interwiki“{msg.parsed_msg["<Interwiki>"]}”')
 
@@ -91,7 +91,7 @@ async def _(msg: MessageSession):
 @wiki.handle(['iw list {展示当前设置的Interwiki}', 'iw show {iw list的别名}',
               'iw (list|show) legacy {展示当前设置的Interwiki（旧版）}'])
 async def _(msg: MessageSession):
-    target = WikiTargetInfo(msg)
+    target = await run_sync(WikiTargetInfo, msg)
     query = target.get_interwikis()
     start_wiki = target.get_start_wiki()
     base_interwiki_link = None
@@ -122,7 +122,7 @@ async def _(msg: MessageSession):
 
 @wiki.handle('iw get <Interwiki> {获取设置的Interwiki对应的api地址}')
 async def _(msg: MessageSession):
-    target = WikiTargetInfo(msg)
+    target = await run_sync(WikiTargetInfo, msg)
     query = target.get_interwikis()
     if query != {}:
         if msg.parsed_msg['<Interwiki>'] in query:
@@ -135,7 +135,7 @@ async def _(msg: MessageSession):
 
 @wiki.handle(['headers show {展示当前设置的headers}', 'headers list {headers show 的别名}'])
 async def _(msg: MessageSession):
-    target = WikiTargetInfo(msg)
+    target = await run_sync(WikiTargetInfo, msg)
     headers = target.get_headers()
     prompt = f'当前设置了以下标头：\n{json.dumps(headers)}\n如需自定义，请使用~wiki headers set <headers>。\n' \
              f'格式：\n' \
@@ -145,41 +145,41 @@ async def _(msg: MessageSession):
 
 @wiki.handle('headers (add|set) <Headers> {添加自定义headers}', required_admin=True)
 async def _(msg: MessageSession):
-    target = WikiTargetInfo(msg)
-    add = target.config_headers(" ".join(msg.trigger_msg.split(" ")[3:]), let_it=True)
+    target = await run_sync(WikiTargetInfo, msg)
+    add = await run_sync(target.config_headers, " ".join(msg.trigger_msg.split(" ")[3:]), let_it=True)
     if add:
         await msg.sendMessage(f'成功更新请求时所使用的Headers：\n{json.dumps(target.get_headers())}')
 
 
 @wiki.handle('headers (del|delete|remove|rm) <HeaderKey> {删除一个headers}', required_admin=True)
 async def _(msg: MessageSession):
-    target = WikiTargetInfo(msg)
-    delete = target.config_headers([msg.parsed_msg['<HeaderHey>']], let_it=False)
+    target = await run_sync(WikiTargetInfo, msg)
+    delete = await run_sync(target.config_headers, [msg.parsed_msg['<HeaderHey>']], let_it=False)
     if delete:
         await msg.sendMessage(f'成功更新请求时所使用的Headers：\n{json.dumps(target.get_headers())}')
 
 
 @wiki.handle('headers reset {重置headers}', required_admin=True)
 async def _(msg: MessageSession):
-    target = WikiTargetInfo(msg)
-    reset = target.config_headers('', let_it=None)
+    target = await run_sync(WikiTargetInfo, msg)
+    reset = await run_sync(target.config_headers, '', let_it=None)
     if reset:
         await msg.sendMessage(f'成功更新请求时所使用的Headers：\n{json.dumps(target.get_headers())}')
 
 
 @wiki.handle('prefix set <prefix> {设置查询自动添加前缀}', required_admin=True)
 async def _(msg: MessageSession):
-    target = WikiTargetInfo(msg)
+    target = await run_sync(WikiTargetInfo, msg)
     prefix = msg.parsed_msg['<prefix>']
-    set_prefix = target.set_prefix(prefix)
+    set_prefix = await run_sync(target.set_prefix, prefix)
     if set_prefix:
         await msg.sendMessage(f'成功更新请求时所使用的前缀：{prefix}')
 
 
 @wiki.handle('prefix reset {重置查询自动添加的前缀}', required_admin=True)
 async def _(msg: MessageSession):
-    target = WikiTargetInfo(msg)
-    set_prefix = target.del_prefix()
+    target = await run_sync(WikiTargetInfo, msg)
+    set_prefix = await run_sync(target.del_prefix)
     if set_prefix:
         await msg.sendMessage(f'成功重置请求时所使用的前缀。')
 
@@ -197,10 +197,10 @@ async def _(msg: MessageSession):
     if check.available:
         api = check.value.api
         if req['trust']:
-            res = Audit(api).add_to_AllowList(op)
+            res = await run_sync(Audit(api).add_to_AllowList, op)
             list_name = '白'
         else:
-            res = Audit(api).add_to_BlockList(op)
+            res = await run_sync(Audit(api).add_to_BlockList, op)
             list_name = '黑'
         if not res:
             await msg.sendMessage(f'失败，此wiki已经存在于{list_name}名单中：' + api)
@@ -219,10 +219,10 @@ async def _(msg: MessageSession):
     if check:
         api = check.value.api
         if req['distrust']:
-            res = Audit(api).remove_from_AllowList()
+            res = await run_sync(Audit(api).remove_from_AllowList)
             list_name = '白'
         else:
-            res = Audit(api).remove_from_BlockList()
+            res = await run_sync(Audit(api).remove_from_BlockList)
             list_name = '黑'
         if not res:
             await msg.sendMessage(f'失败，此wiki不存在于{list_name}名单中：' + api)
@@ -241,8 +241,8 @@ async def _(msg: MessageSession):
     if check:
         api = check.value.api
         audit = Audit(api)
-        allow = audit.inAllowList
-        block = audit.inBlockList
+        allow = await run_sync(lambda: audit.inAllowList)
+        block = await run_sync(lambda: audit.inBlockList)
         msg_list = []
         if allow:
             msg_list.append(api + '已存在于白名单。')
@@ -260,8 +260,8 @@ async def _(msg: MessageSession):
 
 @aud.handle('list')
 async def _(msg: MessageSession):
-    allow_list = Audit.get_allow_list()
-    block_list = Audit.get_block_list()
+    allow_list = await run_sync(Audit.get_allow_list)
+    block_list = await run_sync(Audit.get_block_list)
     legacy = True
     if msg.Feature.image:
         send_msgs = []
@@ -338,12 +338,13 @@ async def query_pages(session: Union[MessageSession, QueryInfo], title: Union[st
                       pageid: str = None, iw: str = None,
                       template=False, mediawiki=False, use_prefix=True):
     if isinstance(session, MessageSession):
-        target = WikiTargetInfo(session)
+        target = await run_sync(WikiTargetInfo, session)
         start_wiki = target.get_start_wiki()
         interwiki_list = target.get_interwikis()
         headers = target.get_headers()
         prefix = target.get_prefix()
-        enabled_fandom_addon = BotDBUtil.Module(session).check_target_enabled_module('wiki_fandom_addon')
+        context = await run_sync(BotDBUtil.TargetContext.get, session)
+        enabled_fandom_addon = context.modules.check_target_enabled_module('wiki_fandom_addon')
     elif isinstance(session, QueryInfo):
         start_wiki = session.api
         interwiki_list = []
@@ -541,7 +542,7 @@ rc_ = on_command('rc', desc='获取默认wiki的最近更改', developers=['Oasi
 
 @rc_.handle()
 async def rc_loader(msg: MessageSession):
-    start_wiki = WikiTargetInfo(msg).get_start_wiki()
+    start_wiki = (await run_sync(WikiTargetInfo, msg)).get_start_wiki()
     if start_wiki is None:
         return await msg.sendMessage('未设置起始wiki。')
     legacy = True
@@ -564,7 +565,7 @@ a = on_command('ab', desc='获取默认wiki的最近滥用日志', developers=['
 
 @a.handle()
 async def ab_loader(msg: MessageSession):
-    start_wiki = WikiTargetInfo(msg).get_start_wiki()
+    start_wiki = (await run_sync(WikiTargetInfo, msg)).get_start_wiki()
     if start_wiki is None:
         return await msg.sendMessage('未设置起始wiki。')
     legacy = True
@@ -587,7 +588,7 @@ n = on_command('newbie', desc='获取默认wiki的新用户', developers=['Oasis
 
 @n.handle()
 async def newbie_loader(msg: MessageSession):
-    start_wiki = WikiTargetInfo(msg).get_start_wiki()
+    start_wiki = (await run_sync(WikiTargetInfo, msg)).get_start_wiki()
     if start_wiki is None:
         return await msg.sendMessage('未设置起始wiki。')
     res = await newbie(start_wiki)
@@ -6,33 +6,44 @@ import ujson as json
 from tenacity import retry, stop_after_attempt
 
 from core.elements import MessageSession
-from database import session, auto_rollback_error
+from database import BotDBUtil, session, auto_rollback_error
 from .orm import WikiTargetSetInfo, WikiInfo, WikiAllowList, WikiBlockList
 
 
+def get_target_id(msg: MessageSession) -> str:
+    if msg.target.targetFrom != 'QQ|Guild':
+        return msg.target.targetId
+    return re.match(r'(QQ\|Guild\|.*?)\|.*', msg.target.targetId).group(1)
+
+
+BotDBUtil.TargetContext.register_table(WikiTargetSetInfo, get_target_id)
+
+
 class WikiTargetInfo:
     @retry(stop=stop_after_attempt(3), reraise=True)
     @auto_rollback_error
     def __init__(self, msg: [MessageSession, str]):
+        context = None
         if isinstance(msg, MessageSession):
-            if msg.target.targetFrom != 'QQ|Guild':
-                targetId = msg.target.targetId
-            else:
-                targetId = re.match(r'(QQ\|Guild\|.*?)\|.*', msg.target.targetId).group(1)
+            targetId = get_target_id(msg)
+            context = BotDBUtil.TargetContext.get(msg)
+            self.query = context.get_row(WikiTargetSetInfo)
         else:
             targetId = msg
-        self.query = session.query(WikiTargetSetInfo).filter_by(targetId=targetId).first()
+            self.query = session.query(WikiTargetSetInfo).filter_by(targetId=targetId).first()
         if self.query is None:
             session.add_all([WikiTargetSetInfo(targetId=targetId, iws='{}', headers='{}')])
             session.commit()
             self.query = session.query(WikiTargetSetInfo).filter_by(targetId=targetId).first()
+            if context is not None:
+                context.set_row(WikiTargetSetInfo, self.query)
 
     @retry(stop=stop_after_attempt(3), reraise=True)
     @auto_rollback_error
     def add_start_wiki(self, url):
+        session.add(self.query)
         self.query.link = url
         session.commit()
-        session.expire_all()
         return True
 
     def get_start_wiki(self) -> Union[str, None]:
@@ -42,6 +53,7 @@ class WikiTargetInfo:
     @retry(stop=stop_after_attempt(3), reraise=True)
     @auto_rollback_error
     def config_interwikis(self, iw: str, iwlink: str = None, let_it=True):
+        session.add(self.query)
         interwikis = json.loads(self.query.iws)
         if let_it:
             interwikis[iw] = iwlink
@@ -50,7 +62,6 @@ class WikiTargetInfo:
                 del interwikis[iw]
         self.query.iws = json.dumps(interwikis)
         session.commit()
-        session.expire_all()
         return True
 
     def get_interwikis(self) -> dict:
@@ -64,6 +75,7 @@ class WikiTargetInfo:
     @retry(stop=stop_after_attempt(3), reraise=True)
     @auto_rollback_error
     def config_headers(self, headers, let_it: [bool, None] = True):
+        session.add(self.query)
         headers = json.loads(headers)
         headers_ = json.loads(self.query.headers)
         if let_it:
@@ -90,6 +102,7 @@ class WikiTargetInfo:
     @retry(stop=stop_after_attempt(3), reraise=True)
     @auto_rollback_error
     def set_prefix(self, prefix: str):
+        session.add(self.query)
         self.query.prefix = prefix
         session.commit()
         return True
@@ -97,6 +110,7 @@ class WikiTargetInfo:
     @retry(stop=stop_after_attempt(3), reraise=True)
     @auto_rollback_error
     def del_prefix(self):
+        session.add(self.query)
         self.query.prefix = None
         session.commit()
         return True
@@ -123,6 +137,7 @@ class WikiSiteInfo:
         if self.query is None:
             session.add_all([WikiInfo(apiLink=self.api_link, siteInfo=json.dumps(info))])
         else:
+            session.add(self.query)
             self.query.siteInfo = json.dumps(info)
             self.query.timestamp = datetime.now()
         session.commit()
@@ -137,14 +152,12 @@ class Audit:
     @retry(stop=stop_after_attempt(3), reraise=True)
     @auto_rollback_error
     def inAllowList(self) -> bool:
-        session.expire_all()
         return True if session.query(WikiAllowList).filter_by(apiLink=self.api_link).first() else False
 
     @property
     @retry(stop=stop_after_attempt(3), reraise=True)
     @auto_rollback_error
     def inBlockList(self) -> bool:
-        session.expire_all()
         return True if session.query(WikiBlockList).filter_by(apiLink=self.api_link).first() else False
 
     @retry(stop=stop_after_attempt(3), reraise=True)
@@ -154,7 +167,6 @@ class Audit:
             return False
         session.add_all([WikiAllowList(apiLink=self.api_link, operator=op)])
         session.commit()
-        session.expire_all()
         return True
 
     @retry(stop=stop_after_attempt(3), reraise=True)
@@ -164,7 +176,6 @@ class Audit:
             return False
         session.delete(session.query(WikiAllowList).filter_by(apiLink=self.api_link).first())
         session.commit()
-        session.expire_all()
         return True
 
     @retry(stop=stop_after_attempt(3), reraise=True)
@@ -174,7 +185,6 @@ class Audit:
             return False
         session.add_all([WikiBlockList(apiLink=self.api_link, operator=op)])
         session.commit()
-        session.expire_all()
         return True
 
     @retry(stop=stop_after_attempt(3), reraise=True)
@@ -184,17 +194,16 @@ class Audit:
             return False
         session.delete(session.query(WikiBlockList).filter_by(apiLink=self.api_link).first())
         session.commit()
-        session.expire_all()
         return True
 
     @staticmethod
     @retry(stop=stop_after_attempt(3), reraise=True)
     @auto_rollback_error
     def get_allow_list() -> list:
-        return session.query(WikiAllowList.apiLink, WikiAllowList.operator)
+        return session.query(WikiAllowList.apiLink, WikiAllowList.operator).all()
 
     @staticmethod
     @retry(stop=stop_after_attempt(3), reraise=True)
     @auto_rollback_error
     def get_block_list() -> list:
-        return session.query(WikiBlockList.apiLink, WikiBlockList.operator)
+        return session.query(WikiBlockList.apiLink, WikiBlockList.operator).all()
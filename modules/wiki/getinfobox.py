@@ -10,6 +10,7 @@ import ujson as json
 from bs4 import BeautifulSoup, Comment
 
 from config import Config
+from core.http_client import HTTPClient
 from core.logger import Logger
 
 web_render = Config('web_render')
@@ -23,9 +24,9 @@ async def get_infobox_pic(link, page_link, headers, section=None) -> Union[str,
         if link[-1] != '/':
             link += '/'
         try:
-            async with aiohttp.ClientSession(headers=headers) as session:
-                async with session.get(page_link, timeout=aiohttp.ClientTimeout(total=20)) as req:
-                    html = await req.read()
+            session = HTTPClient.get_session()
+            async with session.get(page_link, timeout=aiohttp.ClientTimeout(total=20), headers=headers) as req:
+                html = await req.read()
         except:
             traceback.print_exc()
             return False
@@ -216,12 +217,12 @@ async def get_infobox_pic(link, page_link, headers, section=None) -> Union[str,
         picname = os.path.abspath(f'./cache/{pagename}.jpg')
         if os.path.exists(picname):
             os.remove(picname)
-        async with aiohttp.ClientSession() as session:
-            async with session.post(web_render, headers={
-                'Content-Type': 'application/json',
-            }, data=json.dumps(html)) as resp:
-                with open(picname, 'wb+') as jpg:
-                    jpg.write(await resp.read())
+        session = HTTPClient.get_session()
+        async with session.post(web_render, headers={
+            'Content-Type': 'application/json',
+        }, data=json.dumps(html)) as resp:
+            with open(picname, 'wb+') as jpg:
+                jpg.write(await resp.read())
         return picname
     except Exception:
         traceback.print_exc()
@@ -12,6 +12,7 @@ from core.dirty_check import check
 from core.elements import Url
 from core.logger import Logger
 from core.utils import get_url
+from database import run_sync
 from .dbutils import WikiSiteInfo as DBSiteInfo, Audit
 
 
@@ -207,10 +208,10 @@ class WikiLib:
                 if self.url.find('moegirl.org.cn') != -1:
                     message += '\n萌娘百科的api接口不稳定，请稍后再试或直接访问站点。'
                 return WikiStatus(available=False, value=False, message=message)
-        get_cache_info = DBSiteInfo(wiki_api_link).get()
+        get_cache_info = (await run_sync(DBSiteInfo, wiki_api_link)).get()
         if get_cache_info and datetime.datetime.now().timestamp() - get_cache_info[1].timestamp() < 43200:
             return WikiStatus(available=True,
-                              value=self.rearrange_siteinfo(get_cache_info[0], wiki_api_link),
+                              value=await run_sync(self.rearrange_siteinfo, get_cache_info[0], wiki_api_link),
                               message='')
         try:
             get_json = await self.get_json_from_api(wiki_api_link, log=True,
@@ -223,8 +224,8 @@ class WikiLib:
             if self.url.find('moegirl.org.cn') != -1:
                 message += '\n萌娘百科的api接口不稳定，请稍后再试或直接访问站点。'
             return WikiStatus(available=False, value=False, message=message)
-        DBSiteInfo(wiki_api_link).update(get_json)
-        info = self.rearrange_siteinfo(get_json, wiki_api_link)
+        await run_sync(lambda: DBSiteInfo(wiki_api_link).update(get_json))
+        info = await run_sync(self.rearrange_siteinfo, get_json, wiki_api_link)
         return WikiStatus(available=True, value=info,
                           message='警告：此wiki没有启用TextExtracts扩展，返回的页面预览内容将为未处理的原始Wikitext文本。'
                           if 'TextExtracts' not in info.extensions else '')